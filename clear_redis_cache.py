@@ -1,163 +1,776 @@
 #!/usr/bin/env python3
 """
 Script to clear all Redis cache entries.
-This script connects to Redis and clears all cache keys.
+This script connects to Redis and clears cache keys without blocking the server:
+keys are streamed with a cursor-based SCAN and removed with pipelined UNLINK
+batches, so client memory stays constant regardless of the keyspace size.
 """
 
+import argparse
+import fnmatch
+import re
 import redis
 import sys
 import os
+import time
 
-def clear_all_redis_cache():
+# Streaming tunables (can be overridden from the command line)
+SCAN_COUNT = int(os.getenv('REDIS_SCAN_COUNT', 1000))
+BATCH_SIZE = int(os.getenv('REDIS_BATCH_SIZE', 1000))
+PROGRESS_INTERVAL = float(os.getenv('REDIS_PROGRESS_INTERVAL', 2.0))
+
+# Maximum number of keys passed to a single UNLINK command inside a batch
+UNLINK_CHUNK = 100
+
+# Number of keys printed as a preview / left-over sample
+SAMPLE_SIZE = 10
+
+# UNLINK pipelines in flight per node when clearing several nodes in parallel
+NODE_CONCURRENCY = int(os.getenv('REDIS_NODE_CONCURRENCY', 4))
+
+# Time budget for a single server-side Lua invalidation call
+LUA_BUDGET_MS = float(os.getenv('REDIS_LUA_BUDGET_MS', 5.0))
+
+# Maximum number of keys passed to a single UNLINK inside the Lua script
+LUA_UNLINK_CHUNK = 1000
+
+# IDistributedCache prepends options.InstanceName (see Program.cs) to every key
+KEY_PREFIX = os.getenv('REDIS_KEY_PREFIX', 'AuditSystem')
+
+# Key families mirroring AuditSystem.Services.CacheKeys. A family matches the
+# key itself and everything nested under it, e.g. "template:published" covers
+# "template:published" and "template:published:user:<id>".
+CACHE_FAMILIES = {
+    'user': 'All user keys',
+    'user:id': 'UserById',
+    'user:username': 'UserByUsername',
+    'user:org': 'UsersByOrganization',
+    'user:role': 'UsersByRole',
+    'template': 'All template keys',
+    'template:id': 'TemplateById',
+    'template:user': 'TemplatesByUser',
+    'template:published': 'PublishedTemplates / PublishedTemplatesByUser',
+    'template:category': 'TemplatesByCategory / TemplatesByCategoryAndUser',
+    'template:assigned': 'AssignedTemplates',
+    'org': 'All organisation keys',
+    'org:id': 'OrganizationById',
+    'org:name': 'OrganizationByName',
+    'org:invitations': 'OrganizationInvitations',
+    'audit': 'All audit keys',
+    'audit:id': 'AuditById',
+    'audit:user': 'AuditsByUser',
+    'audit:template': 'AuditsByTemplate',
+    'audit:org': 'AuditsByOrganization',
+    'audit:status': 'AuditsByStatus',
+    'dashboard': 'All dashboard keys',
+    'dashboard:metrics': 'DashboardMetrics (global and per organisation)',
+    'dashboard:performance': 'DashboardUserPerformance',
+    'dashboard:template-stats': 'DashboardTemplateStats',
+    'dashboard:trends': 'DashboardAuditTrends (global and per organisation)',
+    'session': 'All session keys',
+    'session:user': 'UserSession',
+    'session:active': 'ActiveSessions',
+    'rate_limit': 'RateLimit',
+    'api': 'ApiResponse',
+    'health': 'HealthCheck',
+}
+
+# Expirations configured in CacheKeys (seconds), by top-level prefix
+CACHE_EXPIRATIONS = {
+    'user': 30 * 60,          # UserCacheExpiration
+    'template': 60 * 60,      # TemplateCacheExpiration
+    'org': 60 * 60,           # OrganizationCacheExpiration
+    'audit': 15 * 60,         # AuditCacheExpiration
+    'dashboard': 5 * 60,      # DashboardCacheExpiration
+    'session': 8 * 60 * 60,   # SessionCacheExpiration
+}
+
+# RedisCacheService falls back to one hour when no expiration is passed
+DEFAULT_EXPIRATION = 60 * 60
+
+# Entity-scoped patterns, mirroring OrganizationPattern / UserPattern /
+# TemplatePattern / AuditPattern plus the keys of other families that embed
+# the same entity ID.
+ENTITY_PATTERNS = {
+    'org': [
+        'org:*:{id}*',
+        'user:org:{id}',
+        'audit:org:{id}',
+        'dashboard:*:org:{id}',
+    ],
+    'user': [
+        'user:*:{id}*',
+        'template:user:{id}',
+        'template:published:user:{id}',
+        'template:category:*:user:{id}',
+        'template:assigned:{id}',
+        'audit:user:{id}',
+        'dashboard:performance:user:{id}',
+        'session:*:{id}*',
+    ],
+    'template': [
+        'template:*:{id}*',
+        'audit:template:{id}',
+        'dashboard:template-stats:{id}',
+    ],
+    'audit': [
+        'audit:*:{id}*',
+    ],
+}
+
+_GLOB_CHARS = re.compile(r'[*?\[\\]')
+
+# Server-side bulk invalidation: SCAN, match and UNLINK inside Redis until the
+# cursor wraps or the time budget is spent, so each call keeps Redis responsive.
+# ARGV: cursor, SCAN MATCH, COUNT, budget (microseconds), keys per UNLINK
+# (1 on Redis Cluster, where a multi-key UNLINK across hash slots fails with
+# CROSSSLOT), then optional Lua patterns of which a key must match at least one.
+# Returns: {next cursor, keys scanned, keys deleted, server time (microseconds)}
+LUA_SCAN_UNLINK = """
+redis.replicate_commands()
+local cursor = ARGV[1]
+local budget = tonumber(ARGV[4])
+local chunk = tonumber(ARGV[5])
+local t = redis.call('TIME')
+local started = tonumber(t[1]) * 1000000 + tonumber(t[2])
+local elapsed = 0
+local scanned, deleted = 0, 0
+repeat
+    local page = redis.call('SCAN', cursor, 'MATCH', ARGV[2], 'COUNT', ARGV[3])
+    cursor = page[1]
+    local batch = {}
+    for _, key in ipairs(page[2]) do
+        local matched = #ARGV < 6
+        for i = 6, #ARGV do
+            if string.match(key, ARGV[i]) then
+                matched = true
+                break
+            end
+        end
+        if matched then
+            batch[#batch + 1] = key
+        end
+    end
+    scanned = scanned + #page[2]
+    for i = 1, #batch, chunk do
+        deleted = deleted + redis.call('UNLINK', unpack(batch, i, math.min(i + chunk - 1, #batch)))
+    end
+    t = redis.call('TIME')
+    elapsed = tonumber(t[1]) * 1000000 + tonumber(t[2]) - started
+until cursor == '0' or elapsed >= budget
+return {cursor, scanned, deleted, elapsed}
+"""
+
+_LUA_MAGIC = set('^$()%.[]*+-?')
+
+
+class ScanDeleteStats:
+    """Running counters for a streaming SCAN + UNLINK pass."""
+
+    def __init__(self):
+        self.scan_calls = 0
+        self.scanned = 0
+        self.deleted = 0
+        self.batches = 0
+        self.call_times = []
+        self.server_times = []
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def keys_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.deleted / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.deleted} keys deleted ({self.scanned} scanned) in {self.batches} batches, "
+                f"{self.scan_calls} SCAN calls, {self.elapsed:.2f}s, {self.keys_per_second:,.0f} keys/s")
+
+    def timing_summary(self) -> str:
+        """Per-call round trip (and server-side, when known) latency percentiles."""
+        lines = [f"round trip  {format_latencies(self.call_times)}"]
+        if self.server_times:
+            lines.append(f"server      {format_latencies(self.server_times)}")
+        return "\n".join(lines)
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def format_latencies(seconds) -> str:
+    """Format a list of durations (seconds) as count / p50 / p95 / p99 / max in ms."""
+    values = sorted(seconds)
+    if not values:
+        return "no calls"
+    return (f"calls={len(values)} p50={percentile(values, 50) * 1000:.2f}ms "
+            f"p95={percentile(values, 95) * 1000:.2f}ms p99={percentile(values, 99) * 1000:.2f}ms "
+            f"max={values[-1] * 1000:.2f}ms")
+
+
+class KeyMatcher:
+    """Match keys against several glob patterns during a single SCAN pass.
+
+    SCAN accepts only one MATCH pattern, so the server-side filter is the
+    longest literal prefix shared by all patterns and the exact patterns are
+    applied client-side with one compiled regular expression.
+    """
+
+    def __init__(self, patterns, key_prefix=''):
+        self.patterns = [key_prefix + p for p in patterns]
+        self.scan_match = common_scan_match(self.patterns)
+        self._regex = re.compile('|'.join(f'(?:{fnmatch.translate(p)})' for p in self.patterns))
+
+    @property
+    def needs_client_filter(self) -> bool:
+        return self.patterns != [self.scan_match]
+
+    @property
+    def lua_patterns(self):
+        """The exact patterns as anchored Lua patterns for the server-side mode."""
+        if not self.needs_client_filter:
+            return []
+        return [glob_to_lua_pattern(p) for p in self.patterns]
+
+    def __call__(self, key) -> bool:
+        return self._regex.match(key) is not None
+
+
+def literal_prefix(pattern: str) -> str:
+    """Return the part of a glob pattern before its first wildcard."""
+    match = _GLOB_CHARS.search(pattern)
+    return pattern[:match.start()] if match else pattern
+
+
+def common_scan_match(patterns) -> str:
+    """Build the narrowest single SCAN MATCH pattern covering all ``patterns``."""
+    if len(patterns) == 1:
+        return patterns[0]
+    return os.path.commonprefix([literal_prefix(p) for p in patterns]) + '*'
+
+
+def glob_to_lua_pattern(pattern: str) -> str:
+    """Translate a Redis glob into an anchored Lua pattern (*, ? and [...] sets)."""
+    out = ['^']
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '*':
+            out.append('.*')
+        elif char == '?':
+            out.append('.')
+        elif char == '\\' and i + 1 < len(pattern):
+            i += 1
+            out.append('%' + pattern[i] if pattern[i] in _LUA_MAGIC else pattern[i])
+        elif char == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append('[' + body.replace('%', '%%') + ']')
+            i = end
+        else:
+            out.append('%' + char if char in _LUA_MAGIC else char)
+        i += 1
+    out.append('$')
+    return ''.join(out)
+
+
+def family_patterns(family: str):
+    """Expand a CacheKeys family (or a raw glob) into SCAN patterns."""
+    if _GLOB_CHARS.search(family):
+        return [family]
+    family = family.rstrip(':')
+    return [family, f"{family}:*"]
+
+
+def entity_patterns(entity: str, entity_id: str):
+    """Expand an entity ID into every key pattern that embeds it."""
+    return [p.format(id=entity_id.lower()) for p in ENTITY_PATTERNS[entity]]
+
+
+def get_redis_connection():
+    """Create a Redis connection from the REDIS_* environment variables."""
+    # You can modify these connection details based on your setup
+    redis_host = os.getenv('REDIS_HOST', 'localhost')
+    redis_port = int(os.getenv('REDIS_PORT', 6379))
+    redis_password = os.getenv('REDIS_PASSWORD', 'redis_password_123')
+    redis_db = int(os.getenv('REDIS_DB', 0))
+
+    print(f"🔄 Connecting to Redis at {redis_host}:{redis_port}...")
+
+    r = redis.Redis(
+        host=redis_host,
+        port=redis_port,
+        password=redis_password,
+        db=redis_db,
+        decode_responses=True
+    )
+
+    # Test connection
+    r.ping()
+    print("✅ Connected to Redis successfully")
+    return r
+
+
+def print_connection_help():
+    """Print the environment variables used to configure the connection."""
+    print("\n💡 Make sure Redis is running and connection details are correct.")
+    print("You can set environment variables:")
+    print("  REDIS_HOST=localhost")
+    print("  REDIS_PORT=6379")
+    print("  REDIS_PASSWORD=your_password")
+    print("  REDIS_DB=0")
+
+
+def scan_keys(r, match='*', count=SCAN_COUNT, stats=None):
+    """Yield keys matching ``match`` using a cursor-based SCAN.
+
+    Only one SCAN page is held in memory at a time. SCAN may return a key more
+    than once; callers that delete keys are unaffected since UNLINK of a
+    missing key is a no-op.
+    """
+    cursor = 0
+    while True:
+        cursor, keys = r.scan(cursor=cursor, match=match, count=count)
+        if stats is not None:
+            stats.scan_calls += 1
+            stats.scanned += len(keys)
+        yield from keys
+        if cursor == 0:
+            break
+
+
+def batched(iterable, size):
+    """Group an iterable into lists of at most ``size`` items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def sample_keys(r, match='*', limit=SAMPLE_SIZE, count=SCAN_COUNT):
+    """Return up to ``limit`` keys matching ``match`` without walking the whole keyspace."""
+    sample = []
+    for key in scan_keys(r, match=match, count=count):
+        sample.append(key)
+        if len(sample) >= limit:
+            break
+    return sample
+
+
+def unlink_batch(r, keys, use_unlink=True) -> int:
+    """Remove a batch of keys in a single pipelined round trip."""
+    pipe = r.pipeline(transaction=False)
+    for i in range(0, len(keys), UNLINK_CHUNK):
+        chunk = keys[i:i + UNLINK_CHUNK]
+        if use_unlink:
+            pipe.unlink(*chunk)
+        else:
+            pipe.delete(*chunk)
+    return sum(pipe.execute())
+
+
+def stream_delete(r, match='*', scan_count=SCAN_COUNT, batch_size=BATCH_SIZE,
+                  progress_interval=PROGRESS_INTERVAL, key_filter=None) -> ScanDeleteStats:
+    """Delete every key matching ``match`` with SCAN + pipelined UNLINK batches.
+
+    ``key_filter`` optionally narrows the scanned keys further on the client.
+    Progress (keys/s, batches, elapsed) is printed every ``progress_interval`` seconds.
+    """
+    stats = ScanDeleteStats()
+    use_unlink = True
+    last_report = stats.started
+
+    keys = scan_keys(r, match=match, count=scan_count, stats=stats)
+    if key_filter is not None:
+        keys = filter(key_filter, keys)
+
+    for batch in batched(keys, batch_size):
+        call_started = time.perf_counter()
+        try:
+            stats.deleted += unlink_batch(r, batch, use_unlink)
+        except redis.ResponseError as e:
+            # UNLINK was added in Redis 4.0; fall back to DEL on older servers
+            if not use_unlink or 'unknown command' not in str(e).lower():
+                raise
+            print("ℹ️ UNLINK not supported by this server, falling back to DEL")
+            use_unlink = False
+            stats.deleted += unlink_batch(r, batch, use_unlink)
+        stats.call_times.append(time.perf_counter() - call_started)
+        stats.batches += 1
+
+        now = time.perf_counter()
+        if progress_interval and now - last_report >= progress_interval:
+            print(f"  ⏳ {stats.summary()}")
+            last_report = now
+
+    return stats
+
+
+def lua_delete(r, match='*', scan_count=SCAN_COUNT, budget_ms=LUA_BUDGET_MS,
+               lua_patterns=(), progress_interval=PROGRESS_INTERVAL) -> ScanDeleteStats:
+    """Delete keys matching ``match`` with a server-side Lua SCAN + UNLINK loop.
+
+    The script is loaded once with SCRIPT LOAD and invoked with EVALSHA; each
+    call runs until its cursor wraps or ``budget_ms`` is spent. ``batches``
+    counts EVALSHA calls, and both round trip and server-side durations are
+    recorded per call. Scripts touch keys not passed in KEYS, so this mode is
+    meant for standalone (non-cluster) Redis.
+    """
+    stats = ScanDeleteStats()
+    sha = r.script_load(LUA_SCAN_UNLINK)
+    budget_us = int(budget_ms * 1000)
+    cursor = '0'
+    last_report = stats.started
+
+    while True:
+        args = [cursor, match, scan_count, budget_us, LUA_UNLINK_CHUNK, *lua_patterns]
+        call_started = time.perf_counter()
+        try:
+            cursor, scanned, deleted, server_us = r.evalsha(sha, 0, *args)
+        except redis.exceptions.NoScriptError:
+            # Script cache was flushed (SCRIPT FLUSH / restart); load it again
+            sha = r.script_load(LUA_SCAN_UNLINK)
+            continue
+        stats.call_times.append(time.perf_counter() - call_started)
+        stats.server_times.append(int(server_us) / 1_000_000)
+        stats.batches += 1
+        stats.scanned += int(scanned)
+        stats.deleted += int(deleted)
+
+        now = time.perf_counter()
+        if progress_interval and now - last_report >= progress_interval:
+            print(f"  ⏳ {stats.summary()}")
+            last_report = now
+
+        if str(cursor) == '0':
+            break
+
+    return stats
+
+
+def run_delete(r, match='*', matcher=None, scan_count=SCAN_COUNT, batch_size=BATCH_SIZE,
+               lua=False, lua_budget_ms=LUA_BUDGET_MS) -> ScanDeleteStats:
+    """Dispatch to the pipelined client-side engine or the server-side Lua engine."""
+    if matcher is not None:
+        match = matcher.scan_match
+    if lua:
+        return lua_delete(r, match=match, scan_count=scan_count, budget_ms=lua_budget_ms,
+                          lua_patterns=matcher.lua_patterns if matcher is not None else ())
+    key_filter = matcher if matcher is not None and matcher.needs_client_filter else None
+    return stream_delete(r, match=match, scan_count=scan_count, batch_size=batch_size,
+                         key_filter=key_filter)
+
+
+def print_delete_stats(stats: ScanDeleteStats):
+    """Print throughput and per-call timing of a completed deletion pass."""
+    print(f"📈 {stats.summary()}")
+    print("⏱️ Per-call timings:")
+    for line in stats.timing_summary().splitlines():
+        print(f"  {line}")
+
+
+def count_keys(r, match='*', scan_count=SCAN_COUNT, limit=SAMPLE_SIZE, key_filter=None):
+    """Count keys matching ``match`` with a streaming SCAN, keeping a bounded sample."""
+    total = 0
+    sample = []
+    keys = scan_keys(r, match=match, count=scan_count)
+    if key_filter is not None:
+        keys = filter(key_filter, keys)
+    for key in keys:
+        total += 1
+        if len(sample) < limit:
+            sample.append(key)
+    return total, sample
+
+
+def clear_all_redis_cache(scan_count=SCAN_COUNT, batch_size=BATCH_SIZE, assume_yes=False,
+                          lua=False, lua_budget_ms=LUA_BUDGET_MS, dry_run=False):
     """Clear all Redis cache entries."""
     try:
-        # Connect to Redis
-        # You can modify these connection details based on your setup
-        redis_host = os.getenv('REDIS_HOST', 'localhost')
-        redis_port = int(os.getenv('REDIS_PORT', 6379))
-        redis_password = os.getenv('REDIS_PASSWORD', 'redis_password_123')
-        redis_db = int(os.getenv('REDIS_DB', 0))
-        
-        print(f"🔄 Connecting to Redis at {redis_host}:{redis_port}...")
-        
-        # Create Redis connection
-        r = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            db=redis_db,
-            decode_responses=True
-        )
-        
-        # Test connection
-        r.ping()
-        print("✅ Connected to Redis successfully")
-        
-        # Get all keys
-        print("🔄 Getting all cache keys...")
-        all_keys = r.keys('*')
-        
-        if not all_keys:
+        r = get_redis_connection()
+
+        # DBSIZE is O(1), unlike listing every key up front
+        print("🔄 Counting cache keys...")
+        key_count = r.dbsize()
+
+        if not key_count:
             print("ℹ️ No cache keys found")
             return True
-        
-        print(f"📋 Found {len(all_keys)} cache keys")
-        
+
+        print(f"📋 Found {key_count} cache keys")
+
         # Show some sample keys
         print("📝 Sample keys:")
-        for i, key in enumerate(all_keys[:10]):
+        for i, key in enumerate(sample_keys(r, count=scan_count)):
             print(f"  {i+1}. {key}")
-        
-        if len(all_keys) > 10:
-            print(f"  ... and {len(all_keys) - 10} more keys")
-        
+
+        if key_count > SAMPLE_SIZE:
+            print(f"  ... and {key_count - SAMPLE_SIZE} more keys")
+
+        if dry_run:
+            print(f"📋 {key_count} cache keys would be deleted")
+            return True
+
         # Confirm deletion
-        print(f"\n⚠️ About to delete {len(all_keys)} cache keys")
-        response = input("Do you want to continue? (y/N): ").strip().lower()
-        
-        if response not in ['y', 'yes']:
-            print("❌ Operation cancelled")
-            return False
-        
+        print(f"\n⚠️ About to delete {key_count} cache keys")
+        if not assume_yes:
+            response = input("Do you want to continue? (y/N): ").strip().lower()
+
+            if response not in ['y', 'yes']:
+                print("❌ Operation cancelled")
+                return False
+
         # Delete all keys
-        print("🔄 Deleting all cache keys...")
-        deleted_count = r.delete(*all_keys)
-        
-        print(f"✅ Successfully deleted {deleted_count} cache keys")
-        
+        engine = f"Lua, {lua_budget_ms}ms per call" if lua else f"pipelined, batch size {batch_size}"
+        print(f"🔄 Deleting all cache keys (SCAN COUNT {scan_count}, {engine})...")
+        stats = run_delete(r, match='*', scan_count=scan_count, batch_size=batch_size,
+                           lua=lua, lua_budget_ms=lua_budget_ms)
+
+        print(f"✅ Successfully deleted {stats.deleted} cache keys")
+        print_delete_stats(stats)
+
         # Verify deletion
-        remaining_keys = r.keys('*')
-        print(f"📋 Remaining keys: {len(remaining_keys)}")
-        
-        if remaining_keys:
-            print("⚠️ Some keys remain (might be system keys):")
-            for key in remaining_keys:
+        remaining_count, remaining_sample = count_keys(r, match='*', scan_count=scan_count)
+        print(f"📋 Remaining keys: {remaining_count}")
+
+        if remaining_count:
+            print("⚠️ Some keys remain (might be system keys or written during the pass):")
+            for key in remaining_sample:
                 print(f"  - {key}")
-        
+            if remaining_count > len(remaining_sample):
+                print(f"  ... and {remaining_count - len(remaining_sample)} more keys")
+
         return True
-        
+
     except redis.ConnectionError as e:
         print(f"❌ Failed to connect to Redis: {e}")
-        print("\n💡 Make sure Redis is running and connection details are correct.")
-        print("You can set environment variables:")
-        print("  REDIS_HOST=localhost")
-        print("  REDIS_PORT=6379")
-        print("  REDIS_PASSWORD=your_password")
-        print("  REDIS_DB=0")
+        print_connection_help()
         return False
-        
+
     except Exception as e:
         print(f"❌ Error clearing Redis cache: {e}")
         return False
 
-def clear_template_cache_only():
-    """Clear only template-related cache entries."""
+
+def clear_cache_patterns(patterns, key_prefix=KEY_PREFIX, scan_count=SCAN_COUNT,
+                         batch_size=BATCH_SIZE, dry_run=False, label='targeted',
+                         lua=False, lua_budget_ms=LUA_BUDGET_MS):
+    """Clear every key matching any of ``patterns`` in a single SCAN pass."""
     try:
-        # Connect to Redis
-        redis_host = os.getenv('REDIS_HOST', 'localhost')
-        redis_port = int(os.getenv('REDIS_PORT', 6379))
-        redis_password = os.getenv('REDIS_PASSWORD', 'redis_password_123')
-        redis_db = int(os.getenv('REDIS_DB', 0))
-        
-        print(f"🔄 Connecting to Redis at {redis_host}:{redis_port}...")
-        
-        # Create Redis connection
-        r = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            db=redis_db,
-            decode_responses=True
-        )
-        
-        # Test connection
-        r.ping()
-        print("✅ Connected to Redis successfully")
-        
-        # Get template keys
-        print("🔄 Getting template cache keys...")
-        template_keys = r.keys('template:*')
-        
-        if not template_keys:
-            print("ℹ️ No template cache keys found")
+        r = get_redis_connection()
+
+        matcher = KeyMatcher(patterns, key_prefix=key_prefix)
+        key_filter = matcher if matcher.needs_client_filter else None
+        print(f"🎯 Patterns: {', '.join(matcher.patterns)}")
+        print(f"🔎 SCAN MATCH: {matcher.scan_match}")
+
+        if dry_run:
+            print(f"🔄 Counting {label} cache keys...")
+            total, sample = count_keys(r, match=matcher.scan_match, scan_count=scan_count,
+                                       key_filter=key_filter)
+            print(f"📋 {total} {label} cache keys would be deleted")
+            for i, key in enumerate(sample):
+                print(f"  {i+1}. {key}")
             return True
-        
-        print(f"📋 Found {len(template_keys)} template cache keys")
-        
-        # Show keys
-        print("📝 Template keys:")
-        for i, key in enumerate(template_keys):
-            print(f"  {i+1}. {key}")
-        
-        # Delete template keys
-        print("🔄 Deleting template cache keys...")
-        deleted_count = r.delete(*template_keys)
-        
-        print(f"✅ Successfully deleted {deleted_count} template cache keys")
-        
+
+        print(f"🔄 Deleting {label} cache keys{' (server-side Lua)' if lua else ''}...")
+        stats = run_delete(r, matcher=matcher, scan_count=scan_count, batch_size=batch_size,
+                           lua=lua, lua_budget_ms=lua_budget_ms)
+
+        if not stats.deleted:
+            print(f"ℹ️ No {label} cache keys found")
+            return True
+
+        print(f"✅ Successfully deleted {stats.deleted} {label} cache keys")
+        print_delete_stats(stats)
+
         return True
-        
+
     except redis.ConnectionError as e:
         print(f"❌ Failed to connect to Redis: {e}")
+        print_connection_help()
         return False
-        
+
     except Exception as e:
-        print(f"❌ Error clearing template cache: {e}")
+        print(f"❌ Error clearing {label} cache: {e}")
         return False
 
+
+def clear_template_cache_only(scan_count=SCAN_COUNT, batch_size=BATCH_SIZE, key_prefix=KEY_PREFIX):
+    """Clear only template-related cache entries."""
+    return clear_cache_patterns(family_patterns('template'), key_prefix=key_prefix,
+                                scan_count=scan_count, batch_size=batch_size, label='template')
+
+
+def list_families():
+    """Print the known CacheKeys families and entity scopes."""
+    print("📚 Cache key families (CacheKeys):")
+    for family, description in CACHE_FAMILIES.items():
+        print(f"  • {family:<26} {description}")
+    print("\n🔗 Entity scopes:")
+    for entity, patterns in ENTITY_PATTERNS.items():
+        print(f"  • --{entity} <id>: {', '.join(patterns)}")
+
+
+def add_database_arguments(parser):
+    """Postgres connection flags, matching DatabaseQueryTool's defaults."""
+    parser.add_argument('--db-host', default='localhost', help='Database host')
+    parser.add_argument('--db-port', type=int, default=5432, help='Database port')
+    parser.add_argument('--database', default='retail-execution-audit-system', help='Database name')
+    parser.add_argument('--db-username', default='postgres', help='Database username')
+    parser.add_argument('--db-password', default='123456', help='Database password')
+
+
+def database_params(args) -> dict:
+    return {
+        'host': args.db_host,
+        'port': args.db_port,
+        'database': args.database,
+        'username': args.db_username,
+        'password': args.db_password,
+    }
+
+
 def main():
     """Main function."""
+    parser = argparse.ArgumentParser(description='Redis Cache Clearing Tool')
+    parser.add_argument('--templates-only', action='store_true', help='Clear only template cache keys')
+    parser.add_argument('--family', action='append', default=[],
+                        help='CacheKeys family to clear, e.g. user:id or template:published '
+                             '(repeatable, comma-separated, raw globs allowed)')
+    for entity in ENTITY_PATTERNS:
+        parser.add_argument(f'--{entity}', action='append', default=[], metavar='ID',
+                            help=f'Clear every key for the given {entity} ID (repeatable)')
+    parser.add_argument('--list-families', action='store_true', help='List known cache key families')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile memory, TTL and size per key family instead of clearing')
+    parser.add_argument('--sample', type=float, default=1.0,
+                        help='Fraction of the keyspace examined by --profile (0 < rate <= 1)')
+    parser.add_argument('--profile-output', help='Write the --profile report as JSON to this file')
+    parser.add_argument('--key-prefix', default=KEY_PREFIX,
+                        help='Instance prefix prepended to family patterns (IDistributedCache InstanceName)')
+    parser.add_argument('--dry-run', action='store_true', help='Count matching keys without deleting them')
+    parser.add_argument('--scan-count', type=int, default=SCAN_COUNT,
+                        help='COUNT hint passed to each SCAN call')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='Keys removed per pipelined UNLINK round trip')
+    parser.add_argument('--yes', action='store_true', help='Skip the confirmation prompt')
+    parser.add_argument('--lua', action='store_true',
+                        help='Scan, match and unlink inside Redis with a time-bounded Lua script')
+    parser.add_argument('--lua-budget-ms', type=float, default=LUA_BUDGET_MS,
+                        help='Maximum server time spent per Lua call')
+    parser.add_argument('--nodes', default='',
+                        help='Clear several endpoints concurrently: comma-separated host[:port][/db] or redis:// URLs')
+    parser.add_argument('--dbs', default='',
+                        help='Clear several logical DBs on REDIS_HOST:REDIS_PORT concurrently, e.g. 0,1,2')
+    parser.add_argument('--cluster', metavar='HOST:PORT',
+                        help='Discover the master nodes of a Redis Cluster and clear them concurrently')
+    parser.add_argument('--concurrency', type=int, default=NODE_CONCURRENCY,
+                        help='UNLINK pipelines in flight per node in multi-node mode, or warm-up writers')
+    parser.add_argument('--warm', action='store_true',
+                        help='Only pre-warm hot keys from Postgres, without clearing anything')
+    parser.add_argument('--then-warm', action='store_true',
+                        help='Pre-warm hot keys from Postgres after clearing')
+    parser.add_argument('--warm-families', default='template,org,user',
+                        help='Comma-separated families to pre-warm (template, org, user)')
+    parser.add_argument('--warm-limit', type=int, help='Maximum rows loaded per warmed family')
+    parser.add_argument('--check-stale', action='store_true',
+                        help='Compare template:id, user:id and org:id entries with Postgres instead of clearing')
+    parser.add_argument('--delete-stale', action='store_true',
+                        help='With --check-stale, UNLINK only the divergent keys')
+    add_database_arguments(parser)
+
+    args = parser.parse_args()
+
+    if args.list_families:
+        list_families()
+        sys.exit(0)
+
+    if args.profile:
+        from redis_cache_profiler import run_profile
+
+        success = run_profile(key_prefix=args.key_prefix, sample_rate=args.sample,
+                              scan_count=args.scan_count, output=args.profile_output)
+        sys.exit(0 if success else 1)
+
+    warm_families = [f.strip() for f in args.warm_families.split(',') if f.strip()]
+
+    if args.check_stale:
+        from redis_cache_staleness import run_staleness_check
+
+        success = run_staleness_check(key_prefix=args.key_prefix, scan_count=args.scan_count,
+                                      delete=args.delete_stale, db_params=database_params(args))
+        sys.exit(0 if success else 1)
+
+    if args.warm:
+        from redis_cache_warmer import run_warm
+
+        success = run_warm(families=warm_families, key_prefix=args.key_prefix,
+                           concurrency=args.concurrency, limit=args.warm_limit,
+                           db_params=database_params(args))
+        sys.exit(0 if success else 1)
+
     print("=" * 50)
     print("🗑️ REDIS CACHE CLEARING TOOL")
     print("=" * 50)
-    
-    if len(sys.argv) > 1 and sys.argv[1] == '--templates-only':
-        print("🎯 Clearing template cache only...")
-        success = clear_template_cache_only()
+
+    families = [f.strip() for value in args.family for f in value.split(',') if f.strip()]
+    if args.templates_only:
+        families.append('template')
+
+    patterns = []
+    for family in families:
+        patterns.extend(family_patterns(family))
+    for entity in ENTITY_PATTERNS:
+        for entity_id in getattr(args, entity):
+            patterns.extend(entity_patterns(entity, entity_id))
+
+    patterns = list(dict.fromkeys(patterns))
+
+    if args.nodes or args.dbs or args.cluster:
+        from redis_cache_fleet import run_fleet
+
+        print("🎯 Clearing Redis fleet in parallel...")
+        success = run_fleet(endpoint_specs=[s for s in args.nodes.split(',') if s.strip()],
+                            dbs=[d for d in args.dbs.split(',') if d.strip()],
+                            cluster_seed=args.cluster, patterns=patterns or None,
+                            key_prefix=args.key_prefix, scan_count=args.scan_count,
+                            batch_size=args.batch_size, concurrency=args.concurrency,
+                            dry_run=args.dry_run, assume_yes=args.yes, lua=args.lua,
+                            lua_budget_ms=args.lua_budget_ms)
+    elif patterns:
+        print("🎯 Clearing targeted cache keys...")
+        success = clear_cache_patterns(patterns, key_prefix=args.key_prefix,
+                                       scan_count=args.scan_count, batch_size=args.batch_size,
+                                       dry_run=args.dry_run, lua=args.lua,
+                                       lua_budget_ms=args.lua_budget_ms)
     else:
         print("🎯 Clearing all Redis cache...")
-        success = clear_all_redis_cache()
-    
+        success = clear_all_redis_cache(scan_count=args.scan_count, batch_size=args.batch_size,
+                                        assume_yes=args.yes, lua=args.lua,
+                                        lua_budget_ms=args.lua_budget_ms, dry_run=args.dry_run)
+
+    if success and args.then_warm and not args.dry_run:
+        from redis_cache_warmer import run_warm
+
+        print("\n🔥 Pre-warming hot keys...")
+        success = run_warm(families=warm_families, key_prefix=args.key_prefix,
+                           concurrency=args.concurrency, limit=args.warm_limit,
+                           db_params=database_params(args))
+
     if success:
         print("\n✅ Cache clearing completed successfully!")
         sys.exit(0)
@@ -166,4 +779,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Concurrent virtual-auditor load harness for /api/v1/audits and /api/v1/assignments.
+
+Each virtual auditor runs the AuditCreationTest scenario (create assignment
+-> create audit -> duplicate create -> update -> delete audit -> delete
+assignment) on its own requests.Session, so connections are kept alive and
+pooled per user. Two workload models:
+
+  closed - N virtual auditors loop over the scenario back to back; --rps
+           optionally caps the combined request rate
+  open   - scenarios arrive at --rps (Poisson) whether or not earlier ones
+           have finished; N virtual auditors pick them up, and latency is
+           measured from the scheduled start so queueing is not hidden
+
+Reports per-endpoint latency percentiles and error rates, and how duplicate
+creates for the same assignmentId resolve. CreateAudit checks for an
+existing audit before inserting and audit.assignment_id is not unique, so
+with --racers K the K creates are fired concurrently to measure how often
+that race produces a second audit row. Every audit and assignment a
+virtual auditor creates is deleted, including after failures.
+"""
+
+import argparse
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from test_audit_creation import AuditCreationTest
+from tools.latency_histogram import LatencyHistogram, format_ms
+from tools.token_cache import get_token_cache
+
+MODELS = ('closed', 'open')
+
+INITIAL_RESPONSES = {
+    "question1": {"answer": "Yes", "score": 5},
+    "question2": {"answer": "No", "score": 0}
+}
+
+UPDATED_RESPONSES = {
+    "question1": {"answer": "Yes", "score": 4},
+    "question2": {"answer": "Yes", "score": 5},
+    "question3": {"answer": "No", "score": 0}
+}
+
+# Outcomes of a create for an assignmentId that already has (or is racing for) an audit
+CONTENTION_OUTCOMES = ('upserted', 'rejected', 'new row', 'error')
+
+_UUID = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+
+def endpoint_label(method: str, url: str) -> str:
+    """'DELETE /api/v1/audits/{id}' style label for a request."""
+    return f"{method} {_UUID.sub('{id}', urlsplit(url).path)}"
+
+
+def scenario_requests(racers: int) -> int:
+    """HTTP requests in one scenario: assignment, creates, update, two deletes."""
+    return max(2, racers) + 4
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = {}
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+
+class ApiLoadStats:
+    """Counters shared by all virtual auditors (thread-safe)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.requests = 0
+        self.scenarios = 0
+        self.failed = 0
+        self.failures = {}
+        self.scenario_latency = LatencyHistogram()
+        self.start_lag = LatencyHistogram()
+        self.contention = {outcome: 0 for outcome in CONTENTION_OUTCOMES}
+        self.assignments = 0
+        self.contended_assignments = 0
+        self.deleted = {'audit': 0, 'assignment': 0}
+        self.leftovers = []
+        self.not_started = 0
+        self.active = 0
+        self._window_requests = 0
+        self._window_started = time.perf_counter()
+
+    def record_response(self, label: str, status: int, seconds: float):
+        with self.lock:
+            endpoint = self.endpoints.setdefault(label, EndpointStats())
+            endpoint.latency.record(seconds)
+            if status >= 400:
+                endpoint.errors[status] = endpoint.errors.get(status, 0) + 1
+            self.requests += 1
+            self._window_requests += 1
+
+    def record_exception(self, label: str, reason: str):
+        """Count a request that got no response (connection error, timeout) against its endpoint."""
+        with self.lock:
+            endpoint = self.endpoints.setdefault(label, EndpointStats())
+            endpoint.errors[reason] = endpoint.errors.get(reason, 0) + 1
+
+    def record_start_lag(self, seconds: float):
+        with self.lock:
+            self.start_lag.record(seconds)
+
+    def record_failure(self, reason: str):
+        with self.lock:
+            self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    def record_scenario(self, ok: bool, seconds: float, reason: str = None):
+        with self.lock:
+            self.scenarios += 1
+            self.scenario_latency.record(seconds)
+            if not ok:
+                self.failed += 1
+                self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    def record_creates(self, outcomes: list, new_rows: int):
+        with self.lock:
+            self.assignments += 1
+            if new_rows > 1:
+                self.contended_assignments += 1
+            for outcome in outcomes:
+                self.contention[outcome] += 1
+
+    def window_rate(self) -> float:
+        """Requests per second since the previous call."""
+        with self.lock:
+            now = time.perf_counter()
+            elapsed = now - self._window_started
+            rate = self._window_requests / elapsed if elapsed > 0 else 0.0
+            self._window_requests = 0
+            self._window_started = now
+            return rate
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+class Pacer:
+    """Spaces scenario starts ``interval`` seconds apart across all threads (closed model --rps)."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            slot = max(self._next, time.perf_counter())
+            self._next = slot + self.interval
+        delay = slot - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class VirtualAuditor:
+    """One logged-in user running the audit scenario; ``racers`` sessions share its token."""
+
+    def __init__(self, base_url: str, stats: ApiLoadStats, racers: int = 1):
+        self.stats = stats
+        self.racers = racers
+        self.clients = [AuditCreationTest(base_url, verbose=False) for _ in range(max(1, racers))]
+        self.labels = [None] * len(self.clients)
+        self.responses = [None] * len(self.clients)
+        for index, client in enumerate(self.clients):
+            client.session.hooks['response'].append(self._hook(index))
+        self.pool = ThreadPoolExecutor(max_workers=racers) if racers > 1 else None
+        self.leftovers = []
+
+    def _hook(self, index: int):
+        def record(response, *args, **kwargs):
+            label = self.labels[index] or endpoint_label(response.request.method, response.request.url)
+            self.responses[index] = response
+            self.stats.record_response(label, response.status_code, response.elapsed.total_seconds())
+        return record
+
+    def login(self, role: str) -> bool:
+        # Every session logs in through the token cache (one real login), so each can re-login on a 401
+        return all(client.login(role) for client in self.clients)
+
+    def _create(self, index: int, assignment_id: str, store_name: str, label: str, barrier=None) -> tuple:
+        """Create an audit on session ``index``; returns (status, auditId)."""
+        self.labels[index] = label
+        self.responses[index] = None
+        try:
+            if barrier:
+                barrier.wait()
+            result = self.clients[index].create_audit(assignment_id, store_name, INITIAL_RESPONSES)
+        finally:
+            self.labels[index] = None
+        response = self.responses[index]
+        if response is None:
+            self.stats.record_exception(label or "POST /api/v1/audits", result.get("message") or "no response")
+            return None, None
+        audit_id = None
+        if response.status_code in (200, 201):
+            try:
+                audit_id = response.json().get('auditId')
+            except ValueError:
+                pass
+        return response.status_code, audit_id
+
+    def _creates(self, assignment_id: str) -> list:
+        if self.racers > 1:
+            # Fire every racer's create at once for the same assignmentId
+            barrier = threading.Barrier(self.racers)
+            futures = [self.pool.submit(self._create, index, assignment_id, f"Racer {index} Store",
+                                        "POST /api/v1/audits (race)", barrier)
+                       for index in range(self.racers)]
+            return [future.result() for future in futures]
+        initial = self._create(0, assignment_id, "Initial Store", None)
+        if initial[0] != 201:
+            return [initial]
+        return [initial, self._create(0, assignment_id, "Duplicate Store", "POST /api/v1/audits (duplicate)")]
+
+    def _classify(self, creates: list) -> tuple:
+        """Outcomes of every create after the first new row, and the number of new rows."""
+        new_rows = sum(1 for status, _ in creates if status == 201)
+        outcomes = []
+        seen_row = False
+        for status, _ in creates:
+            if status == 201 and not seen_row:
+                seen_row = True
+                continue
+            if status == 201:
+                outcomes.append('new row')
+            elif status == 200:
+                outcomes.append('upserted')
+            elif status in (400, 409):
+                outcomes.append('rejected')
+            else:
+                outcomes.append('error')
+        return outcomes, new_rows
+
+    def run_scenario(self) -> tuple:
+        """Run the scenario once; returns (ok, failure reason)."""
+        primary = self.clients[0]
+        assignment_id = None
+        audit_ids = []
+        try:
+            assignment_id = primary.create_assignment()
+            if not assignment_id:
+                return False, "create assignment failed"
+            creates = self._creates(assignment_id)
+            audit_ids = list(dict.fromkeys(audit_id for _, audit_id in creates if audit_id))
+            if not audit_ids:
+                return False, f"create audit failed ({creates[0][0] or 'exception'})"
+            outcomes, new_rows = self._classify(creates)
+            self.stats.record_creates(outcomes, new_rows)
+            updated = primary.update_audit(audit_ids[0], UPDATED_RESPONSES)
+            if not updated or updated.get("error"):
+                return False, f"update audit failed ({updated.get('error') if updated else 'no response'})"
+            return True, None
+        except Exception as e:
+            return False, f"{type(e).__name__}: {e}"
+        finally:
+            for audit_id in audit_ids:
+                self._delete('audit', audit_id)
+            if assignment_id:
+                self._delete('assignment', assignment_id)
+
+    def _delete(self, kind: str, entity_id: str):
+        delete = self.clients[0].delete_audit if kind == 'audit' else self.clients[0].delete_assignment
+        try:
+            deleted = delete(entity_id)
+        except Exception as e:
+            self.stats.record_exception(f"DELETE /api/v1/{kind}s/{{id}}", type(e).__name__)
+            deleted = False
+        if deleted:
+            with self.stats.lock:
+                self.stats.deleted[kind] += 1
+        else:
+            self.leftovers.append((kind, entity_id))
+
+    def retry_cleanup(self):
+        """Retry deletes that failed during the run; whatever still fails is reported."""
+        leftovers, self.leftovers = self.leftovers, []
+        # Audits before their assignments, as in the scenario
+        for kind, entity_id in sorted(leftovers, key=lambda item: item[0] != 'audit'):
+            self._delete(kind, entity_id)
+        with self.stats.lock:
+            self.stats.leftovers.extend(self.leftovers)
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+        for client in self.clients:
+            client.session.close()
+
+
+def run_user(auditor: VirtualAuditor, role: str, stats: ApiLoadStats, deadline: float, iterations: int,
+             pacer: Pacer = None, arrivals: queue.Queue = None, think: float = 0.0, stop: threading.Event = None):
+    """Thread body of one virtual auditor for either workload model.
+
+    Setting ``stop`` ends the loop after the scenario in flight, so its
+    entities and any failed deletes are still cleaned up.
+    """
+    stop = stop or threading.Event()
+    try:
+        if not auditor.login(role):
+            stats.record_failure("login failed")
+            return
+        completed = 0
+        while (time.perf_counter() < deadline and not stop.is_set()
+               and (not iterations or completed < iterations)):
+            if arrivals is not None:
+                try:
+                    scheduled = arrivals.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if scheduled is None:
+                    break
+                stats.record_start_lag(time.perf_counter() - scheduled)
+            else:
+                if pacer:
+                    pacer.wait()
+                    if time.perf_counter() >= deadline or stop.is_set():
+                        break
+                scheduled = time.perf_counter()
+            # Cache hit; picks up the background refresher's new token before the old one expires
+            if not auditor.login(role):
+                stats.record_scenario(False, time.perf_counter() - scheduled, "login failed")
+                completed += 1
+                continue
+            with stats.lock:
+                stats.active += 1
+            ok, reason = auditor.run_scenario()
+            with stats.lock:
+                stats.active -= 1
+            # Open model latency includes the time the arrival waited for a free auditor
+            stats.record_scenario(ok, time.perf_counter() - scheduled, reason)
+            completed += 1
+            if think:
+                stop.wait(think)
+    finally:
+        auditor.retry_cleanup()
+        auditor.close()
+
+
+def dispatch_arrivals(arrivals: queue.Queue, rate: float, deadline: float, rng: random.Random,
+                      stop: threading.Event):
+    """Open model: enqueue scheduled start times with exponential inter-arrival gaps."""
+    scheduled = time.perf_counter()
+    while True:
+        scheduled += rng.expovariate(rate)
+        if scheduled >= deadline:
+            return
+        delay = scheduled - time.perf_counter()
+        if delay > 0 and stop.wait(delay):
+            return
+        arrivals.put(scheduled)
+
+
+def print_progress(stats: ApiLoadStats, arrivals: queue.Queue = None):
+    rate = stats.window_rate()
+    with stats.lock:
+        line = (f"⏱️ {stats.elapsed:6.1f}s  scenarios {stats.scenarios - stats.failed} ok / {stats.failed} failed  "
+                f"{rate:7.1f} req/s  active {stats.active}")
+    if arrivals is not None:
+        line += f"  queued {arrivals.qsize()}"
+    print(line)
+
+
+def print_report(stats: ApiLoadStats, elapsed: float, model: str, users: int, rps: float, racers: int):
+    print("\n📊 API load test summary")
+    print("=" * 60)
+    target = f"target {rps:g} req/s" if rps else "unthrottled"
+    print(f"Workload:           {model} model, {users} virtual auditors, {target}, {elapsed:.1f}s")
+    print(f"Scenarios:          {stats.scenarios - stats.failed} ok, {stats.failed} failed "
+          f"({stats.scenarios / elapsed:.2f}/s)")
+    print(f"Requests:           {stats.requests} ({stats.requests / elapsed:.1f} req/s)")
+    print(f"Scenario latency:   {stats.scenario_latency.summary()}")
+    if model == 'open':
+        print(f"Start lag:          {stats.start_lag.summary()}")
+        if stats.not_started:
+            print(f"Not started:        {stats.not_started} arrivals still queued at the end")
+
+    print(f"\n{'Endpoint':<38} {'n':>7} {'req/s':>7} {'p50':>10} {'p95':>10} {'p99':>10} {'errors':>8}")
+    for label, endpoint in sorted(stats.endpoints.items()):
+        latency = endpoint.latency
+        error_rate = endpoint.error_count / max(1, latency.count)
+        print(f"{label:<38} {latency.count:>7} {latency.count / elapsed:>7.1f} {format_ms(latency.percentile(50))} "
+              f"{format_ms(latency.percentile(95))} {format_ms(latency.percentile(99))} {error_rate:>8.1%}")
+        for reason, count in sorted(endpoint.errors.items(), key=lambda item: -item[1]):
+            print(f"  • {reason}: {count}")
+
+    attempts = sum(stats.contention.values())
+    mode = f"{racers} concurrent creates" if racers > 1 else "sequential duplicate create"
+    print(f"\nDuplicate assignmentId ({mode}):")
+    print(f"  Assignments:      {stats.assignments}, {stats.contended_assignments} ended with more than one audit "
+          f"({stats.contended_assignments / max(1, stats.assignments):.1%})")
+    for outcome in CONTENTION_OUTCOMES:
+        count = stats.contention[outcome]
+        print(f"  {outcome + ':':<17} {count:>7} ({count / max(1, attempts):.1%} of {attempts} duplicate creates)")
+
+    if stats.failures:
+        print("\n❌ Scenario failures:")
+        for reason, count in sorted(stats.failures.items(), key=lambda item: -item[1]):
+            print(f"  • {reason}: {count}")
+
+    print(f"\n🧹 Cleanup: {stats.deleted['audit']} audits and {stats.deleted['assignment']} assignments deleted")
+    if stats.leftovers:
+        print(f"⚠️ {len(stats.leftovers)} could not be deleted:")
+        for kind, entity_id in stats.leftovers[:20]:
+            print(f"  • {kind} {entity_id}")
+
+
+def run_load(base_url: str, users: int, model: str, rps: float, duration: float, iterations: int, racers: int,
+             role: str, report_interval: float, think: float, seed: int) -> ApiLoadStats:
+    stats = ApiLoadStats()
+    stop = threading.Event()
+    per_scenario = scenario_requests(racers)
+    deadline = time.perf_counter() + duration
+    arrivals = None
+    pacer = None
+    threads = []
+    if model == 'open':
+        arrivals = queue.Queue()
+        dispatcher = threading.Thread(target=dispatch_arrivals, daemon=True,
+                                      args=(arrivals, rps / per_scenario, deadline, random.Random(seed), stop))
+        threads.append(dispatcher)
+    elif rps:
+        pacer = Pacer(per_scenario / rps)
+
+    print(f"🚀 {users} virtual auditors, {model} model"
+          + (f" at {rps:g} req/s (~{rps / per_scenario:.2f} scenarios/s)" if rps else "")
+          + f" for {duration:g}s")
+    for user in range(users):
+        auditor = VirtualAuditor(base_url, stats, racers)
+        threads.append(threading.Thread(target=run_user, name=f"auditor-{user}", daemon=True,
+                                        args=(auditor, role, stats, deadline, iterations, pacer, arrivals, think,
+                                              stop)))
+    # Virtual auditors share one login per role; renew it before it expires on long runs
+    tokens = get_token_cache(base_url).start_refresher()
+    for thread in threads:
+        thread.start()
+
+    last_report = time.perf_counter()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(0.2)
+            if time.perf_counter() - last_report >= report_interval:
+                print_progress(stats, arrivals)
+                last_report = time.perf_counter()
+    except KeyboardInterrupt:
+        print("\n⚠️ Load test interrupted: finishing in-flight scenarios and cleaning up (Ctrl-C again to abort)")
+        stop.set()
+        # Threads stay daemons so a second Ctrl-C can still abort the joins
+        for thread in threads:
+            thread.join()
+
+    tokens.stop_refresher()
+    if arrivals is not None:
+        stats.not_started = arrivals.qsize()
+    print_report(stats, stats.elapsed, model, users, rps, racers)
+    print(tokens.summary())
+    return stats
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Concurrent virtual-auditor load test for the audit API')
+    parser.add_argument('--api-url', default='http://localhost:8080', help='API base URL')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual auditors')
+    parser.add_argument('--model', choices=MODELS, default='closed',
+                        help='closed: users loop back to back; open: scenarios arrive at --rps regardless')
+    parser.add_argument('--rps', type=float, default=0.0,
+                        help='Target requests per second (required for the open model; a cap for closed)')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds to generate load')
+    parser.add_argument('--iterations', type=int, default=0, help='Scenarios per virtual auditor (0 = until --duration)')
+    parser.add_argument('--racers', type=int, default=1,
+                        help='Concurrent creates per assignmentId (1 = the sequential duplicate of run_test)')
+    parser.add_argument('--role', default='manager', help='Test credentials role the virtual auditors log in as')
+    parser.add_argument('--think', type=float, default=0.0, help='Seconds each closed-model user waits between scenarios')
+    parser.add_argument('--report-interval', type=float, default=5.0, help='Seconds between progress lines')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for open-model arrivals')
+
+    args = parser.parse_args()
+
+    if args.model == 'open' and args.rps <= 0:
+        parser.error("--model open needs --rps")
+    if args.users < 1 or args.racers < 1:
+        parser.error("--users and --racers must be at least 1")
+
+    try:
+        run_load(args.api_url, args.users, args.model, args.rps, args.duration, args.iterations, args.racers,
+                 args.role, args.report_interval, args.think, args.seed)
+    except KeyboardInterrupt:
+        print("\n⚠️ Cleanup aborted by user (in-flight scenarios are not cleaned up)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Large-payload benchmark for the audit write path (JSONB responses, media, location).
+
+Generates audits with 10 to 10,000 answered questions from the question
+shapes of a template (template.questions, fetched from the API or the seed
+template's shapes with --offline) and measures, per size:
+
+  - client JSON serialization time and request size
+  - gzip compression time and compressed size
+  - POST /api/v1/audits and PUT /api/v1/audits/{id} latency and response
+    size, with plain and gzip-compressed (Content-Encoding: gzip) bodies
+
+Results are written as JSON (--output) so runs from different releases can
+be compared; --compare BASELINE.json prints the change per metric and exits
+non-zero when a metric regresses by more than --threshold percent.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from test_audit_creation import AuditCreationTest
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+ENCODINGS = ('identity', 'gzip')
+
+# Question shapes of the seeded "Store Compliance Audit" template (init-scripts/02-seed-data.sql)
+SEED_SHAPES = [
+    {"type": "SingleChoice", "title": "Is the store entrance clean and welcoming?",
+     "options": ["Yes", "No", "Partially"], "required": True, "scoring": {"Yes": 10, "Partially": 5, "No": 0}},
+    {"type": "Text", "title": "Additional comments on store appearance", "required": False},
+    {"type": "MultipleChoice", "title": "Which areas need attention?",
+     "options": ["Shelf organization", "Product labeling", "Promotional displays", "Stock levels"],
+     "required": False},
+    {"type": "FileUpload", "title": "Upload photo of main display area", "required": True},
+]
+
+QUESTIONS_PER_SECTION = 50
+
+_WORDS = ("shelf display stock price label promo aisle clean damaged missing facing planogram fridge "
+          "counter signage expiry customer staff queue lighting floor").split()
+
+# Metrics compared against a baseline; all are "lower is better"
+COMPARED_METRICS = ('serialize_ms', 'request_bytes', 'create_ms', 'update_ms')
+
+# Timing changes smaller than this are noise, whatever their percentage
+MIN_DELTA_MS = 1.0
+
+
+def template_shapes(questions) -> list:
+    """Flatten a template's sections -> questions JSON into a list of question shapes."""
+    shapes = []
+    for section in questions or []:
+        for question in section.get('questions', []) if isinstance(section, dict) else []:
+            if isinstance(question, dict) and question.get('type'):
+                shapes.append(question)
+    return shapes
+
+
+def fetch_template_shapes(client: AuditCreationTest, template_id: str) -> list:
+    response = client.session.get(f"{client.base_url}/api/v1/templates/{template_id}")
+    if response.status_code != 200:
+        return []
+    questions = response.json().get('questions')
+    if isinstance(questions, str):
+        questions = json.loads(questions)
+    return template_shapes(questions)
+
+
+def _answer(shape: dict, question_id: str, rng: random.Random, media: list):
+    options = shape.get('options') or []
+    kind = shape.get('type', '')
+    if kind == 'SingleChoice' and options:
+        return rng.choice(options)
+    if kind == 'MultipleChoice' and options:
+        return rng.sample(options, rng.randint(1, len(options)))
+    if kind == 'FileUpload':
+        name = f"photo_{question_id}_{rng.randrange(10 ** 6):06d}.jpg"
+        media.append({"questionId": question_id, "fileName": name, "url": f"https://media.example.com/{name}",
+                      "mimeType": "image/jpeg", "sizeBytes": rng.randint(200_000, 4_000_000),
+                      "capturedAt": "2025-07-10T09:30:00Z"})
+        return name
+    if kind in ('Number', 'Rating'):
+        return rng.randint(0, 10)
+    return ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(5, 30)))
+
+
+def build_payload(shapes: list, count: int, seed: int = 0) -> dict:
+    """Audit body with ``count`` answered questions, cycling through the template's shapes."""
+    rng = random.Random(seed + count)
+    responses = {}
+    media = []
+    for index in range(count):
+        shape = shapes[index % len(shapes)]
+        section = f"section_{index // QUESTIONS_PER_SECTION + 1}"
+        question_id = f"q{index // QUESTIONS_PER_SECTION + 1}_{index % QUESTIONS_PER_SECTION + 1}"
+        responses.setdefault(section, {})[question_id] = _answer(shape, question_id, rng, media)
+    return {
+        "responses": responses,
+        "media": media,
+        "location": {"latitude": 40.7128 + rng.uniform(-0.05, 0.05),
+                     "longitude": -74.0060 + rng.uniform(-0.05, 0.05), "accuracy": 5.0},
+        "criticalIssues": rng.randint(0, 5),
+    }
+
+
+def timed(fn, repeat: int) -> tuple:
+    """Run ``fn`` ``repeat`` times; returns (last result, list of durations in ms)."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        durations.append((time.perf_counter() - started) * 1000)
+    return result, durations
+
+
+def summarize(durations: list) -> dict:
+    if not durations:
+        return None
+    ordered = sorted(durations)
+    return {"median": round(statistics.median(ordered), 3), "min": round(ordered[0], 3),
+            "max": round(ordered[-1], 3), "n": len(ordered)}
+
+
+def client_side(payload: dict, repeat: int) -> dict:
+    body, serialize = timed(lambda: json.dumps(payload).encode('utf-8'), repeat)
+    compressed, compress = timed(lambda: gzip.compress(body, compresslevel=6), repeat)
+    return {"body": body, "compressed": compressed, "serialize_ms": summarize(serialize),
+            "gzip_ms": summarize(compress), "request_bytes": len(body), "gzip_bytes": len(compressed)}
+
+
+def server_side(client: AuditCreationTest, assignment_id: str, template_id: str, payload: dict,
+                encoding: str, repeat: int) -> dict:
+    """Create, update and delete an audit ``repeat`` times; returns latency and size figures."""
+    session = client.session
+    create_body = dict(payload, templateId=template_id, assignmentId=assignment_id,
+                       storeName="Benchmark Store", status="in_progress")
+    update_body = dict(payload, status="in_progress")
+    bodies = {name: json.dumps(body).encode('utf-8') for name, body in (('create', create_body),
+                                                                          ('update', update_body))}
+    headers = {'Content-Type': 'application/json'}
+    if encoding == 'gzip':
+        bodies = {name: gzip.compress(body, compresslevel=6) for name, body in bodies.items()}
+        headers['Content-Encoding'] = 'gzip'
+
+    create_ms, update_ms, statuses, response_bytes = [], [], {}, []
+
+    def count(outcome):
+        statuses[outcome] = statuses.get(outcome, 0) + 1
+
+    for _ in range(repeat):
+        audit_id = None
+        try:
+            started = time.perf_counter()
+            response = session.post(f"{client.base_url}/api/v1/audits", data=bodies['create'], headers=headers)
+            elapsed = (time.perf_counter() - started) * 1000
+            count(f"create {response.status_code}")
+            if response.status_code != 201:
+                continue
+            create_ms.append(elapsed)
+            response_bytes.append(len(response.content))
+            audit_id = response.json().get('auditId')
+
+            started = time.perf_counter()
+            response = session.put(f"{client.base_url}/api/v1/audits/{audit_id}", data=bodies['update'],
+                                   headers=headers)
+            elapsed = (time.perf_counter() - started) * 1000
+            count(f"update {response.status_code}")
+            if response.status_code in (200, 201):
+                update_ms.append(elapsed)
+        except requests.RequestException as e:
+            count(f"error {type(e).__name__}")
+        finally:
+            if audit_id:
+                client.delete_audit(audit_id)
+
+    return {"create_ms": summarize(create_ms), "update_ms": summarize(update_ms),
+            "response_bytes": max(response_bytes) if response_bytes else None,
+            "wire_bytes": len(bodies['create']), "statuses": statuses}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _median(metric):
+    return metric.get('median') if isinstance(metric, dict) else metric
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Print per-metric change against ``baseline``; returns the number of regressions."""
+    previous = {(row['questions'], row['encoding']): row for row in baseline.get('results', [])}
+    regressions = 0
+    print(f"\n📈 Compared with {baseline.get('meta', {}).get('commit') or 'baseline'} "
+          f"({baseline.get('meta', {}).get('timestamp', '?')}), threshold {threshold:g}%")
+    for row in results['results']:
+        old = previous.get((row['questions'], row['encoding']))
+        if not old:
+            continue
+        for metric in COMPARED_METRICS:
+            new_value, old_value = _median(row.get(metric)), _median(old.get(metric))
+            if not new_value or not old_value:
+                continue
+            change = (new_value - old_value) / old_value * 100
+            regressed = change > threshold and not (metric.endswith('_ms') and new_value - old_value < MIN_DELTA_MS)
+            flag = "❌" if regressed else "✅"
+            regressions += regressed
+            print(f"  {flag} {row['questions']:>6} q {row['encoding']:<8} {metric:<14} "
+                  f"{old_value:>12,.2f} → {new_value:>12,.2f} ({change:+.1f}%)")
+    return regressions
+
+
+def print_results(results: dict):
+    print("\n📊 Audit payload benchmark")
+    print("=" * 100)
+    print(f"{'questions':>9} {'encoding':<8} {'request':>11} {'wire':>11} {'serialize':>10} {'gzip':>9} "
+          f"{'create':>10} {'update':>10} {'response':>10}  statuses")
+    for row in results['results']:
+        def ms(metric):
+            value = _median(row.get(metric))
+            return f"{value:8.1f}ms" if value is not None else f"{'-':>10}"
+        response = row.get('response_bytes')
+        statuses = ', '.join(f"{k}×{v}" for k, v in sorted(row.get('statuses', {}).items()))
+        print(f"{row['questions']:>9} {row['encoding']:<8} {row['request_bytes']:>10,}B {row['wire_bytes']:>10,}B "
+              f"{ms('serialize_ms')} {ms('gzip_ms'):>9} {ms('create_ms')} {ms('update_ms')} "
+              f"{(f'{response:,}B' if response else '-'):>10}  {statuses}")
+
+
+def run_benchmark(args) -> dict:
+    client = None
+    shapes = []
+    assignment_id = None
+    if not args.offline:
+        client = AuditCreationTest(args.api_url, verbose=False)
+        if not client.login(args.role):
+            sys.exit("❌ Login failed (use --offline for client-side figures only)")
+        shapes = fetch_template_shapes(client, args.template_id)
+    if not shapes:
+        print("ℹ️ Using the seed template's question shapes")
+        shapes = SEED_SHAPES
+
+    results = {
+        "meta": {"timestamp": datetime.now(timezone.utc).isoformat(), "commit": git_commit(),
+                 "api_url": None if args.offline else args.api_url, "template_id": args.template_id,
+                 "repeat": args.repeat, "python": platform.python_version(), "host": platform.node()},
+        "results": [],
+    }
+    try:
+        if client:
+            assignment_id = client.create_assignment()
+            if not assignment_id:
+                sys.exit("❌ Could not create the benchmark assignment")
+        for count in args.sizes:
+            payload = build_payload(shapes, count, args.seed)
+            measured = client_side(payload, args.repeat)
+            print(f"⏱️ {count:>6} questions: {measured['request_bytes']:,} bytes "
+                  f"({measured['gzip_bytes']:,} gzipped), serialized in {measured['serialize_ms']['median']:.2f}ms")
+            for encoding in ENCODINGS:
+                row = {"questions": count, "encoding": encoding, "request_bytes": measured['request_bytes'],
+                       "wire_bytes": measured['gzip_bytes'] if encoding == 'gzip' else measured['request_bytes'],
+                       "serialize_ms": measured['serialize_ms'],
+                       "gzip_ms": measured['gzip_ms'] if encoding == 'gzip' else None}
+                if client:
+                    row.update(server_side(client, assignment_id, args.template_id, payload, encoding, args.repeat))
+                    if encoding == 'gzip' and not row['create_ms']:
+                        print("⚠️ gzip request bodies were rejected - is request decompression enabled on the API?")
+                results['results'].append(row)
+    finally:
+        if client and assignment_id:
+            client.delete_assignment(assignment_id)
+    return results
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark audit create/update with large JSONB payloads')
+    parser.add_argument('--api-url', default='http://localhost:8080', help='API base URL')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Questions per audit')
+    parser.add_argument('--repeat', type=int, default=5, help='Measurements per size and encoding')
+    parser.add_argument('--template-id', default='b21ca180-9b69-4221-b236-8c316f3b41e3',
+                        help='Template whose question shapes are used (falls back to the seed shapes)')
+    parser.add_argument('--role', default='manager', help='Test credentials role')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for generated answers')
+    parser.add_argument('--offline', action='store_true', help='Client-side serialization and gzip figures only')
+    parser.add_argument('--output', help='Results file (default benchmark_results/audit_payload_<timestamp>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='Percent increase in a median that counts as a regression')
+
+    args = parser.parse_args()
+
+    try:
+        results = run_benchmark(args)
+    except KeyboardInterrupt:
+        print("\n⚠️ Benchmark interrupted by user")
+        sys.exit(1)
+
+    print_results(results)
+    output = args.output or os.path.join(
+        "benchmark_results", f"audit_payload_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
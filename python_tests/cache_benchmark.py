@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Cold-vs-warm benchmark for the Redis-cached API endpoints.
+
+For every endpoint served by CachedTemplateService, CachedUserService,
+CachedOrganisationService or DashboardCacheService, each round clears the
+endpoint's CacheKeys family (with clear_redis_cache.py's SCAN/UNLINK
+logic), makes one cold request and then --warm warm ones. Reported per
+endpoint: cold and warm latency distributions, the warm speedup, and the
+keyspace hits/misses Redis INFO stats counted during the cold and warm
+requests. The hit counts include any other traffic on the Redis instance,
+so run it against an otherwise idle API.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from test_audit_creation import AuditCreationTest
+from tools.latency_histogram import LatencyHistogram, format_ms
+from tools.signalr_protocol import jwt_claims
+from tools.test_credentials import get_all_credentials
+from tools.token_cache import get_token_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clear_redis_cache import KEY_PREFIX, KeyMatcher, family_patterns, get_redis_connection, run_delete  # noqa: E402
+
+# (label, path template, CacheKeys family cleared before each cold request)
+ENDPOINTS = [
+    ('template by id', '/api/v1/templates/{template_id}', 'template'),
+    ('published templates', '/api/v1/templates/published', 'template'),
+    ('templates by category', '/api/v1/templates/category/{category}', 'template'),
+    ('templates by user', '/api/v1/templates/user/{user_id}', 'template'),
+    ('user by id', '/api/v1/users/{user_id}', 'user'),
+    ('user by username', '/api/v1/users/by-username/{username}', 'user'),
+    ('users by organisation', '/api/v1/users/by-organisation/{organisation_id}', 'user'),
+    ('users by role', '/api/v1/users/by-role/{role}', 'user'),
+    ('organisation by id', '/api/v1/organisations/{organisation_id}', 'org'),
+    ('dashboard', '/api/v1/dashboard', 'dashboard'),
+    ('organisation dashboard', '/api/v1/dashboard/organization/{organisation_id}', 'dashboard'),
+]
+
+# [Authorize(Policy = "AdminOnly")] endpoints, timed with an admin login whatever --role is
+ADMIN_ONLY = {'organisation dashboard'}
+ADMIN_ROLE = 'admin'
+
+
+class EndpointResult:
+    """Cold and warm latencies and Redis hit/miss deltas of one endpoint."""
+
+    def __init__(self, label: str, path: str, family: str):
+        self.label = label
+        self.path = path
+        self.family = family
+        self.cold = LatencyHistogram()
+        self.warm = LatencyHistogram()
+        self.hits = {'cold': 0, 'warm': 0}
+        self.misses = {'cold': 0, 'warm': 0}
+        self.statuses = {}
+        self.keys_cleared = 0
+
+    def hit_ratio(self, phase: str):
+        total = self.hits[phase] + self.misses[phase]
+        return self.hits[phase] / total if total else None
+
+    @property
+    def speedup(self):
+        cold, warm = self.cold.percentile(50), self.warm.percentile(50)
+        return cold / warm if cold and warm else None
+
+    def to_dict(self) -> dict:
+        def distribution(histogram):
+            return {"n": histogram.count, "p50_ms": _ms(histogram.percentile(50)),
+                    "p95_ms": _ms(histogram.percentile(95)), "p99_ms": _ms(histogram.percentile(99)),
+                    "max_ms": _ms(histogram.max)}
+        return {"endpoint": self.label, "path": self.path, "family": self.family,
+                "cold": distribution(self.cold), "warm": distribution(self.warm), "speedup": self.speedup,
+                "hits": self.hits, "misses": self.misses, "keys_cleared": self.keys_cleared,
+                "statuses": self.statuses}
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def keyspace_counters(r) -> tuple:
+    stats = r.info('stats')
+    return stats.get('keyspace_hits', 0), stats.get('keyspace_misses', 0)
+
+
+def clear_family(r, family: str, key_prefix: str) -> int:
+    """Delete every key of a CacheKeys family; returns the number of keys removed."""
+    matcher = KeyMatcher(family_patterns(family), key_prefix=key_prefix)
+    return run_delete(r, matcher=matcher).deleted
+
+
+def timed_get(session: requests.Session, url: str, result: EndpointResult) -> float:
+    started = time.perf_counter()
+    response = session.get(url)
+    # Include reading the body: a cached response is only cheaper if it is complete
+    response.content
+    elapsed = time.perf_counter() - started
+    result.statuses[response.status_code] = result.statuses.get(response.status_code, 0) + 1
+    return elapsed if response.status_code == 200 else None
+
+
+def measure(session, r, base_url: str, result: EndpointResult, params: dict, rounds: int, warm: int,
+            key_prefix: str):
+    url = base_url + result.path.format(**params)
+    for _ in range(rounds):
+        result.keys_cleared += clear_family(r, result.family, key_prefix)
+        for phase, requests_made in (('cold', 1), ('warm', warm)):
+            hits, misses = keyspace_counters(r)
+            histogram = result.cold if phase == 'cold' else result.warm
+            for _ in range(requests_made):
+                elapsed = timed_get(session, url, result)
+                if elapsed is not None:
+                    histogram.record(elapsed)
+            after_hits, after_misses = keyspace_counters(r)
+            result.hits[phase] += after_hits - hits
+            result.misses[phase] += after_misses - misses
+
+
+def print_results(results):
+    print("\n📊 Cold vs warm cache")
+    print("=" * 118)
+    print(f"{'endpoint':<24} {'cold p50':>10} {'cold p95':>10} {'warm p50':>10} {'warm p95':>10} {'speedup':>8} "
+          f"{'cold hit%':>10} {'warm hit%':>10}  statuses")
+    for result in results:
+        def ratio(phase):
+            value = result.hit_ratio(phase)
+            return f"{value * 100:9.1f}%" if value is not None else f"{'-':>10}"
+        speedup = f"{result.speedup:7.1f}×" if result.speedup else f"{'-':>8}"
+        statuses = ', '.join(f"{status}×{count}" for status, count in sorted(result.statuses.items()))
+        print(f"{result.label:<24} {format_ms(result.cold.percentile(50)):>10} {format_ms(result.cold.percentile(95)):>10} "
+              f"{format_ms(result.warm.percentile(50)):>10} {format_ms(result.warm.percentile(95)):>10} {speedup} "
+              f"{ratio('cold')} {ratio('warm')}  {statuses}")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Cold vs warm Redis cache benchmark for the cached API endpoints')
+    parser.add_argument('--api-url', default='http://localhost:8080', help='API base URL')
+    parser.add_argument('--role', default='manager', help='Test credentials role used for the requests')
+    parser.add_argument('--rounds', type=int, default=5, help='Cold requests per endpoint (cache cleared each time)')
+    parser.add_argument('--warm', type=int, default=20, help='Warm requests after each cold request')
+    parser.add_argument('--endpoint', action='append', help='Only benchmark endpoints whose label contains this')
+    parser.add_argument('--template-id', help='Template for the template endpoints (default: first published)')
+    parser.add_argument('--category', default='Compliance', help='Template category for the category endpoint')
+    parser.add_argument('--users-role', default='auditor', help='Role for the users-by-role endpoint')
+    parser.add_argument('--key-prefix', default=KEY_PREFIX,
+                        help=f'Instance name prepended to cache keys (default: {KEY_PREFIX})')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    args = parser.parse_args()
+
+    client = AuditCreationTest(args.api_url, verbose=False)
+    if not client.login(args.role):
+        sys.exit("❌ Login failed")
+    claims = jwt_claims(get_token_cache(args.api_url).get_token(args.role))
+
+    try:
+        r = get_redis_connection()
+    except Exception as e:
+        sys.exit(f"❌ Failed to connect to Redis: {e}")
+
+    template_id = args.template_id
+    if not template_id:
+        response = client.session.get(f"{args.api_url}/api/v1/templates/published")
+        templates = response.json() if response.status_code == 200 else []
+        if isinstance(templates, list) and templates:
+            template_id = templates[0].get('templateId')
+        else:
+            template_id = client.get_test_data().get('template_id')
+
+    params = {
+        'template_id': template_id,
+        'category': args.category,
+        'user_id': claims.get('nameid'),
+        'username': claims.get('unique_name'),
+        'organisation_id': claims.get('organisation_id'),
+        'role': args.users_role,
+    }
+    endpoints = [endpoint for endpoint in ENDPOINTS
+                 if not args.endpoint or any(wanted.lower() in endpoint[0] for wanted in args.endpoint)]
+
+    sessions = {}
+    if any(label in ADMIN_ONLY for label, _, _ in endpoints):
+        if args.role == ADMIN_ROLE:
+            sessions[ADMIN_ROLE] = client.session
+        elif ADMIN_ROLE in get_all_credentials():
+            admin = AuditCreationTest(args.api_url, verbose=False)
+            if admin.login(ADMIN_ROLE):
+                sessions[ADMIN_ROLE] = admin.session
+        if ADMIN_ROLE not in sessions:
+            print(f"⚠️ Skipping {', '.join(sorted(ADMIN_ONLY))}: AdminOnly, and no '{ADMIN_ROLE}' login "
+                  "in tools/test_credentials.json")
+            endpoints = [endpoint for endpoint in endpoints if endpoint[0] not in ADMIN_ONLY]
+
+    results = []
+    try:
+        for label, path, family in endpoints:
+            missing = [name for name in params if f"{{{name}}}" in path and not params[name]]
+            if missing:
+                print(f"⚠️ Skipping {label}: no {', '.join(missing)}")
+                continue
+            print(f"⏱️ {label}: {args.rounds} × (clear {family}:*, 1 cold + {args.warm} warm)")
+            result = EndpointResult(label, path, family)
+            session = sessions[ADMIN_ROLE] if label in ADMIN_ONLY else client.session
+            measure(session, r, args.api_url, result, params, args.rounds, args.warm, args.key_prefix)
+            results.append(result)
+    except KeyboardInterrupt:
+        print("\n⚠️ Benchmark interrupted by user")
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"meta": {"timestamp": datetime.now(timezone.utc).isoformat(), "api_url": args.api_url,
+                                "role": args.role, "rounds": args.rounds, "warm": args.warm},
+                       "results": [result.to_dict() for result in results]}, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
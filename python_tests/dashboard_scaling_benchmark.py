@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Dashboard scaling benchmark across data volumes and tenant sizes.
+
+For each dataset size (--sizes, in audits) the harness seeds Postgres
+directly with fixture_generator.py (organisations of uneven size through
+--org-skew), then measures, globally and for the largest, median and
+smallest organisation:
+
+  - EXPLAIN (ANALYZE, BUFFERS) of the repository queries behind
+    DashboardService.GenerateDashboardDataAsync
+  - per organisation only: GET /api/v1/dashboard/organization/{id}, with
+    that organisation's dashboard cache cleared before every request
+    (both endpoints are AdminOnly, so --role must be an admin)
+
+and reports latency against row count, with the log-log growth exponent of
+each curve: ~1 is linear, clearly above 1 is an aggregate that grows
+super-linearly with tenant size.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from fixture_generator import generate, purge, seed_id_range
+from test_audit_creation import AuditCreationTest
+from tools.db_query_tool import DatabaseQueryTool
+from tools.test_credentials import get_all_credentials
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# Growth exponent above which a curve is reported as super-linear
+SUPERLINEAR_EXPONENT = 1.2
+
+_AUDIT_INCLUDES = ("SELECT a.*, t.*, u.*, o.* FROM audit a "
+                   "LEFT JOIN template t ON t.template_id = a.template_id "
+                   "LEFT JOIN users u ON u.user_id = a.auditor_id "
+                   "LEFT JOIN organisation o ON o.organisation_id = a.organisation_id")
+_ASSIGNMENT_INCLUDES = ("SELECT s.*, t.*, assignee.*, assigner.* FROM assignment s "
+                        "LEFT JOIN template t ON t.template_id = s.template_id "
+                        "LEFT JOIN users assignee ON assignee.user_id = s.assigned_to "
+                        "LEFT JOIN users assigner ON assigner.user_id = s.assigned_by")
+
+# Repository calls of GenerateDashboardDataAsync as (name, global SQL, per-organisation SQL),
+# written the way EF Core translates them (Include -> LEFT JOIN)
+DASHBOARD_QUERIES = [
+    ('audits', "SELECT * FROM audit",
+     f"{_AUDIT_INCLUDES} WHERE a.organisation_id = %s ORDER BY a.created_at DESC"),
+    ('assignments', f"{_ASSIGNMENT_INCLUDES} ORDER BY s.created_at DESC",
+     f"{_ASSIGNMENT_INCLUDES} WHERE s.organisation_id = %s ORDER BY s.created_at DESC"),
+    ('users', "SELECT * FROM users", "SELECT * FROM users WHERE organisation_id = %s"),
+]
+
+
+def explain(tool: DatabaseQueryTool, sql: str, params: tuple = None) -> dict:
+    """Execution figures of ``sql`` from EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)."""
+    rows = tool.execute_query(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+    if not rows:
+        return None
+    result = rows[0]['QUERY PLAN']
+    if isinstance(result, str):
+        result = json.loads(result)
+    plan = result[0]
+    root = plan['Plan']
+    return {
+        "execution_ms": plan.get('Execution Time'),
+        "planning_ms": plan.get('Planning Time'),
+        "rows": root.get('Actual Rows'),
+        "node": root.get('Node Type'),
+        "shared_hit_blocks": root.get('Shared Hit Blocks', 0),
+        "shared_read_blocks": root.get('Shared Read Blocks', 0),
+        # Temp blocks mean a sort or hash spilled to disk - the usual cause of super-linear growth
+        "temp_blocks": root.get('Temp Read Blocks', 0) + root.get('Temp Written Blocks', 0),
+    }
+
+
+def time_dashboard(client: AuditCreationTest, organisation_id: str, repeat: int) -> dict:
+    """Median latency of an organisation dashboard with its cache cleared before each request."""
+    base = f"{client.base_url}/api/v1/dashboard"
+    durations = []
+    status = None
+    for _ in range(repeat):
+        cleared = client.session.delete(f"{base}/cache/clear/{organisation_id}")
+        if cleared.status_code in (401, 403):
+            sys.exit(f"❌ Clearing the dashboard cache returned HTTP {cleared.status_code}: the role is not an admin")
+        started = time.perf_counter()
+        response = client.session.get(f"{base}/organization/{organisation_id}")
+        response.content
+        elapsed = (time.perf_counter() - started) * 1000
+        status = response.status_code
+        if status in (401, 403):
+            sys.exit(f"❌ Organisation dashboard returned HTTP {status}: the role is not an admin")
+        if status == 200:
+            durations.append(elapsed)
+    return {"status": status, "median_ms": round(statistics.median(durations), 3) if durations else None,
+            "samples": len(durations)}
+
+
+def organisation_sizes(tool: DatabaseQueryTool, seed: int) -> list:
+    """[(organisation_id, audits)] of the seed's fixture organisations, largest first."""
+    low, high = seed_id_range(seed)
+    rows = tool.execute_query(
+        "SELECT o.organisation_id, COUNT(a.audit_id) AS audits FROM organisation o "
+        "LEFT JOIN audit a ON a.organisation_id = o.organisation_id "
+        "WHERE o.organisation_id BETWEEN %s AND %s GROUP BY o.organisation_id ORDER BY audits DESC",
+        (low, high))
+    return [(str(row['organisation_id']), row['audits']) for row in rows]
+
+
+def sample_organisations(sizes: list) -> list:
+    """[(label, organisation_id, audits)] for the largest, median and smallest organisation."""
+    if not sizes:
+        return []
+    picks = [('largest org', 0), ('median org', len(sizes) // 2), ('smallest org', len(sizes) - 1)]
+    seen = set()
+    samples = []
+    for label, index in picks:
+        if index not in seen:
+            seen.add(index)
+            samples.append((label, *sizes[index]))
+    return samples
+
+
+def measure_point(tool: DatabaseQueryTool, client: AuditCreationTest, dataset: int, seed: int, repeat: int) -> list:
+    """Query plans for the whole dataset and sample organisations, endpoint latency for the organisations.
+
+    GET /api/v1/dashboard is not timed for the global scope: it serves the
+    caller's own organisation, not the whole dataset.
+    """
+    scopes = [('global', None, tool.count_table_rows('audit'))]
+    scopes += sample_organisations(organisation_sizes(tool, seed))
+    points = []
+    for label, organisation_id, audits in scopes:
+        point = {"dataset_audits": dataset, "scope": label, "organisation_id": organisation_id,
+                 "scope_audits": audits, "queries": {}}
+        for name, global_sql, organisation_sql in DASHBOARD_QUERIES:
+            if organisation_id:
+                point['queries'][name] = explain(tool, organisation_sql, (organisation_id,))
+            else:
+                point['queries'][name] = explain(tool, global_sql)
+        if client and organisation_id:
+            point['endpoint'] = time_dashboard(client, organisation_id, repeat)
+        query_ms = sum((plan or {}).get('execution_ms') or 0 for plan in point['queries'].values())
+        endpoint = point.get('endpoint') or {}
+        print(f"  📏 {label:<13} {audits:>10,} audits  queries {query_ms:10.1f}ms  "
+              f"endpoint {endpoint.get('median_ms') or '-'}ms (HTTP {endpoint.get('status', '-')})")
+        points.append(point)
+    return points
+
+
+def growth_exponent(curve: list):
+    """Least-squares slope of log(ms) against log(rows); None with fewer than two usable points."""
+    usable = [(math.log(rows), math.log(ms)) for rows, ms in curve if rows and ms and rows > 0 and ms > 0]
+    if len({x for x, _ in usable}) < 2:
+        return None
+    mean_x = sum(x for x, _ in usable) / len(usable)
+    mean_y = sum(y for _, y in usable) / len(usable)
+    spread = sum((x - mean_x) ** 2 for x, _ in usable)
+    return sum((x - mean_x) * (y - mean_y) for x, y in usable) / spread
+
+
+def curves(points: list) -> dict:
+    """{(scope kind, metric): [(rows, ms)]} - scope kind is 'global' or 'organisation'."""
+    series = {}
+    for point in points:
+        kind = 'global' if point['scope'] == 'global' else 'organisation'
+        metrics = {f"query {name}": (plan or {}).get('execution_ms') for name, plan in point['queries'].items()}
+        metrics['endpoint'] = (point.get('endpoint') or {}).get('median_ms')
+        for metric, ms in metrics.items():
+            if ms is not None:
+                series.setdefault((kind, metric), []).append((point['scope_audits'], ms))
+    return {key: sorted(values) for key, values in series.items()}
+
+
+def print_curves(series: dict):
+    print("\n📈 Latency vs row count")
+    print("=" * 90)
+    for (kind, metric), curve in sorted(series.items()):
+        exponent = growth_exponent(curve)
+        if exponent is None:
+            verdict = "-"
+        elif exponent > SUPERLINEAR_EXPONENT:
+            verdict = f"⚠️ super-linear (n^{exponent:.2f})"
+        else:
+            verdict = f"n^{exponent:.2f}"
+        print(f"{kind:<13} {metric:<20} {verdict}")
+        for rows, ms in curve:
+            print(f"    {rows:>12,} rows  {ms:10.1f}ms")
+
+
+def write_csv(path: str, points: list):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['dataset_audits', 'scope', 'organisation_id', 'scope_audits', 'metric', 'ms', 'rows',
+                         'shared_hit_blocks', 'shared_read_blocks', 'temp_blocks'])
+        for point in points:
+            prefix = [point['dataset_audits'], point['scope'], point['organisation_id'], point['scope_audits']]
+            for name, plan in point['queries'].items():
+                if plan:
+                    writer.writerow(prefix + [f"query {name}", plan['execution_ms'], plan['rows'],
+                                              plan['shared_hit_blocks'], plan['shared_read_blocks'],
+                                              plan['temp_blocks']])
+            if point.get('endpoint'):
+                writer.writerow(prefix + ['endpoint', point['endpoint']['median_ms'], '', '', '', ''])
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Dashboard latency vs data volume and organisation size')
+    parser.add_argument('--host', default='localhost', help='Database host')
+    parser.add_argument('--port', type=int, default=5432, help='Database port')
+    parser.add_argument('--database', default='retail-execution-audit-system', help='Database name')
+    parser.add_argument('--username', default='postgres', help='Database username')
+    parser.add_argument('--password', default='123456', help='Database password')
+    parser.add_argument('--api-url', default='http://localhost:8080', help='API base URL')
+    parser.add_argument('--role', default='admin',
+                        help='Test credentials role; the organisation dashboard and its cache clear are AdminOnly')
+    parser.add_argument('--no-api', action='store_true', help='Only run EXPLAIN on the queries')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Dataset sizes in audits')
+    parser.add_argument('--organisations', type=int, default=50, help='Fixture organisations per dataset')
+    parser.add_argument('--org-skew', type=float, default=2.0, help='Organisation size skew (1 = equal sizes)')
+    parser.add_argument('--seed', type=int, default=2024, help='Fixture seed')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel COPY processes')
+    parser.add_argument('--repeat', type=int, default=3, help='Endpoint requests per measurement')
+    parser.add_argument('--no-seed', action='store_true', help='Measure the current data only (one point)')
+    parser.add_argument('--keep', action='store_true', help='Keep the last dataset instead of purging it')
+    parser.add_argument('--output', help='Write points and curves as JSON to this file')
+    parser.add_argument('--csv', help='Write one row per point and metric to this CSV file')
+
+    args = parser.parse_args()
+
+    tool = DatabaseQueryTool(host=args.host, port=args.port, database=args.database,
+                             username=args.username, password=args.password)
+    if not tool.connect():
+        sys.exit(1)
+
+    client = None
+    if not args.no_api:
+        if args.role not in get_all_credentials():
+            # get_test_credentials() would silently fall back to the manager, who gets 403 from every request
+            sys.exit(f"❌ No '{args.role}' credentials in tools/test_credentials.json "
+                     "(add an admin account, or use --no-api to run EXPLAIN only)")
+        client = AuditCreationTest(args.api_url, verbose=False)
+        if not client.login(args.role):
+            sys.exit("❌ Login failed (use --no-api to run EXPLAIN only)")
+
+    points = []
+    try:
+        if args.no_seed:
+            print("\n📦 Current data")
+            points += measure_point(tool, client, tool.count_table_rows('audit'), args.seed, args.repeat)
+        for size in ([] if args.no_seed else sorted(args.sizes)):
+            print(f"\n📦 Dataset with {size:,} fixture audits")
+            purge(tool, args.seed)
+            scale_args = dict(seed=args.seed, organisations=args.organisations,
+                              users=max(args.organisations * 5, size // 100), audits=size,
+                              notifications=0, logs=0, org_skew=args.org_skew)
+            try:
+                generate(tool, scale_args, args.workers)
+            except Exception as e:
+                # BrokenProcessPool or a failed COPY chunk; keep the points measured so far
+                print(f"❌ Seeding {size:,} audits failed: {type(e).__name__}: {e}")
+                break
+            tool.execute_update("ANALYZE")
+            points += measure_point(tool, client, size, args.seed, args.repeat)
+    except KeyboardInterrupt:
+        print("\n⚠️ Benchmark interrupted by user")
+    finally:
+        if not args.no_seed and not args.keep:
+            purge(tool, args.seed)
+
+    try:
+        series = curves(points)
+        print_curves(series)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({"meta": {"timestamp": datetime.now(timezone.utc).isoformat(), "seed": args.seed,
+                                    "organisations": args.organisations, "org_skew": args.org_skew},
+                           "points": points,
+                           "curves": [{"scope": kind, "metric": metric, "points": curve,
+                                       "growth_exponent": growth_exponent(curve)}
+                                      for (kind, metric), curve in sorted(series.items())]},
+                          f, indent=2, default=str)
+            print(f"\n💾 Results written to {args.output}")
+        if args.csv:
+            write_csv(args.csv, points)
+            print(f"💾 CSV written to {args.csv}")
+    finally:
+        tool.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Bulk synthetic fixture generator for scale testing.
+
+Creates consistent organisations, users, templates, assignments, audits,
+notifications and logs at configurable scale (e.g. 1k organisations /
+100k users / 10M audits) through DatabaseQueryTool's connection settings:
+
+  - rows are streamed with COPY FROM STDIN, never built up in memory
+  - each table is split into fixed-size chunks loaded by parallel worker
+    processes; tables are loaded in foreign-key order, one phase at a time
+  - values respect the CHECK constraints in init-scripts/01-init-database.sql
+    and notification-tables.sql, and only columns the live schema has are sent
+  - output is deterministic by --seed: IDs and every foreign key are pure
+    functions of (seed, table, row number), independent of --workers
+
+Fixture IDs start with f1c7 followed by the seed, so --purge can remove one
+seed's rows again without touching real data.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+from audit_payload_benchmark import SEED_SHAPES
+from tools.db_query_tool import DatabaseQueryTool
+
+CHUNK_ROWS = 50_000
+
+# Default reference date; fixed so that a seed always produces the same rows
+DEFAULT_END_DATE = '2025-07-01'
+
+# Password hash used by the seed users in 02-seed-data.sql
+DEFAULT_PASSWORD_HASH = '$2a$11$8gE7VOF7b9N9qzQvK8K8OuZ8xFJhQpQhGqI2F1K5F2K3K4K5K6K7K8'
+
+# Table -> (ID column, code used inside fixture IDs, columns generated)
+TABLES = {
+    'organisation': ('organisation_id', 1, ('organisation_id', 'name', 'region', 'type', 'created_at')),
+    'users': ('user_id', 2, ('user_id', 'organisation_id', 'username', 'first_name', 'last_name', 'email',
+                             'phone', 'role', 'password_hash', 'is_active', 'created_at')),
+    'template': ('template_id', 3, ('template_id', 'name', 'description', 'category', 'questions',
+                                    'scoring_rules', 'valid_from', 'valid_to', 'created_by', 'is_published',
+                                    'version', 'created_at')),
+    'assignment': ('assignment_id', 4, ('assignment_id', 'template_id', 'assigned_to', 'assigned_by',
+                                        'organisation_id', 'store_info', 'due_date', 'priority', 'notes',
+                                        'status', 'created_at')),
+    'audit': ('audit_id', 5, ('audit_id', 'template_id', 'template_version', 'auditor_id', 'organisation_id',
+                              'assignment_id', 'status', 'start_time', 'end_time', 'store_info', 'responses',
+                              'media', 'location', 'score', 'critical_issues', 'manager_notes', 'is_flagged',
+                              'sync_flag', 'created_at')),
+    'notification': ('notification_id', 6, ('notification_id', 'user_id', 'organisation_id', 'type', 'title',
+                                            'message', 'priority', 'is_read', 'read_at', 'channel', 'status',
+                                            'retry_count', 'sent_at', 'delivered_at', 'metadata', 'created_at',
+                                            'expires_at')),
+    'log': ('log_id', 7, ('log_id', 'user_id', 'action', 'entity_type', 'entity_id', 'metadata', 'ip_address',
+                          'user_agent', 'logged_at')),
+}
+
+# Tables in a phase only reference tables of earlier phases
+PHASES = [['organisation'], ['users'], ['template'], ['assignment'], ['audit'], ['notification', 'log']]
+
+REGIONS = ['North America', 'Europe', 'Asia Pacific', 'Latin America', 'Middle East', 'Africa']
+ORG_TYPES = ['Retail Chain', 'Grocery Chain', 'Convenience Store', 'Pharmacy', 'Electronics', 'Fashion']
+FIRST_NAMES = ['John', 'Jane', 'Mike', 'Sarah', 'Ahmed', 'Priya', 'Chen', 'Maria', 'Olga', 'Kwame', 'Lucas', 'Aiko']
+LAST_NAMES = ['Smith', 'Patel', 'Garcia', 'Nguyen', 'Kowalski', 'Okafor', 'Rossi', 'Tanaka', 'Silva', 'Müller']
+CATEGORIES = ['Compliance', 'Merchandising', 'Safety', 'Hygiene', 'Stock', 'Pricing']
+CITIES = ['Downtown', 'Riverside', 'Airport', 'Harbour', 'Old Town', 'Mall', 'University', 'Station']
+WORDS = ("shelf display stock price label promo aisle clean damaged missing facing planogram fridge "
+         "counter signage expiry customer staff queue lighting floor").split()
+
+# Free-text answers are drawn from a fixed pool; composing them word by word dominated generation time
+_comment_rng = random.Random(0)
+COMMENTS = [' '.join(_comment_rng.choice(WORDS) for _ in range(_comment_rng.randint(3, 15))) for _ in range(512)]
+
+# (value, weight) pairs; values must satisfy the tables' CHECK constraints
+AUDIT_STATUSES = [('in_progress', 10), ('submitted', 25), ('pending_review', 15), ('approved', 35),
+                  ('rejected', 10), ('synced', 5)]
+OPEN_ASSIGNMENT_STATUSES = [('pending', 70), ('expired', 20), ('cancelled', 10)]
+PRIORITIES = ['low', 'medium', 'high']
+NOTIFICATION_TYPES = ['assignment', 'audit_completed', 'audit_approved', 'audit_rejected', 'system']
+NOTIFICATION_PRIORITIES = ['low', 'medium', 'high', 'urgent']
+NOTIFICATION_CHANNELS = [('in_app', 60), ('email', 25), ('push', 12), ('sms', 3)]
+NOTIFICATION_STATUSES = [('delivered', 70), ('sent', 20), ('pending', 7), ('failed', 3)]
+LOG_ACTIONS = [('view', 50), ('update', 25), ('create', 15), ('submit', 7), ('delete', 3)]
+USER_AGENTS = ['RetailAudit-Android/2.4', 'RetailAudit-iOS/2.4', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)']
+
+_MASK = (1 << 64) - 1
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _mix(seed: int, table: int, index: int, salt: int = 0) -> int:
+    """Deterministic 64-bit hash (splitmix64 finaliser); the same in every process."""
+    z = (seed * 0x9E3779B97F4A7C15 + table * 0xBF58476D1CE4E5B9 + index * 0x94D049BB133111EB + salt) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+def fixture_id(seed: int, table: str, index: int) -> str:
+    """UUID of row ``index`` of ``table`` for ``seed``."""
+    return f"f1c7{seed & 0xffff:04x}-{TABLES[table][1]:04x}-4000-8000-{index:012x}"
+
+
+def seed_id_range(seed: int) -> tuple:
+    """(lowest, highest) fixture UUID of ``seed``, for range deletes."""
+    prefix = f"f1c7{seed & 0xffff:04x}"
+    return f"{prefix}-0000-0000-0000-000000000000", f"{prefix}-ffff-ffff-ffff-ffffffffffff"
+
+
+def _weighted(rng: random.Random, choices):
+    return rng.choices([value for value, _ in choices], [weight for _, weight in choices])[0]
+
+
+def _timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def copy_line(values) -> str:
+    """One row in COPY text format (tab-separated, \\N for NULL)."""
+    fields = []
+    for value in values:
+        if value is None:
+            fields.append('\\N')
+        elif isinstance(value, bool):
+            fields.append('t' if value else 'f')
+        elif isinstance(value, (dict, list)):
+            fields.append(json.dumps(value, ensure_ascii=False).translate(_COPY_ESCAPES))
+        else:
+            fields.append(str(value).translate(_COPY_ESCAPES))
+    return '\t'.join(fields) + '\n'
+
+
+class FixtureScale:
+    """Row counts and the deterministic relationships between fixture rows."""
+
+    def __init__(self, seed: int = 0, organisations: int = 10, users: int = 1000, templates: int = 20,
+                 assignments: int = None, audits: int = 100_000, notifications: int = None, logs: int = None,
+                 end_date: str = DEFAULT_END_DATE, days: int = 365, password_hash: str = DEFAULT_PASSWORD_HASH,
+                 org_skew: float = 1.0):
+        if audits and not templates:
+            raise ValueError("Audits need at least one template")
+        if users and not organisations:
+            raise ValueError("Users need at least one organisation")
+        self.seed = seed
+        self.counts = {
+            'organisation': organisations,
+            'users': users,
+            'template': templates,
+            # Every audit belongs to its own assignment; 10% more are still open
+            'assignment': max(assignments if assignments is not None else audits + audits // 10, audits),
+            'audit': audits,
+            'notification': notifications if notifications is not None else audits,
+            'log': logs if logs is not None else audits * 2,
+        }
+        self.end = datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+        self.span = days * 86400
+        self.password_hash = password_hash
+        self.org_skew = org_skew
+        self._questions = {}
+
+    def id(self, table: str, index) -> str:
+        return None if index is None else fixture_id(self.seed, table, index)
+
+    def mix(self, table: str, index: int, salt: int = 0) -> int:
+        return _mix(self.seed, TABLES[table][1], index, salt)
+
+    def chunk_rng(self, table: str, chunk: int) -> random.Random:
+        return random.Random(self.mix(table, chunk, 0xC0FFEE))
+
+    # Users are striped across organisations: user u belongs to organisation
+    # u % organisations at position u // organisations, and positions 0, 1
+    # and 2 are the organisation's admin, manager and supervisor.
+
+    def user_organisation(self, user: int) -> int:
+        return user % self.counts['organisation']
+
+    def organisation_size(self, organisation: int) -> int:
+        organisations = self.counts['organisation']
+        return max(0, (self.counts['users'] - organisation + organisations - 1) // organisations)
+
+    def org_user(self, organisation: int, position: int) -> int:
+        return organisation + position * self.counts['organisation']
+
+    def user_role(self, user: int) -> str:
+        position = user // self.counts['organisation']
+        return ('admin', 'manager', 'supervisor')[position] if position < 3 else 'auditor'
+
+    def assignment_organisation(self, assignment: int):
+        """Organisation of an assignment: uniform, or with org_skew > 1 concentrated on the first organisations."""
+        organisations = self.counts['organisation']
+        if not organisations:
+            return None
+        value = self.mix('assignment', assignment, 1)
+        if self.org_skew == 1.0:
+            return value % organisations
+        return min(organisations - 1, int(organisations * (value / 2 ** 64) ** self.org_skew))
+
+    def assignment_parties(self, assignment: int) -> tuple:
+        """(organisation, template, auditor user, manager user) of an assignment; users may be None."""
+        organisation = self.assignment_organisation(assignment)
+        template = self.mix('assignment', assignment, 2) % self.counts['template']
+        size = self.organisation_size(organisation) if organisation is not None else 0
+        if size > 3:
+            auditor = self.org_user(organisation, 3 + self.mix('assignment', assignment, 3) % (size - 3))
+        elif size:
+            auditor = self.org_user(organisation, self.mix('assignment', assignment, 3) % size)
+        else:
+            auditor = None
+        manager = self.org_user(organisation, 1 if size > 1 else 0) if size else None
+        return organisation, template, auditor, manager
+
+    def assignment_created(self, assignment: int) -> float:
+        return self.end - self.mix('assignment', assignment, 4) % self.span
+
+    def template_questions(self, template: int) -> list:
+        """Template ``template``'s sections (template.questions JSON), cached per process."""
+        if template not in self._questions:
+            rng = random.Random(self.mix('template', template, 1))
+            sections = []
+            for s in range(1, rng.randint(1, 5) + 1):
+                questions = []
+                for q in range(1, rng.randint(2, 8) + 1):
+                    shape = dict(rng.choice(SEED_SHAPES), id=f"q{s}_{q}")
+                    questions.append(shape)
+                sections.append({"id": f"section_{s}", "title": f"{rng.choice(CATEGORIES)} check {s}",
+                                 "order": s, "isRequired": True, "questions": questions})
+            self._questions[template] = sections
+        return self._questions[template]
+
+    # Row generators: rows(table, start, stop) yields tuples in TABLES[table] column order
+
+    def rows(self, table: str, start: int, stop: int):
+        rng = self.chunk_rng(table, start // CHUNK_ROWS)
+        generate = getattr(self, f"_{table}_row")
+        for index in range(start, stop):
+            yield generate(index, rng)
+
+    def _organisation_row(self, index, rng):
+        return (self.id('organisation', index), f"Fixture Retail {self.seed}-{index}", rng.choice(REGIONS),
+                rng.choice(ORG_TYPES), _timestamp(self.end - self.span - rng.randrange(86400 * 30)))
+
+    def _users_row(self, index, rng):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f"fx{self.seed}_user{index}"
+        return (self.id('users', index), self.id('organisation', self.user_organisation(index)), username,
+                first, last, f"{username}@fixtures.example.com", f"+1555{rng.randrange(10 ** 7):07d}",
+                self.user_role(index), self.password_hash, rng.random() > 0.02,
+                _timestamp(self.end - self.span - rng.randrange(86400 * 30)))
+
+    def _template_row(self, index, rng):
+        organisations = self.counts['organisation']
+        organisation = index % organisations if organisations else None
+        creator = None
+        if organisation is not None and self.organisation_size(organisation):
+            creator = self.org_user(organisation, 1 if self.organisation_size(organisation) > 1 else 0)
+        valid_from = datetime.fromtimestamp(self.end - self.span, timezone.utc).date()
+        return (self.id('template', index), f"Fixture {rng.choice(CATEGORIES)} Audit {index}",
+                "Synthetic template for scale testing", rng.choice(CATEGORIES), self.template_questions(index),
+                {"enabled": True, "method": "weighted", "passThreshold": rng.choice([60, 70, 80])},
+                valid_from, valid_from + timedelta(days=730), self.id('users', creator), True, 1,
+                _timestamp(self.end - self.span))
+
+    def _store_info(self, assignment: int) -> dict:
+        city = CITIES[self.mix('assignment', assignment, 5) % len(CITIES)]
+        return {"store_name": f"Store {assignment % 10_000} {city}",
+                "address": f"{assignment % 997 + 1} Main Street, {city}"}
+
+    def _assignment_row(self, index, rng):
+        organisation, template, auditor, manager = self.assignment_parties(index)
+        created = self.assignment_created(index)
+        status = 'fulfilled' if index < self.counts['audit'] else _weighted(rng, OPEN_ASSIGNMENT_STATUSES)
+        return (self.id('assignment', index), self.id('template', template), self.id('users', auditor),
+                self.id('users', manager), self.id('organisation', organisation), self._store_info(index),
+                datetime.fromtimestamp(created + 86400 * rng.randint(1, 14), timezone.utc).date(),
+                rng.choice(PRIORITIES), None, status, _timestamp(created))
+
+    def _answer(self, question: dict, rng: random.Random, media: list):
+        kind = question.get('type')
+        options = question.get('options') or []
+        if kind == 'SingleChoice' and options:
+            return rng.choice(options)
+        if kind == 'MultipleChoice' and options:
+            return rng.sample(options, rng.randint(1, len(options)))
+        if kind == 'FileUpload':
+            name = f"photo_{rng.randrange(10 ** 8):08d}.jpg"
+            media.append(name)
+            return name
+        return rng.choice(COMMENTS)
+
+    def _audit_row(self, index, rng):
+        organisation, template, auditor, _ = self.assignment_parties(index)
+        start = self.assignment_created(index) + rng.randrange(86400 * 3)
+        status = _weighted(rng, AUDIT_STATUSES)
+        media = []
+        responses = {section['id']: {question['id']: self._answer(question, rng, media)
+                                     for question in section['questions']}
+                     for section in self.template_questions(template)}
+        finished = status != 'in_progress'
+        return (self.id('audit', index), self.id('template', template), 1, self.id('users', auditor),
+                self.id('organisation', organisation), self.id('assignment', index), status, _timestamp(start),
+                _timestamp(start + rng.randint(1200, 7200)) if finished else None, self._store_info(index),
+                responses, media,
+                {"latitude": round(rng.uniform(-60, 60), 6), "longitude": round(rng.uniform(-180, 180), 6),
+                 "accuracy": round(rng.uniform(3, 30), 1)},
+                round(rng.uniform(40, 100), 1) if finished else None, rng.choices(range(6), [60, 20, 10, 5, 3, 2])[0],
+                "Reviewed" if status in ('approved', 'rejected') else None, rng.random() < 0.05,
+                status == 'synced', _timestamp(start))
+
+    def _notification_row(self, index, rng):
+        users = self.counts['users']
+        user = self.mix('notification', index, 1) % users if users else None
+        created = self.end - self.mix('notification', index, 2) % self.span
+        status = _weighted(rng, NOTIFICATION_STATUSES)
+        sent = created + rng.randint(1, 30) if status in ('sent', 'delivered') else None
+        delivered = sent + rng.randint(1, 60) if status == 'delivered' else None
+        is_read = delivered is not None and rng.random() < 0.6
+        kind = rng.choice(NOTIFICATION_TYPES)
+        audits = self.counts['audit']
+        audit = self.mix('notification', index, 3) % audits if audits else None
+        return (self.id('notification', index), self.id('users', user),
+                self.id('organisation', self.user_organisation(user) if user is not None else None), kind,
+                kind.replace('_', ' ').title(), f"Fixture {kind} notification {index}",
+                rng.choice(NOTIFICATION_PRIORITIES), is_read,
+                _timestamp(delivered + rng.randint(60, 86400)) if is_read else None,
+                _weighted(rng, NOTIFICATION_CHANNELS), status, 3 if status == 'failed' else 0,
+                _timestamp(sent) if sent else None, _timestamp(delivered) if delivered else None,
+                {"auditId": self.id('audit', audit)} if audit is not None else {}, _timestamp(created),
+                _timestamp(created + 86400 * 30))
+
+    def _log_row(self, index, rng):
+        users = self.counts['users']
+        audits = self.counts['audit']
+        user = self.mix('log', index, 1) % users if users else None
+        audit = self.mix('log', index, 2) % audits if audits else None
+        action = _weighted(rng, LOG_ACTIONS)
+        return (self.id('log', index), self.id('users', user), action, 'audit' if audit is not None else None,
+                self.id('audit', audit), {"source": "fixture", "action": action},
+                f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}", rng.choice(USER_AGENTS),
+                _timestamp(self.end - self.mix('log', index, 3) % self.span))
+
+
+class RowStream:
+    """File-like object over generated rows for cursor.copy_expert(); only ``size`` bytes are buffered."""
+
+    def __init__(self, rows, columns: list = None):
+        self.rows = rows
+        self.columns = columns
+        self.buffer = b''
+        self.count = 0
+        self.bytes = 0
+
+    def read(self, size: int = 65536) -> bytes:
+        parts = [self.buffer]
+        length = len(self.buffer)
+        for row in self.rows:
+            if self.columns is not None:
+                row = [row[i] for i in self.columns]
+            line = copy_line(row).encode('utf-8')
+            parts.append(line)
+            length += len(line)
+            self.count += 1
+            if length >= size:
+                break
+        data = b''.join(parts)
+        self.buffer = data[size:]
+        self.bytes += min(len(data), size)
+        return data[:size]
+
+
+# Worker process state, set once by _init_worker
+_worker = {}
+
+
+def _tool_args(tool: DatabaseQueryTool) -> dict:
+    """DatabaseQueryTool constructor arguments for a worker's own connection to ``tool``'s database."""
+    params = tool.connection_params
+    return dict(host=params['host'], port=params['port'], database=params['database'],
+                username=params['user'], password=params['password'])
+
+
+def _init_worker(tool_args: dict, scale_args: dict, columns: dict, skip_fk_checks: bool):
+    tool = DatabaseQueryTool(**tool_args)
+    if not tool.connect():
+        raise SystemExit(1)
+    if skip_fk_checks:
+        # Superuser only: skip FK triggers; fixture rows are consistent by construction
+        tool.cursor.execute("SET session_replication_role = replica")
+    _worker.update(tool=tool, scale=FixtureScale(**scale_args), columns=columns)
+
+
+def _copy_chunk(table: str, start: int, stop: int) -> tuple:
+    """COPY rows [start, stop) of ``table`` in one transaction; returns (table, rows, bytes, seconds)."""
+    tool, scale = _worker['tool'], _worker['scale']
+    names, positions = _worker['columns'][table]
+    stream = RowStream(scale.rows(table, start, stop), positions)
+    started = time.perf_counter()
+    try:
+        tool.cursor.copy_expert(f"COPY {table} ({', '.join(names)}) FROM STDIN", stream, size=256 * 1024)
+        tool.connection.commit()
+    except Exception:
+        tool.connection.rollback()
+        raise
+    return table, stream.count, stream.bytes, time.perf_counter() - started
+
+
+def live_columns(tool: DatabaseQueryTool, table: str) -> tuple:
+    """(column names, positions in the generated row) for the columns ``table`` actually has."""
+    columns = tool.describe_table(table)
+    if not columns:
+        return None
+    existing = {column['column_name'] for column in columns}
+    generated = TABLES[table][2]
+    missing = [column['column_name'] for column in columns
+               if column['is_nullable'] == 'NO' and column['column_default'] is None
+               and column['column_name'] not in generated]
+    if missing:
+        raise ValueError(f"{table} has required columns the generator does not fill: {', '.join(missing)}")
+    names = [name for name in generated if name in existing]
+    return names, [generated.index(name) for name in names]
+
+
+def chunks(count: int):
+    for start in range(0, count, CHUNK_ROWS):
+        yield start, min(start + CHUNK_ROWS, count)
+
+
+def purge(tool: DatabaseQueryTool, seed: int):
+    """Delete every fixture row of ``seed``, children first."""
+    low, high = seed_id_range(seed)
+    for phase in reversed(PHASES):
+        for table in phase:
+            if not tool.describe_table(table):
+                continue
+            id_column = TABLES[table][0]
+            deleted = tool.execute_update(f"DELETE FROM {table} WHERE {id_column} BETWEEN %s AND %s", (low, high))
+            print(f"🗑️ {table}: {deleted:,} fixture rows deleted")
+
+
+def generate(tool: DatabaseQueryTool, scale_args: dict, workers: int, skip_fk_checks: bool = False):
+    scale = FixtureScale(**scale_args)
+    columns = {}
+    for phase in PHASES:
+        for table in phase:
+            if not scale.counts[table]:
+                continue
+            found = live_columns(tool, table)
+            if found is None:
+                print(f"⚠️ Table {table} does not exist, skipping {scale.counts[table]:,} rows")
+                continue
+            columns[table] = found
+
+    print(f"🏗️ Generating fixtures for seed {scale.seed}: " +
+          ", ".join(f"{scale.counts[table]:,} {table}" for table in columns))
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(_tool_args(tool), scale_args, columns, skip_fk_checks)) as pool:
+        for phase in PHASES:
+            tables = [table for table in phase if table in columns]
+            if not tables:
+                continue
+            phase_started = time.time()
+            futures = [pool.submit(_copy_chunk, table, start, stop)
+                       for table in tables for start, stop in chunks(scale.counts[table])]
+            rows = dict.fromkeys(tables, 0)
+            size = 0
+            # Every chunk of this phase must be committed before children reference it
+            for future in as_completed(futures):
+                table, count, written, _ = future.result()
+                rows[table] += count
+                size += written
+            elapsed = time.time() - phase_started
+            for table in tables:
+                print(f"✅ {table}: {rows[table]:,} rows")
+            print(f"   {size / 1e6:,.1f} MB in {elapsed:.1f}s ({sum(rows.values()) / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(f"⏱️ Fixtures loaded in {time.time() - started:.1f}s")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Generate synthetic audit system data at scale with COPY')
+    parser.add_argument('--host', default='localhost', help='Database host')
+    parser.add_argument('--port', type=int, default=5432, help='Database port')
+    parser.add_argument('--database', default='retail-execution-audit-system', help='Database name')
+    parser.add_argument('--username', default='postgres', help='Database username')
+    parser.add_argument('--password', default='123456', help='Database password')
+    parser.add_argument('--seed', type=int, default=0, help='Seed; the same seed always produces the same rows')
+    parser.add_argument('--organisations', type=int, default=10, help='Number of organisations')
+    parser.add_argument('--users', type=int, default=1000, help='Number of users')
+    parser.add_argument('--templates', type=int, default=20, help='Number of templates')
+    parser.add_argument('--audits', type=int, default=100_000, help='Number of audits')
+    parser.add_argument('--assignments', type=int, help='Number of assignments (default audits + 10%%)')
+    parser.add_argument('--notifications', type=int, help='Number of notifications (default = audits)')
+    parser.add_argument('--logs', type=int, help='Number of log rows (default 2 × audits)')
+    parser.add_argument('--end-date', default=DEFAULT_END_DATE, help='Latest timestamp in the data (YYYY-MM-DD)')
+    parser.add_argument('--days', type=int, default=365, help='Days of history before --end-date')
+    parser.add_argument('--org-skew', type=float, default=1.0,
+                        help='Above 1, assignments and audits concentrate on the first organisations '
+                             '(uneven tenant sizes)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel COPY processes')
+    parser.add_argument('--skip-fk-checks', action='store_true',
+                        help='Skip foreign key triggers during the load (needs superuser)')
+    parser.add_argument('--purge', action='store_true', help="Delete this seed's fixture rows instead")
+
+    args = parser.parse_args()
+
+    tool = DatabaseQueryTool(host=args.host, port=args.port, database=args.database,
+                             username=args.username, password=args.password)
+    if not tool.connect():
+        sys.exit(1)
+
+    try:
+        if args.purge:
+            purge(tool, args.seed)
+        else:
+            scale_args = dict(seed=args.seed, organisations=args.organisations, users=args.users,
+                              templates=args.templates, assignments=args.assignments, audits=args.audits,
+                              notifications=args.notifications, logs=args.logs, end_date=args.end_date,
+                              days=args.days, org_skew=args.org_skew)
+            generate(tool, scale_args, args.workers, args.skip_fk_checks)
+    except KeyboardInterrupt:
+        print("\n⚠️ Generation interrupted; committed chunks remain (use --purge to remove them)")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        tool.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for SignalR JSON frame decoding.
+
+Builds burst frames of 1 to 500 records (UnreadCount + ReceiveNotification +
+Heartbeat mixes) and compares:
+  legacy  - rstrip('\\x1e') + one json.loads, as the listener used to do;
+            fails on any frame with more than one record
+  split   - str.split on the record separator + json.loads per record
+  decoder - FrameDecoder (in-place raw_decode, partial records kept)
+Also feeds each frame in arbitrary chunks to check that no record is lost.
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+
+from tools.signalr_protocol import RECORD_SEPARATOR, FrameDecoder, decode_frame
+
+
+def build_frame(records: int, rng: random.Random) -> str:
+    """A burst frame with a realistic mix of server invocations."""
+    parts = []
+    for i in range(records):
+        kind = i % 3
+        if kind == 0:
+            message = {"type": 1, "target": "UnreadCount", "arguments": [rng.randint(0, 99)]}
+        elif kind == 1:
+            message = {"type": 1, "target": "ReceiveNotification", "arguments": [{
+                "notificationId": str(uuid.UUID(int=rng.getrandbits(128))),
+                "type": "assignment", "title": "New audit assignment",
+                "message": "You have been assigned a new audit.", "priority": "high",
+                "timestamp": "2025-07-09T13:13:35.9301234Z",
+                "userId": "2c8ef14b-8038-4841-8a41-131236c55082",
+                "organisationId": "85e74336-83c0-471a-ac9d-e9d09d7256e4"}]}
+        else:
+            message = {"type": 1, "target": "Heartbeat", "arguments": [{"timestamp": "2025-07-09T13:13:35Z"}]}
+        parts.append(json.dumps(message, separators=(',', ':')) + RECORD_SEPARATOR)
+    return ''.join(parts)
+
+
+def legacy_decode(raw: str) -> list:
+    clean = raw.rstrip(RECORD_SEPARATOR)
+    try:
+        return [json.loads(clean)] if clean else []
+    except json.JSONDecodeError:
+        return []
+
+
+def bench(decode, frame: str, records: int, iterations: int) -> tuple:
+    """Return ``(µs per record, records decoded per frame)``."""
+    decoded = len(decode(frame))
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decode(frame)
+    return (time.perf_counter() - started) / (iterations * records) * 1_000_000, decoded
+
+
+def chunked_roundtrip(frame: str, records: int, rng: random.Random) -> bool:
+    """Feed the frame in random chunks and check every record comes out exactly once."""
+    decoder = FrameDecoder()
+    decoded = 0
+    offset = 0
+    while offset < len(frame):
+        size = rng.randint(1, 400)
+        decoded += len(decoder.feed(frame[offset:offset + size]))
+        offset += size
+    return decoded == records and decoder.pending == 0
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='SignalR JSON frame decoder micro-benchmark')
+    parser.add_argument('--records', default='1,2,10,50,100,500', help='Comma-separated records per frame')
+    parser.add_argument('--total-records', type=int, default=200000,
+                        help='Approximate records decoded per measurement')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for frame contents')
+
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'records':>7} {'frame KB':>8} {'legacy µs/rec':>13} {'legacy ok':>9} "
+          f"{'split µs/rec':>12} {'decoder µs/rec':>14} {'chunked ok':>10}")
+    print("-" * 82)
+    for records in (int(r) for r in args.records.split(',') if r.strip()):
+        frame = build_frame(records, rng)
+        iterations = max(1, args.total_records // records)
+
+        legacy_us, legacy_count = bench(legacy_decode, frame, records, iterations)
+        split_us, _ = bench(decode_frame, frame, records, iterations)
+        decoder = FrameDecoder()
+        decoder_us, decoder_count = bench(decoder.feed, frame, records, iterations)
+        assert decoder_count == records
+
+        print(f"{records:>7} {len(frame) / 1024:>8.1f} {legacy_us:>13.2f} "
+              f"{legacy_count:>4}/{records:<4} {split_us:>12.2f} {decoder_us:>14.2f} "
+              f"{'✅' if chunked_roundtrip(frame, records, rng) else '❌':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SignalR JSON vs MessagePack hub protocol.
+
+Encodes representative NotificationHub traffic (ReceiveNotification,
+UnreadCount, Heartbeat, DeliveryAcknowledged) with both protocols and reports
+bytes on the wire and client decode cost per message, for single-message
+frames and for frames batching several messages.
+"""
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from tools import signalr_messagepack
+from tools import signalr_protocol
+
+
+def sample_messages(message_size: int = 120) -> dict:
+    """One representative invocation per server target, as (target, arguments)."""
+    now = datetime.now(timezone.utc)
+    return {
+        'ReceiveNotification': [{
+            "notificationId": str(uuid.uuid4()),
+            "type": "assignment",
+            "title": "New audit assignment",
+            "message": ("You have been assigned a new audit at Store 42. " * 8)[:message_size],
+            "priority": "high",
+            "timestamp": now,
+            "userId": str(uuid.uuid4()),
+            "organisationId": str(uuid.uuid4()),
+        }],
+        'UnreadCount': [17],
+        'Heartbeat': [{"timestamp": now}],
+        'DeliveryAcknowledged': [{"notificationId": str(uuid.uuid4()), "acknowledgedAt": now}],
+    }
+
+
+def json_frame(messages) -> str:
+    """Server-side JSON framing (System.Text.Json writes ISO-8601 dates)."""
+    return ''.join(
+        json.dumps({"type": 1, "target": target, "arguments": arguments},
+                   default=lambda v: v.isoformat().replace('+00:00', 'Z'), separators=(',', ':'))
+        + signalr_protocol.RECORD_SEPARATOR
+        for target, arguments in messages)
+
+
+def messagepack_frame(messages) -> bytes:
+    return b''.join(signalr_messagepack.encode_invocation(target, arguments) for target, arguments in messages)
+
+
+def time_decode(decode, frame, messages_per_frame: int, iterations: int) -> float:
+    """Return the mean decode cost per message in microseconds."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decode(frame)
+    return (time.perf_counter() - started) / (iterations * messages_per_frame) * 1_000_000
+
+
+def run_benchmark(iterations: int, batch_sizes, message_size: int) -> list:
+    samples = sample_messages(message_size)
+    results = []
+
+    print(f"🔄 Decoding each frame {iterations} times per protocol")
+    print(f"\n{'target':<22} {'batch':>5} {'json B/msg':>10} {'mpack B/msg':>11} {'saved':>6} "
+          f"{'json µs/msg':>11} {'mpack µs/msg':>12} {'speedup':>7}")
+    print("-" * 92)
+    for target, arguments in samples.items():
+        for batch in batch_sizes:
+            messages = [(target, arguments)] * batch
+            text = json_frame(messages)
+            binary = messagepack_frame(messages)
+            json_bytes = len(text.encode('utf-8')) / batch
+            mpack_bytes = len(binary) / batch
+
+            # Sanity check: both decoders see the same targets
+            assert [m['target'] for m in signalr_protocol.decode_frame(text)] == \
+                [m['target'] for m in signalr_messagepack.decode_frame(binary)]
+
+            json_us = time_decode(signalr_protocol.decode_frame, text, batch, iterations)
+            mpack_us = time_decode(signalr_messagepack.decode_frame, binary, batch, iterations)
+            print(f"{target:<22} {batch:>5} {json_bytes:>10.1f} {mpack_bytes:>11.1f} "
+                  f"{1 - mpack_bytes / json_bytes:>6.0%} {json_us:>11.2f} {mpack_us:>12.2f} "
+                  f"{json_us / mpack_us:>6.2f}x")
+            results.append({
+                'target': target,
+                'batch': batch,
+                'json_bytes_per_message': json_bytes,
+                'messagepack_bytes_per_message': mpack_bytes,
+                'json_decode_us_per_message': json_us,
+                'messagepack_decode_us_per_message': mpack_us,
+            })
+
+    return results
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='SignalR JSON vs MessagePack protocol benchmark')
+    parser.add_argument('--iterations', type=int, default=20000, help='Decodes per frame and protocol')
+    parser.add_argument('--batch-sizes', default='1,10,100', help='Comma-separated messages per frame')
+    parser.add_argument('--message-size', type=int, default=120, help='Characters in the notification message')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    args = parser.parse_args()
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',') if b.strip()]
+    results = run_benchmark(args.iterations, batch_sizes, args.message_size)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Local asyncio stand-in for the NotificationHub.
+
+Implements the hub side of WEBSOCKET_PROTOCOL.md so the WebSocket tools can
+be benchmarked on one machine without the API, Postgres, Redis or RabbitMQ:
+the JSON (and, with msgpack installed, MessagePack) handshake, Heartbeat +
+UnreadCount on connect, SubscribeToUser / JoinOrganisation /
+LeaveOrganisation groups, MarkNotificationAsRead /
+MarkAllNotificationsAsRead, AcknowledgeDelivery -> DeliveryAcknowledged,
+SendTestMessage, protocol pings, and ReceiveNotification generated at a
+configurable rate and payload size.
+
+Tokens are not verified; nameid / organisation_id are read from the JWT
+payload when present.
+
+Usage:
+    python signalr_standin_hub.py --port 8080 --rate 200 --payload-size 512
+    python websocket_listener.py --url "ws://localhost:8080/hubs/notifications?access_token=<jwt>"
+    python signalr_standin_hub.py --replay logs/websocket_messages_<timestamp>.log --replay-speed 10
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+
+from tools import signalr_protocol
+from tools.capture import RECV, load_frames, paced, parse_speed
+from tools.latency_histogram import LatencyHistogram
+from tools.signalr_protocol import CLOSE, INVOCATION, PING, RECORD_SEPARATOR, jwt_claims
+
+try:
+    from tools import signalr_messagepack
+except ImportError:
+    # msgpack not installed: only the JSON protocol is offered
+    signalr_messagepack = None
+
+HUB_PATH = "/hubs/notifications"
+
+NOTIFICATION_TYPES = ('assignment_created', 'audit_submitted', 'audit_approved', 'system_alert')
+PRIORITIES = ('low', 'medium', 'high', 'urgent')
+
+# Sent notifications remembered for ack latency; the oldest are forgotten beyond this
+MAX_PENDING_ACKS = 100000
+
+
+def decode_captured(payload) -> list:
+    """Decode a captured frame of either protocol, skipping anything unreadable."""
+    try:
+        if isinstance(payload, bytes):
+            return signalr_messagepack.decode_frame(payload) if signalr_messagepack else []
+        return signalr_protocol.decode_frame(payload)
+    except ValueError:
+        return []
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        # System.Text.Json writes UTC DateTime values with a trailing Z
+        return value.astimezone(timezone.utc).replace(tzinfo=None).isoformat() + 'Z'
+    return str(value)
+
+
+class HubClient:
+    """Server-side state for one connection."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, ws, protocol: str, user_id: str, organisation_id: str):
+        self.ws = ws
+        self.protocol = protocol
+        self.user_id = user_id
+        self.organisation_id = organisation_id
+        self.connection_id = f"standin-{next(self._ids)}"
+        self.groups = set()
+        self.unread = 0
+
+    def encode(self, target: str, arguments: list):
+        if self.protocol == 'messagepack':
+            return signalr_messagepack.encode_invocation(target, arguments)
+        return json.dumps({"type": INVOCATION, "target": target, "arguments": arguments},
+                          default=json_default, separators=(',', ':')) + RECORD_SEPARATOR
+
+    def encode_completion(self, invocation_id: str):
+        if self.protocol == 'messagepack':
+            return signalr_messagepack.encode_completion(invocation_id)
+        return signalr_protocol.encode_completion(invocation_id)
+
+    def encode_ping(self):
+        if self.protocol == 'messagepack':
+            return signalr_messagepack.encode_ping()
+        return signalr_protocol.encode_ping()
+
+    def new_decoder(self):
+        if self.protocol == 'messagepack':
+            return signalr_messagepack.FrameDecoder()
+        return signalr_protocol.FrameDecoder()
+
+    async def send(self, *records):
+        """Send one or more encoded records as a single frame."""
+        await self.ws.send(records[0] if len(records) == 1 else
+                           (b'' if self.protocol == 'messagepack' else '').join(records))
+
+
+class HubStats:
+    """Counters reported by the stand-in hub."""
+
+    def __init__(self):
+        self.connections = 0
+        self.handshake_failures = 0
+        self.notifications = 0
+        self.deliveries = 0
+        self.frames = 0
+        self.acks = 0
+        self.unknown_acks = 0
+        self.invocations = {}
+        self.ack_latency = LatencyHistogram()
+        self._last = (time.perf_counter(), 0, 0)
+
+    def rates(self) -> tuple:
+        """Deliveries and acks per second since the previous call."""
+        now = time.perf_counter()
+        started, deliveries, acks = self._last
+        elapsed = max(now - started, 1e-9)
+        self._last = (now, self.deliveries, self.acks)
+        return (self.deliveries - deliveries) / elapsed, (self.acks - acks) / elapsed
+
+
+class StandInHub:
+    """Connection handling, groups and the notification generator."""
+
+    def __init__(self, rate: float = 10.0, payload_size: int = 200, target: str = 'user', batch: int = 1,
+                 heartbeat_interval: float = 30.0, keepalive_interval: float = 10.0,
+                 handshake_timeout: float = 15.0, unread_start: int = 0, seed: int = 0):
+        self.rate = rate
+        self.payload_size = payload_size
+        self.target = target
+        self.batch = max(1, batch)
+        self.heartbeat_interval = heartbeat_interval
+        self.keepalive_interval = keepalive_interval
+        self.handshake_timeout = handshake_timeout
+        self.unread_start = unread_start
+        self.clients = set()
+        self.groups = {}
+        # Group names per prefix ('user_', 'org_') and each name's slot, so next_group is O(1)
+        self._group_names = {}
+        self._group_slots = {}
+        self.pending_acks = {}
+        self.stats = HubStats()
+        self._rng = random.Random(seed)
+        self._group_cycle = 0
+
+    # Groups
+
+    @staticmethod
+    def _group_prefix(group: str) -> str:
+        return group.split('_', 1)[0] + '_'
+
+    def add_to_group(self, client: HubClient, group: str):
+        if group not in self.groups:
+            names = self._group_names.setdefault(self._group_prefix(group), [])
+            self._group_slots[group] = len(names)
+            names.append(group)
+        self.groups.setdefault(group, set()).add(client)
+        client.groups.add(group)
+
+    def remove_from_group(self, client: HubClient, group: str):
+        members = self.groups.get(group)
+        if members:
+            members.discard(client)
+            if not members:
+                del self.groups[group]
+                self._forget_group(group)
+        client.groups.discard(group)
+
+    def _forget_group(self, group: str):
+        # Swap-remove: move the last name of the prefix into the freed slot
+        names = self._group_names[self._group_prefix(group)]
+        slot = self._group_slots.pop(group)
+        last = names.pop()
+        if last != group:
+            names[slot] = last
+            self._group_slots[last] = slot
+
+    # Connection handling
+
+    async def handshake(self, ws):
+        """Read the handshake record and return the negotiated protocol, or None."""
+        raw = await asyncio.wait_for(ws.recv(), self.handshake_timeout)
+        text = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+        request = json.loads(text.split(RECORD_SEPARATOR, 1)[0])
+        protocol = request.get('protocol')
+        if protocol == 'json' or (protocol == 'messagepack' and signalr_messagepack):
+            await ws.send('{}' + RECORD_SEPARATOR)
+            return protocol
+        await ws.send(json.dumps({"error": f"The protocol '{protocol}' is not supported."}) + RECORD_SEPARATOR)
+        return None
+
+    async def handle(self, ws):
+        query = parse_qs(urlparse(ws.request.path).query)
+        claims = jwt_claims(query.get('access_token', [''])[0])
+
+        try:
+            protocol = await self.handshake(ws)
+        except (asyncio.TimeoutError, ValueError, websockets.ConnectionClosed):
+            protocol = None
+            try:
+                await ws.send('{"error":"Handshake was canceled."}' + RECORD_SEPARATOR)
+            except websockets.ConnectionClosed:
+                pass
+        if protocol is None:
+            self.stats.handshake_failures += 1
+            return
+
+        client = HubClient(ws, protocol, claims.get('nameid'), claims.get('organisation_id'))
+        client.unread = self.unread_start
+        self.clients.add(client)
+        self.stats.connections += 1
+        keepalive = asyncio.create_task(self.keepalive(client))
+        try:
+            # OnConnectedAsync sends a heartbeat and the unread count
+            await client.send(client.encode("Heartbeat", [{"timestamp": utc_now()}]),
+                              client.encode("UnreadCount", [client.unread]))
+            decoder = client.new_decoder()
+            async for raw in ws:
+                for message in decoder.feed(raw):
+                    await self.dispatch(client, message)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            keepalive.cancel()
+            for group in list(client.groups):
+                self.remove_from_group(client, group)
+            self.clients.discard(client)
+
+    async def keepalive(self, client: HubClient):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            await client.send(client.encode_ping())
+
+    async def dispatch(self, client: HubClient, message: dict):
+        message_type = message.get('type')
+        if message_type == PING:
+            return
+        if message_type == CLOSE:
+            await client.ws.close()
+            return
+        if message_type != INVOCATION:
+            return
+
+        target = message.get('target')
+        arguments = message.get('arguments') or []
+        self.stats.invocations[target] = self.stats.invocations.get(target, 0) + 1
+        replies = []
+
+        if target == 'SubscribeToUser' and arguments:
+            self.add_to_group(client, f"user_{arguments[0]}")
+        elif target == 'JoinOrganisation' and arguments:
+            self.add_to_group(client, f"org_{arguments[0]}")
+        elif target == 'LeaveOrganisation' and arguments:
+            self.remove_from_group(client, f"org_{arguments[0]}")
+        elif target == 'AcknowledgeDelivery' and arguments:
+            sent_at = self.pending_acks.pop(str(arguments[0]), None)
+            if sent_at is None:
+                self.stats.unknown_acks += 1
+            else:
+                self.stats.ack_latency.record(time.perf_counter() - sent_at)
+            self.stats.acks += 1
+            replies.append(client.encode("DeliveryAcknowledged", [{
+                "notificationId": arguments[0], "acknowledgedAt": utc_now()}]))
+        elif target == 'MarkNotificationAsRead' and arguments:
+            client.unread = max(0, client.unread - 1)
+            replies.append(client.encode("UnreadCount", [client.unread]))
+            replies.append(client.encode("NotificationMarkedAsRead", [{
+                "notificationId": arguments[0], "unreadCount": client.unread}]))
+        elif target == 'MarkAllNotificationsAsRead':
+            client.unread = 0
+            replies.append(client.encode("UnreadCount", [0]))
+            replies.append(client.encode("AllNotificationsMarkedAsRead", [{"unreadCount": 0}]))
+        elif target == 'SendTestMessage':
+            replies.append(client.encode("ReceiveNotification", [self.notification(
+                client.user_id, client.organisation_id, message=arguments[0] if arguments else "Test message",
+                notification_type='test')]))
+
+        if message.get('invocationId'):
+            replies.append(client.encode_completion(message['invocationId']))
+        if replies:
+            await client.send(*replies)
+
+    # Notification generation
+
+    def notification(self, user_id=None, organisation_id=None, message=None, notification_type=None) -> dict:
+        text = message if message is not None else (
+            "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (self.payload_size // 56 + 1)
+        )[:self.payload_size]
+        return {
+            "notificationId": str(uuid.UUID(int=self._rng.getrandbits(128), version=4)),
+            "type": notification_type or self._rng.choice(NOTIFICATION_TYPES),
+            "title": "Stand-in notification",
+            "message": text,
+            "priority": self._rng.choice(PRIORITIES),
+            "timestamp": utc_now(),
+            "userId": user_id,
+            "organisationId": organisation_id,
+        }
+
+    def next_group(self):
+        prefix = 'org_' if self.target == 'org' else 'user_'
+        names = self._group_names.get(prefix)
+        if not names:
+            return None
+        self._group_cycle = (self._group_cycle + 1) % len(names)
+        return names[self._group_cycle]
+
+    async def generate(self):
+        """Emit ReceiveNotification at ``rate`` per second, round-robin over the target groups."""
+        tick = 0.01
+        due = 0.0
+        while True:
+            await asyncio.sleep(tick)
+            due += self.rate * tick
+            count = int(due)
+            if not count:
+                continue
+            due -= count
+
+            await self.deliver([None] * count)
+
+    async def deliver(self, templates: list):
+        """Send one notification per template (None = generated) to the next target groups."""
+        outbox = {}
+        for template in templates:
+            group = self.next_group()
+            if group is None:
+                break
+            kind, _, group_id = group.partition('_')
+            notification = self.notification(
+                user_id=group_id if kind == 'user' else None,
+                organisation_id=group_id if kind == 'org' else None)
+            if template:
+                # Captured content with a fresh ID and timestamp, so acks and latency stay meaningful
+                for field in ('type', 'title', 'message', 'priority'):
+                    if template.get(field) is not None:
+                        notification[field] = template[field]
+            if len(self.pending_acks) >= MAX_PENDING_ACKS:
+                self.pending_acks.pop(next(iter(self.pending_acks)))
+            self.pending_acks[notification["notificationId"]] = time.perf_counter()
+            self.stats.notifications += 1
+            for client in self.groups.get(group, ()):
+                client.unread += 1
+                outbox.setdefault(client, []).append(client.encode("ReceiveNotification", [notification]))
+
+        await asyncio.gather(*(self.flush(client, records) for client, records in outbox.items()),
+                             return_exceptions=True)
+
+    async def replay(self, frames: list, speed: float, loop: bool = False):
+        """Re-emit the ReceiveNotification traffic of captured frames with their original timing."""
+        while True:
+            async for frame, _ in paced(frames, speed):
+                templates = [message['arguments'][0] for message in decode_captured(frame.payload)
+                             if message.get('type') == INVOCATION and message.get('target') == 'ReceiveNotification'
+                             and message.get('arguments')]
+                if templates:
+                    await self.deliver(templates)
+            if not loop:
+                print("✅ Capture replay finished")
+                return
+
+    async def replay_when_ready(self, frames: list, speed: float, loop: bool = False):
+        # Wait for the first subscription so the start of the capture is not sent to nobody
+        while self.next_group() is None:
+            await asyncio.sleep(0.1)
+        await self.replay(frames, speed, loop)
+
+    async def flush(self, client: HubClient, records: list):
+        for i in range(0, len(records), self.batch):
+            chunk = records[i:i + self.batch]
+            await client.send(*chunk)
+            self.stats.frames += 1
+            self.stats.deliveries += len(chunk)
+
+    async def heartbeat(self):
+        """Broadcast Heartbeat to every connection, like SendHeartbeatToAll."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            await asyncio.gather(*(client.send(client.encode("Heartbeat", [{"timestamp": utc_now()}]))
+                                   for client in list(self.clients)), return_exceptions=True)
+
+    async def report(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            deliveries, acks = self.stats.rates()
+            print(f"📡 clients {len(self.clients):>6}  groups {len(self.groups):>6}  "
+                  f"delivered {deliveries:9.1f}/s  acks {acks:9.1f}/s  "
+                  f"awaiting ack {len(self.pending_acks):>7}  ack latency {self.stats.ack_latency.summary()}")
+
+
+async def serve(host: str, port: int, hub: StandInHub, report_interval: float, replay_frames=None,
+                replay_speed: float = 1.0, replay_loop: bool = False):
+    async def handler(ws):
+        if urlparse(ws.request.path).path.rstrip('/') != HUB_PATH:
+            await ws.close(code=1008, reason="unknown hub")
+            return
+        await hub.handle(ws)
+
+    async with websockets.serve(handler, host, port, max_size=1024 * 1024):
+        protocols = "json, messagepack" if signalr_messagepack else "json"
+        print(f"🚀 Stand-in hub listening on ws://{host}:{port}{HUB_PATH} ({protocols})")
+        print(f"   {hub.rate:g} notifications/s to {hub.target} groups, {hub.payload_size} chars, "
+              f"{hub.batch} record(s) per frame")
+        if replay_frames is not None:
+            print(f"   replaying {len(replay_frames)} captured frames at "
+                  f"{f'{replay_speed:g}x' if replay_speed else 'max speed'} once clients subscribe")
+            source = hub.replay_when_ready(replay_frames, replay_speed, replay_loop)
+        else:
+            source = hub.generate()
+        tasks = [asyncio.create_task(source), asyncio.create_task(hub.heartbeat()),
+                 asyncio.create_task(hub.report(report_interval))]
+        try:
+            await asyncio.Future()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Local SignalR NotificationHub stand-in')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--rate', type=float, default=10.0, help='ReceiveNotification messages generated per second')
+    parser.add_argument('--payload-size', type=int, default=200, help='Characters in each notification message')
+    parser.add_argument('--target', choices=['user', 'org'], default='user',
+                        help='Send to user_{id} groups (SubscribeToUser) or org_{id} groups (JoinOrganisation)')
+    parser.add_argument('--batch', type=int, default=1, help='Records packed into one frame per connection')
+    parser.add_argument('--heartbeat-interval', type=float, default=30.0, help='Seconds between Heartbeat broadcasts')
+    parser.add_argument('--keepalive-interval', type=float, default=10.0, help='Seconds between protocol pings')
+    parser.add_argument('--handshake-timeout', type=float, default=15.0, help='Seconds to wait for the handshake')
+    parser.add_argument('--unread-start', type=int, default=0, help='UnreadCount sent on connect')
+    parser.add_argument('--report-interval', type=float, default=5.0, help='Seconds between stats lines')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for generated notifications')
+    parser.add_argument('--replay', nargs='+', metavar='CAPTURE',
+                        help='Replay the ReceiveNotification traffic of capture files instead of --rate')
+    parser.add_argument('--replay-speed', default='1', help="Replay speed: 1, N (e.g. 10) or 'max'")
+    parser.add_argument('--replay-loop', action='store_true', help='Start the capture again when it ends')
+
+    args = parser.parse_args()
+
+    hub = StandInHub(rate=args.rate, payload_size=args.payload_size, target=args.target, batch=args.batch,
+                     heartbeat_interval=args.heartbeat_interval, keepalive_interval=args.keepalive_interval,
+                     handshake_timeout=args.handshake_timeout, unread_start=args.unread_start, seed=args.seed)
+    replay_frames = None
+    replay_speed = 1.0
+    if args.replay:
+        try:
+            replay_speed = parse_speed(args.replay_speed)
+        except ValueError:
+            parser.error("--replay-speed must be a positive number or 'max'")
+        replay_frames = load_frames(args.replay, direction=RECV)
+
+    try:
+        asyncio.run(serve(args.host, args.port, hub, args.report_interval, replay_frames, replay_speed,
+                          args.replay_loop))
+    except KeyboardInterrupt:
+        print("\n👋 Stand-in hub stopped")
+        print(f"   {hub.stats.connections} connections, {hub.stats.notifications} notifications, "
+              f"{hub.stats.deliveries} deliveries in {hub.stats.frames} frames, {hub.stats.acks} acks, "
+              f"{hub.stats.handshake_failures} handshake failures")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,46 +11,77 @@ import uuid
 from datetime import datetime
 from typing import Dict, Any
 from tools import test_credentials
+from tools.audit_lookup import AuditIndex, find_audit
+from tools.token_cache import get_token_cache
 
 class AuditCreationTest:
     """Test class for audit creation and update functionality"""
     
-    def __init__(self, base_url: str = "http://localhost:8080"):
+    def __init__(self, base_url: str = "http://localhost:8080", verbose: bool = True):
         self.base_url = base_url
         self.session = requests.Session()
         self.test_data = {}
+        self.verbose = verbose
+        self.audit_index = None
+        self.role = None
+        self.use_cache = True
+
+    def log(self, message: str):
+        """Print a progress line unless running quietly (e.g. as a virtual user in audit_load_generator.py)"""
+        if self.verbose:
+            print(message)
         
-    def login(self, role: str = "manager") -> bool:
-        """Login to get authentication token using credentials from test_credentials.py"""
+    def login(self, role: str = "manager", use_cache: bool = True) -> bool:
+        """Login to get authentication token using credentials from test_credentials.py
+
+        Tokens come from the shared token cache (tools/token_cache.py), so
+        instances logging in as the same role reuse one login until shortly
+        before the JWT expires; use_cache=False always calls the login endpoint.
+        """
         try:
             creds = test_credentials.get_test_credentials(role)
-            login_url = f"{self.base_url}/api/v1/auth/login"
-            login_data = {
-                "username": creds["username"],
-                "password": creds["password"]
-            }
-            
-            response = self.session.post(login_url, json=login_data)
-            if response.status_code == 200:
-                token_data = response.json()
-                token = token_data.get('token')
-                if token:
-                    self.session.headers.update({
-                        'Authorization': f'Bearer {token}',
-                        'Content-Type': 'application/json'
-                    })
-                    print(f"✅ Successfully logged in as {creds['username']}")
-                    return True
-                else:
-                    print("❌ No token received in login response")
+            if use_cache:
+                token = get_token_cache(self.base_url).get_token(role)
+            else:
+                login_url = f"{self.base_url}/api/v1/auth/login"
+                login_data = {
+                    "username": creds["username"],
+                    "password": creds["password"]
+                }
+                
+                response = self.session.post(login_url, json=login_data)
+                if response.status_code != 200:
+                    self.log(f"❌ Login failed with status {response.status_code}: {response.text}")
                     return False
+                token = response.json().get('token')
+            if token:
+                self.role = role
+                self.use_cache = use_cache
+                self.session.headers.update({
+                    'Authorization': f'Bearer {token}',
+                    'Content-Type': 'application/json'
+                })
+                self.log(f"✅ Successfully logged in as {creds['username']}")
+                return True
             else:
-                print(f"❌ Login failed with status {response.status_code}: {response.text}")
+                self.log("❌ No token received in login response")
                 return False
         except Exception as e:
-            print(f"❌ Login error: {e}")
+            self.log(f"❌ Login error: {e}")
             return False
     
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send an authenticated request; on a 401, drop the rejected token, log in again and retry once"""
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code == 401 and self.role:
+            rejected = self.session.headers.get('Authorization', '')[len('Bearer '):]
+            if self.use_cache:
+                get_token_cache(self.base_url).invalidate(self.role, rejected)
+            self.log("🔑 Token rejected (401), logging in again")
+            if self.login(self.role, self.use_cache):
+                response = self.session.request(method, url, **kwargs)
+        return response
+
     def get_test_data(self) -> Dict[str, Any]:
         """Get test data from database using the query tool"""
         try:
@@ -62,7 +93,7 @@ class AuditCreationTest:
                 "user_id": "2c8ef14b-8038-4841-8a41-131236c55082"  # johndoe
             }
         except Exception as e:
-            print(f"❌ Error getting test data: {e}")
+            self.log(f"❌ Error getting test data: {e}")
             return {}
     
     def create_assignment(self) -> str:
@@ -84,17 +115,17 @@ class AuditCreationTest:
                 }
             }
             
-            response = self.session.post(assignment_url, json=assignment_data)
+            response = self.request('POST', assignment_url, json=assignment_data)
             if response.status_code == 201:
                 assignment = response.json()
                 assignment_id = assignment.get('assignmentId')
-                print(f"✅ Created assignment with ID: {assignment_id}")
+                self.log(f"✅ Created assignment with ID: {assignment_id}")
                 return assignment_id
             else:
-                print(f"❌ Failed to create assignment: {response.status_code} - {response.text}")
+                self.log(f"❌ Failed to create assignment: {response.status_code} - {response.text}")
                 return None
         except Exception as e:
-            print(f"❌ Error creating assignment: {e}")
+            self.log(f"❌ Error creating assignment: {e}")
             return None
     
     def create_audit(self, assignment_id: str, store_name: str = "Test Store", responses: Dict = None) -> Dict[str, Any]:
@@ -115,16 +146,16 @@ class AuditCreationTest:
                 audit_data["responses"] = responses
                 audit_data["criticalIssues"] = 2
             
-            response = self.session.post(audit_url, json=audit_data)
+            response = self.request('POST', audit_url, json=audit_data)
             if response.status_code == 201:
                 audit = response.json()
-                print(f"✅ Created audit with ID: {audit.get('auditId')}")
+                self.log(f"✅ Created audit with ID: {audit.get('auditId')}")
                 return audit
             else:
-                print(f"❌ Failed to create audit: {response.status_code} - {response.text}")
+                self.log(f"❌ Failed to create audit: {response.status_code} - {response.text}")
                 return {"error": response.status_code, "message": response.text}
         except Exception as e:
-            print(f"❌ Error creating audit: {e}")
+            self.log(f"❌ Error creating audit: {e}")
             return {"error": "exception", "message": str(e)}
 
     def update_audit(self, audit_id: str, responses: Dict = None) -> Dict[str, Any]:
@@ -136,57 +167,65 @@ class AuditCreationTest:
                 update_data["responses"] = responses
                 update_data["criticalIssues"] = 3
                 update_data["status"] = "submitted"
-            response = self.session.put(audit_url, json=update_data)
+            response = self.request('PUT', audit_url, json=update_data)
             if response.status_code in (200, 201):
                 audit = response.json()
-                print(f"✅ Updated audit with ID: {audit.get('auditId')}")
+                self.log(f"✅ Updated audit with ID: {audit.get('auditId')}")
                 return audit
             else:
-                print(f"❌ Failed to update audit: {response.status_code} - {response.text}")
+                self.log(f"❌ Failed to update audit: {response.status_code} - {response.text}")
                 return {"error": response.status_code, "message": response.text}
         except Exception as e:
-            print(f"❌ Error updating audit: {e}")
+            self.log(f"❌ Error updating audit: {e}")
             return {"error": "exception", "message": str(e)}
 
     def delete_audit(self, audit_id: str):
         """Delete an audit by ID"""
         audit_url = f"{self.base_url}/api/v1/audits/{audit_id}"
-        response = self.session.delete(audit_url)
+        response = self.request('DELETE', audit_url)
         if response.status_code in (200, 204):
-            print(f"🗑️ Deleted audit {audit_id}")
-        else:
-            print(f"❌ Failed to delete audit {audit_id}: {response.status_code} - {response.text}")
+            self.log(f"🗑️ Deleted audit {audit_id}")
+            if self.audit_index:
+                self.audit_index.discard_audit(audit_id)
+            return True
+        self.log(f"❌ Failed to delete audit {audit_id}: {response.status_code} - {response.text}")
+        return False
 
     def delete_assignment(self, assignment_id: str):
         """Delete an assignment by ID"""
         assignment_url = f"{self.base_url}/api/v1/assignments/{assignment_id}"
-        response = self.session.delete(assignment_url)
+        response = self.request('DELETE', assignment_url)
         if response.status_code in (200, 204):
-            print(f"🗑️ Deleted assignment {assignment_id}")
-        else:
-            print(f"❌ Failed to delete assignment {assignment_id}: {response.status_code} - {response.text}")
+            self.log(f"🗑️ Deleted assignment {assignment_id}")
+            return True
+        self.log(f"❌ Failed to delete assignment {assignment_id}: {response.status_code} - {response.text}")
+        return False
+
+    def get_audit_by_assignment(self, assignment_id: str, use_index: bool = False) -> Dict[str, Any]:
+        """Get audit by assignment ID
 
-    def get_audit_by_assignment(self, assignment_id: str) -> Dict[str, Any]:
-        """Get audit by assignment ID"""
+        Pages through /api/v1/audits lazily and stops at the first match; with
+        use_index, an assignmentId -> audit summary index is built once and
+        reused. Both return the same AuditSummaryDto shape.
+        """
         try:
-            # First get all audits and filter by assignment_id
-            audit_url = f"{self.base_url}/api/v1/audits"
-            response = self.session.get(audit_url)
-            
-            if response.status_code == 200:
-                audits = response.json()
-                for audit in audits:
-                    if audit.get('assignmentId') == assignment_id:
-                        print(f"✅ Found audit with assignment ID: {assignment_id}")
-                        return audit
-                
-                print(f"❌ No audit found with assignment ID: {assignment_id}")
-                return None
+            if use_index:
+                if self.audit_index is None:
+                    self.audit_index = AuditIndex(self.session, self.base_url)
+                audit = self.audit_index.lookup(assignment_id)
             else:
-                print(f"❌ Failed to get audits: {response.status_code} - {response.text}")
-                return None
+                audit = find_audit(self.session, self.base_url, assignment=assignment_id)
+
+            if audit:
+                self.log(f"✅ Found audit with assignment ID: {assignment_id}")
+                return audit
+            self.log(f"❌ No audit found with assignment ID: {assignment_id}")
+            return None
+        except requests.HTTPError as e:
+            self.log(f"❌ Failed to get audits: {e.response.status_code} - {e.response.text}")
+            return None
         except Exception as e:
-            print(f"❌ Error getting audit: {e}")
+            self.log(f"❌ Error getting audit: {e}")
             return None
     
     def run_test(self):
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Worker-path test for fixture_generator.py against a stubbed database connection.
+
+Runs _init_worker / _copy_chunk in-process the way ProcessPoolExecutor
+would, with psycopg2.connect replaced, so no PostgreSQL server is needed.
+"""
+
+import sys
+import types
+import unittest
+from unittest import mock
+
+try:
+    import psycopg2  # noqa: F401
+except ImportError:
+    # Only psycopg2.connect is used (and patched) here
+    _psycopg2 = types.ModuleType('psycopg2')
+    _psycopg2.extras = types.ModuleType('psycopg2.extras')
+    _psycopg2.extras.RealDictCursor = object
+    sys.modules['psycopg2'] = _psycopg2
+    sys.modules['psycopg2.extras'] = _psycopg2.extras
+
+import fixture_generator
+from fixture_generator import TABLES, _copy_chunk, _init_worker, _tool_args
+from tools.db_query_tool import DatabaseQueryTool
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(sql)
+
+    def copy_expert(self, sql, stream, size=8192):
+        data = b''
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            data += chunk
+        self.connection.copies.append((sql, data))
+
+
+class FakeConnection:
+    def __init__(self, **params):
+        self.params = params
+        self.statements = []
+        self.copies = []
+        self.commits = 0
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class WorkerTest(unittest.TestCase):
+    def setUp(self):
+        self.tool = DatabaseQueryTool(host='db', port=5433, database='audits', username='loader', password='secret')
+        patcher = mock.patch('tools.db_query_tool.psycopg2.connect', side_effect=FakeConnection, create=True)
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(fixture_generator._worker.clear)
+
+    def test_worker_connects_with_the_tool_settings(self):
+        _init_worker(_tool_args(self.tool), dict(seed=3, organisations=5, users=0, audits=0), {}, True)
+        connection = fixture_generator._worker['tool'].connection
+        self.assertEqual(connection.params, self.tool.connection_params)
+        self.assertEqual(connection.statements, ["SET session_replication_role = replica"])
+
+    def test_copy_chunk_streams_and_commits_the_rows(self):
+        names = list(TABLES['organisation'][2])
+        columns = {'organisation': (names, list(range(len(names))))}
+        _init_worker(_tool_args(self.tool), dict(seed=3, organisations=5, users=0, audits=0), columns, False)
+
+        table, rows, written, _ = _copy_chunk('organisation', 0, 5)
+
+        connection = fixture_generator._worker['tool'].connection
+        sql, data = connection.copies[0]
+        self.assertEqual((table, rows), ('organisation', 5))
+        self.assertEqual(sql, f"COPY organisation ({', '.join(names)}) FROM STDIN")
+        self.assertEqual(written, len(data))
+        self.assertEqual(len(data.splitlines()), 5)
+        self.assertEqual(connection.commits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
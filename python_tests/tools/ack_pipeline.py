@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Coalesced delivery-acknowledgement pipeline for the WebSocket tools.
+
+The receive loop only puts notification IDs on a bounded queue; a sender
+task drains it and writes several AcknowledgeDelivery invocation records
+per WebSocket frame, waiting at most ``max_delay`` for a batch to fill. When
+the queue is full the receive loop waits (backpressure) instead of letting
+unacknowledged notifications pile up in memory; if the sender task has died,
+submit() raises its exception rather than waiting forever. Sent IDs awaiting
+DeliveryAcknowledged are forgotten after ``confirm_timeout`` seconds or
+beyond ``max_awaiting`` entries and counted as expired.
+"""
+
+import asyncio
+import time
+
+
+class AckPipeline:
+    """Bounded queue plus a sender task that batches AcknowledgeDelivery invocations."""
+
+    def __init__(self, encode, max_batch: int = 50, max_delay: float = 0.05, max_queue: int = 1000,
+                 on_sent=None, max_awaiting: int = 100000, confirm_timeout: float = 300.0):
+        # encode(target, arguments) -> framed record (str for JSON, bytes for MessagePack)
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.on_sent = on_sent
+        self.max_awaiting = max_awaiting
+        self.confirm_timeout = confirm_timeout
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.submitted = 0
+        self.sent = 0
+        self.frames = 0
+        self.confirmed = 0
+        self.unmatched = 0
+        self.expired = 0
+        self.backpressure_waits = 0
+        self.max_queue_wait = 0.0
+        # notification ID -> send time, oldest first
+        self._awaiting = {}
+        self._retry = []
+        self._sender = None
+
+    def _check_sender(self):
+        """Raise if the sender task has finished, since nothing would drain the queue."""
+        sender = self._sender
+        if sender is None or not sender.done():
+            return
+        if sender.cancelled():
+            raise RuntimeError("Acknowledgement sender was cancelled")
+        raise sender.exception() or RuntimeError("Acknowledgement sender stopped")
+
+    async def submit(self, notification_id: str):
+        """Queue an acknowledgement; waits while the queue is full, unless the sender task has died."""
+        item = (notification_id, time.perf_counter())
+        if self.queue.full():
+            self.backpressure_waits += 1
+            self._check_sender()
+            put = asyncio.ensure_future(self.queue.put(item))
+            waiting = {put} if self._sender is None else {put, self._sender}
+            try:
+                await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                queued = put.done()
+                if not queued:
+                    put.cancel()
+            if not queued:
+                self._check_sender()
+        else:
+            self.queue.put_nowait(item)
+        self.submitted += 1
+
+    def confirm(self, notification_id: str) -> bool:
+        """Record a DeliveryAcknowledged; returns False if it matches no sent acknowledgement."""
+        if self._awaiting.pop(notification_id, None) is not None:
+            self.confirmed += 1
+            return True
+        self.unmatched += 1
+        return False
+
+    def _expire(self, now: float):
+        """Forget the oldest unconfirmed acknowledgements beyond the cap or the timeout."""
+        cutoff = now - self.confirm_timeout
+        while self._awaiting:
+            notification_id, sent_at = next(iter(self._awaiting.items()))
+            if len(self._awaiting) <= self.max_awaiting and sent_at > cutoff:
+                break
+            del self._awaiting[notification_id]
+            self.expired += 1
+
+    @property
+    def outstanding(self) -> int:
+        """Acknowledgements sent but not yet confirmed by the server."""
+        return len(self._awaiting)
+
+    async def _next_batch(self) -> list:
+        if self._retry:
+            batch, self._retry = self._retry, []
+            return batch
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        try:
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Connection ended while the batch was filling; keep what was taken
+            self._retry = batch
+            raise
+        return batch
+
+    def start(self, send, log_frame=None) -> asyncio.Task:
+        """Start the sender task for one connection; cancel the returned task when the connection ends."""
+        self._sender = asyncio.create_task(self.run(send, log_frame))
+        return self._sender
+
+    async def run(self, send, log_frame=None):
+        """Sender loop for one connection; cancel it when the connection ends.
+
+        A batch whose send fails is kept and sent first on the next connection.
+        """
+        self._sender = asyncio.current_task()
+        while True:
+            batch = await self._next_batch()
+            frame = self.encode("AcknowledgeDelivery", [batch[0][0]])
+            for notification_id, _ in batch[1:]:
+                frame += self.encode("AcknowledgeDelivery", [notification_id])
+            try:
+                await send(frame)
+            except BaseException:
+                self._retry = batch
+                raise
+
+            now = time.perf_counter()
+            self.frames += 1
+            self.sent += len(batch)
+            for notification_id, queued_at in batch:
+                # Re-insert so a re-sent ID moves to the young end
+                self._awaiting.pop(notification_id, None)
+                self._awaiting[notification_id] = now
+                self.max_queue_wait = max(self.max_queue_wait, now - queued_at)
+                if self.on_sent:
+                    self.on_sent(notification_id)
+            self._expire(now)
+            if log_frame:
+                log_frame(frame, len(batch))
+
+    def summary(self) -> str:
+        per_frame = self.sent / self.frames if self.frames else 0.0
+        return (f"acks queued {self.queue.qsize()}  sent {self.sent} in {self.frames} frames "
+                f"({per_frame:.1f}/frame)  confirmed {self.confirmed}  outstanding {self.outstanding}  "
+                f"expired {self.expired}  "
+                f"backpressure waits {self.backpressure_waits}  max queue wait {self.max_queue_wait * 1000:.1f}ms")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Lazy, filtered audit lookups for the API test scripts.
+
+iter_audits() walks /api/v1/audits page by page and parses each response
+body as it streams in, one audit at a time, so a lookup that matches early
+stops reading (and closes the connection) instead of downloading and
+parsing the whole collection. Auditor and organisation filters use the
+narrower /by-auditor and /by-organisation endpoints; every filter is also
+sent as a query parameter and re-checked on the client, so the same code
+works whether or not the server applies them.
+
+AuditIndex keeps assignmentId -> audit summary for a test run: built with
+one streaming pass, then reused for every lookup.
+"""
+
+import json
+
+DEFAULT_PAGE_SIZE = 500
+
+_decoder = json.JSONDecoder()
+
+# Characters that can continue a JSON number
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+# Filter name -> (AuditSummaryDto field, query parameter)
+FILTERS = {
+    'assignment': ('assignmentId', 'assignmentId'),
+    'auditor': ('auditorId', 'auditorId'),
+    'status': ('status', 'status'),
+    'organisation': ('organisationId', 'organisationId'),
+}
+
+
+def iter_json_array(chunks):
+    """Yield the items of a JSON array from an iterable of text chunks without loading it whole."""
+    buffer = ''
+    position = 0
+    chunks = iter(chunks)
+    started = False
+    exhausted = False
+
+    while True:
+        # Skip whitespace and separators before the next item
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError(f"Expected a JSON array, got {buffer[position]!r}")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Item continues in the next chunk (or the body is truncated)
+                if exhausted:
+                    raise
+            else:
+                # A number may continue in the next chunk: "1" + "2", or split at its "." or exponent
+                # ("1." + "5" decodes as 1 followed by ".5")
+                number = isinstance(item, (int, float)) and not isinstance(item, bool)
+                if exhausted or not number or (end < len(buffer) and buffer[end] not in _NUMBER_CHARS):
+                    yield item
+                    position = end
+                    continue
+        if exhausted:
+            raise ValueError("JSON array ended before its closing bracket")
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            continue
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def _matches(audit: dict, filters: dict) -> bool:
+    # GUIDs and status names compare case-insensitively
+    return all(str(audit.get(FILTERS[name][0]) or '').lower() == str(wanted).lower()
+               for name, wanted in filters.items())
+
+
+def _endpoint(base_url: str, filters: dict) -> str:
+    if 'auditor' in filters:
+        return f"{base_url}/api/v1/audits/by-auditor/{filters['auditor']}"
+    if 'organisation' in filters:
+        return f"{base_url}/api/v1/audits/by-organisation/{filters['organisation']}"
+    return f"{base_url}/api/v1/audits"
+
+
+def iter_audits(session, base_url: str, page_size: int = DEFAULT_PAGE_SIZE, chunk_size: int = 64 * 1024,
+                **filters):
+    """Yield audit summaries matching ``filters`` (assignment, auditor, status, organisation), lazily.
+
+    Raises requests.HTTPError for a failed page. Stop iterating at any
+    point to stop the download.
+    """
+    unknown = set(filters) - set(FILTERS)
+    if unknown:
+        raise TypeError(f"Unknown audit filter(s): {', '.join(sorted(unknown))}")
+    filters = {name: value for name, value in filters.items() if value is not None}
+    url = _endpoint(base_url, filters)
+    params = {FILTERS[name][1]: value for name, value in filters.items()}
+    params['pageSize'] = page_size
+
+    page = 1
+    first_id = None
+    while True:
+        params['page'] = page
+        with session.get(url, params=params, stream=True) as response:
+            response.raise_for_status()
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            count = 0
+            for audit in iter_json_array(response.iter_content(chunk_size, decode_unicode=True)):
+                count += 1
+                if count == 1:
+                    if page == 1:
+                        first_id = audit.get('auditId')
+                    elif audit.get('auditId') == first_id:
+                        # Same first row as page 1: the server ignores paging and already sent everything
+                        return
+                if _matches(audit, filters):
+                    yield audit
+        # A short page is the last one; a long one means the server returned the full, unpaged list
+        if count != page_size:
+            return
+        page += 1
+
+
+def find_audit(session, base_url: str, **filters):
+    """First audit matching ``filters``, or None; stops reading as soon as it is found."""
+    return next(iter_audits(session, base_url, **filters), None)
+
+
+class AuditIndex:
+    """assignmentId -> audit summary map built once per test run and reused across lookups.
+
+    Lookups return the same AuditSummaryDto find_audit() does, so callers
+    get the same shape with or without the index.
+
+    Misses fall back to a streaming lookup (the audit may have been created
+    after the index was built) and are added to the index.
+    """
+
+    def __init__(self, session, base_url: str, page_size: int = DEFAULT_PAGE_SIZE, **filters):
+        self.session = session
+        self.base_url = base_url
+        self.page_size = page_size
+        self.filters = filters
+        self.audits = None
+        self.hits = 0
+        self.misses = 0
+
+    def build(self):
+        """Stream every audit once, keeping the first summary per assignment."""
+        self.audits = {}
+        for audit in iter_audits(self.session, self.base_url, self.page_size, **self.filters):
+            if audit.get('assignmentId'):
+                self.audits.setdefault(audit['assignmentId'].lower(), audit)
+        return self
+
+    def lookup(self, assignment_id: str):
+        """Audit summary for ``assignment_id``, or None."""
+        if self.audits is None:
+            self.build()
+        key = assignment_id.lower()
+        audit = self.audits.get(key)
+        if audit:
+            self.hits += 1
+            return audit
+        self.misses += 1
+        audit = find_audit(self.session, self.base_url, assignment=assignment_id, page_size=self.page_size,
+                           **self.filters)
+        if audit:
+            self.audits[key] = audit
+        return audit
+
+    def discard_audit(self, audit_id: str):
+        """Forget a deleted audit so later lookups do not return it."""
+        if self.audits is not None:
+            for key in [key for key, audit in self.audits.items() if audit.get('auditId') == audit_id]:
+                del self.audits[key]
+
+    def __len__(self):
+        return len(self.audits or {})
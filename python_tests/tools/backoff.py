@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Reconnect backoff strategies for the WebSocket tools.
+
+  exponential  - base * factor^n capped at ``cap`` (the listener's original
+                 2s * 1.5^n / 30s schedule); every client retries in lockstep
+  full         - uniform(0, exponential delay), "full jitter"
+  decorrelated - min(cap, uniform(base, previous * 3)), "decorrelated jitter"
+"""
+
+import random
+
+STRATEGIES = ('exponential', 'full', 'decorrelated')
+
+
+class Backoff:
+    """Delay schedule for consecutive reconnect attempts."""
+
+    def __init__(self, strategy: str = 'exponential', base: float = 2.0, factor: float = 1.5,
+                 cap: float = 30.0, rng: random.Random = None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown backoff strategy '{strategy}' (choose from {', '.join(STRATEGIES)})")
+        self.strategy = strategy
+        self.base = base
+        self.factor = factor
+        self.cap = cap
+        self.attempt = 0
+        self._previous = base
+        self._rng = rng or random.Random()
+
+    def next(self) -> float:
+        """Delay in seconds before the next attempt."""
+        exponential = min(self.cap, self.base * self.factor ** self.attempt)
+        self.attempt += 1
+        if self.strategy == 'full':
+            return self._rng.uniform(0, exponential)
+        if self.strategy == 'decorrelated':
+            self._previous = min(self.cap, self._rng.uniform(self.base, self._previous * 3))
+            return self._previous
+        return exponential
+
+    def reset(self):
+        """Start over after a successful connection."""
+        self.attempt = 0
+        self._previous = self.base
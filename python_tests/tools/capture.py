@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+WebSocket session capture format.
+
+The listener's JSONL log doubles as the capture: every frame is one record
+
+    {"ts": 1752122585.123, "kind": "recv"|"send", "conn": "c1", "raw": "<frame>"}
+
+with "raw_b64" instead of "raw" for binary (MessagePack) frames, and
+optional "n" (message number) and "target" fields. Listener log lines are
+"event" records ({"ts", "kind": "event", "msg"}); replay ignores them, and
+read_capture(path, events=True) yields them for analysis.
+
+read_capture() also imports the older free-text dumps
+(python_tests/websocket_messages.log, logs/websocket_messages_*.log) by
+picking up their "Raw message:" lines as received frames, so those sessions
+can be replayed too, at one-second (or millisecond) timestamp resolution.
+"""
+
+import asyncio
+import base64
+import json
+import re
+import time
+from collections import namedtuple
+from datetime import datetime
+
+Frame = namedtuple('Frame', 'ts conn direction payload target')
+
+RECV = 'recv'
+SEND = 'send'
+EVENT = 'event'
+
+# "2025-07-10 10:46:14 - msg" and "2025-07-09 13:14:50,272 - INFO - msg"
+_LEGACY_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:,(\d{3}))? - (?:[A-Z]+ - )?(.*)$')
+_LEGACY_CONNECT = ('Attempting connection', 'Connecting to SignalR hub')
+
+
+def frame_record(conn: str, direction: str, raw, ts: float = None, **extra) -> dict:
+    """Build one capture record for a frame."""
+    record = {"ts": time.time() if ts is None else ts, "kind": direction, "conn": conn}
+    if isinstance(raw, bytes):
+        record["raw_b64"] = base64.b64encode(raw).decode("ascii")
+    else:
+        record["raw"] = raw
+    for key, value in extra.items():
+        if value is not None:
+            record[key] = value
+    return record
+
+
+def _from_record(record: dict, events: bool):
+    if events and record.get('kind') == EVENT:
+        return Frame(record['ts'], record.get('conn'), EVENT, record.get('msg', ''), None)
+    if record.get('kind') not in (RECV, SEND):
+        return None
+    if 'raw_b64' in record:
+        payload = base64.b64decode(record['raw_b64'])
+    else:
+        payload = record.get('raw', '')
+    return Frame(record['ts'], record.get('conn', 'c0'), record['kind'], payload, record.get('target'))
+
+
+def _read_legacy(lines, events: bool):
+    conn = 0
+    last_stamp, base = None, 0.0
+    for line in lines:
+        match = _LEGACY_LINE.match(line.rstrip('\n'))
+        if not match:
+            continue
+        stamp, millis, message = match.groups()
+        if stamp != last_stamp:
+            # strptime dominates on large logs; consecutive lines mostly share the second
+            last_stamp, base = stamp, datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S').timestamp()
+        ts = base + (int(millis) / 1000 if millis else 0)
+        if message.startswith(_LEGACY_CONNECT):
+            conn += 1
+        elif message.startswith('Raw message: '):
+            raw = message[len('Raw message: '):]
+            # The old dumps stripped the record separator; restore it so frames replay as sent
+            yield Frame(ts, f"c{conn}", RECV, raw.rstrip('\u001e') + '\u001e', None)
+            continue
+        if events and not message.startswith('==='):
+            yield Frame(ts, f"c{conn}", EVENT, message, None)
+
+
+def read_capture(path: str, events: bool = False):
+    """Yield the frames in a capture (JSONL) or legacy text log, in file order.
+
+    Lines are streamed, so memory use does not grow with the file size. With
+    ``events`` the listener's log lines are yielded too, as EVENT frames
+    whose payload is the message text.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.readline()
+        f.seek(0)
+        if first.startswith('{'):
+            for line in f:
+                try:
+                    frame = _from_record(json.loads(line), events)
+                except (ValueError, KeyError):
+                    continue
+                if frame:
+                    yield frame
+        else:
+            yield from _read_legacy(f, events)
+
+
+def load_frames(paths, direction: str = None) -> list:
+    """Read several captures, keep one direction (or both) and sort by timestamp.
+
+    Connection IDs are prefixed with the file index when several files are
+    given, so sessions from different captures stay apart.
+    """
+    frames = []
+    for index, path in enumerate(paths):
+        for frame in read_capture(path):
+            if direction is None or frame.direction == direction:
+                frames.append(frame._replace(conn=f"{index}:{frame.conn}") if len(paths) > 1 else frame)
+    frames.sort(key=lambda frame: frame.ts)
+    return frames
+
+
+def parse_speed(value: str) -> float:
+    """'1', '10', '0.5' or 'max' (returned as 0: no pacing)."""
+    if value == 'max':
+        return 0.0
+    speed = float(value.rstrip('x'))
+    if speed <= 0:
+        raise ValueError("speed must be positive or 'max'")
+    return speed
+
+
+async def paced(frames, speed: float, origin: float = None, started: float = None):
+    """Yield ``(frame, lag)`` as each frame falls due at ``speed`` x the captured pace.
+
+    ``origin`` is the capture timestamp that maps to ``started`` (a
+    time.perf_counter() value); lag is how late the frame was released.
+    """
+    if not frames:
+        return
+    origin = frames[0].ts if origin is None else origin
+    started = time.perf_counter() if started is None else started
+    for frame in frames:
+        lag = 0.0
+        if speed:
+            due = started + (frame.ts - origin) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag = max(0.0, time.perf_counter() - due)
+        yield frame, lag
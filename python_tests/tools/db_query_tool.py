@@ -9,10 +9,75 @@ import psycopg2.extras
 import json
 import sys
 import argparse
+import itertools
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 import tabulate
 
+# Rows fetched per round trip by streamed queries
+DEFAULT_BATCH_SIZE = 1000
+
+# Statements a server-side (named) cursor can run; anything else falls back to a client cursor
+_STREAMABLE = ('SELECT', 'WITH', 'VALUES', 'TABLE')
+
+_cursor_names = itertools.count(1)
+
+
+class QueryStream:
+    """Rows of a query as plain tuples, fetched ``batch_size`` at a time.
+    
+    ``columns`` is the header shared by every row. Only one batch is held in
+    memory; the cursor is closed when the rows are exhausted or on close().
+    """
+    
+    def __init__(self, connection, query: str, params: tuple = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.count = 0
+        self.columns = []
+        self._batch = []
+        streamable = query.lstrip().split(None, 1)[0].upper() in _STREAMABLE if query.strip() else False
+        if streamable:
+            # Named cursor: the result set stays on the server until fetched
+            self.cursor = connection.cursor(name=f"query_stream_{next(_cursor_names)}")
+            self.cursor.itersize = batch_size
+        else:
+            self.cursor = connection.cursor()
+        try:
+            self.cursor.execute(query, params)
+            # A named cursor only describes its columns after the first fetch
+            self._batch = self.cursor.fetchmany(batch_size) if self.cursor.description or streamable else []
+            self.columns = [column[0] for column in self.cursor.description or []]
+        except Exception:
+            self.close(failed=True)
+            raise
+    
+    def __iter__(self):
+        try:
+            while self._batch:
+                batch, self._batch = self._batch, []
+                for row in batch:
+                    self.count += 1
+                    yield row
+                if len(batch) == self.batch_size:
+                    self._batch = self.cursor.fetchmany(self.batch_size)
+        finally:
+            self.close()
+    
+    def close(self, failed: bool = False):
+        if self.cursor is None:
+            return
+        try:
+            self.cursor.close()
+        finally:
+            self.cursor = None
+            # End the read transaction the named cursor lived in
+            if failed:
+                self.connection.rollback()
+            else:
+                self.connection.commit()
+
+
 class DatabaseQueryTool:
     """Tool for querying PostgreSQL database"""
     
@@ -60,12 +125,20 @@ class DatabaseQueryTool:
             else:
                 self.cursor.execute(query)
             
-            results = self.cursor.fetchall()
-            return [dict(row) for row in results]
+            # RealDictRow is already a dict; copying every row again doubles peak memory
+            return self.cursor.fetchall()
         except Exception as e:
             print(f"❌ Query execution failed: {e}")
             return []
     
+    def stream_query(self, query: str, params: tuple = None, batch_size: int = DEFAULT_BATCH_SIZE) -> QueryStream:
+        """Execute a query through a server-side cursor and return its rows as a lazy QueryStream"""
+        try:
+            return QueryStream(self.connection, query, params, batch_size)
+        except Exception as e:
+            print(f"❌ Query execution failed: {e}")
+            return None
+    
     def execute_update(self, query: str, params: tuple = None) -> int:
         """Execute an UPDATE/INSERT/DELETE query and return affected rows"""
         try:
@@ -114,6 +187,12 @@ class DatabaseQueryTool:
         query = f"SELECT * FROM {table_name} LIMIT %s OFFSET %s;"
         return self.execute_query(query, (limit, offset))
     
+    def stream_table_data(self, table_name: str, limit: int = 100, offset: int = 0,
+                          batch_size: int = DEFAULT_BATCH_SIZE) -> QueryStream:
+        """Stream data from a specific table (limit 0 streams every row)"""
+        query = f"SELECT * FROM {table_name} LIMIT %s OFFSET %s;"
+        return self.stream_query(query, (limit or None, offset), batch_size)
+    
     def count_table_rows(self, table_name: str) -> int:
         """Count total rows in a table"""
         query = f"SELECT COUNT(*) as count FROM {table_name};"
@@ -146,23 +225,36 @@ class DatabaseQueryTool:
         
         # Convert data to list of lists for tabulate
         headers = list(data[0].keys())
-        rows = []
-        
-        for row in data:
-            formatted_row = []
-            for key in headers:
-                value = row[key]
-                if isinstance(value, dict):
-                    formatted_row.append(json.dumps(value, indent=2)[:100] + "..." if len(str(value)) > 100 else json.dumps(value))
-                elif isinstance(value, datetime):
-                    formatted_row.append(value.strftime("%Y-%m-%d %H:%M:%S"))
-                else:
-                    formatted_row.append(str(value)[:100] + "..." if len(str(value)) > 100 else str(value))
-            rows.append(formatted_row)
+        rows = [[self.format_value(row[key]) for key in headers] for row in data]
         
         print(tabulate.tabulate(rows, headers=headers, tablefmt="grid"))
     
-    def interactive_mode(self):
+    @staticmethod
+    def format_value(value) -> str:
+        """Format a single value for table output"""
+        if isinstance(value, dict):
+            return json.dumps(value, indent=2)[:100] + "..." if len(str(value)) > 100 else json.dumps(value)
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        return str(value)[:100] + "..." if len(str(value)) > 100 else str(value)
+    
+    def print_stream(self, stream: QueryStream, title: str = "Query Results", page_size: int = DEFAULT_BATCH_SIZE):
+        """Print streamed rows one page at a time, so memory stays bounded for any result size"""
+        if stream is None:
+            return
+        print(f"\n📊 {title}")
+        print("=" * 80)
+        page = []
+        for row in stream:
+            page.append([self.format_value(value) for value in row])
+            if len(page) == page_size:
+                print(tabulate.tabulate(page, headers=stream.columns, tablefmt="grid"))
+                page = []
+        if page:
+            print(tabulate.tabulate(page, headers=stream.columns, tablefmt="grid"))
+        print(f"({stream.count} rows)" if stream.count else "No data found")
+    
+    def interactive_mode(self, batch_size: int = DEFAULT_BATCH_SIZE):
         """Interactive query mode"""
         print("\n🔍 Interactive Database Query Mode")
         print("Commands:")
@@ -199,8 +291,8 @@ class DatabaseQueryTool:
                 
                 elif command.lower().startswith('select '):
                     table_name = command[7:].strip()
-                    data = self.get_table_data(table_name, limit=10)
-                    self.print_table_data(data, f"Data from '{table_name}'")
+                    stream = self.stream_table_data(table_name, limit=10, batch_size=batch_size)
+                    self.print_stream(stream, f"Data from '{table_name}'", page_size=batch_size)
                 
                 elif command.lower().startswith('count '):
                     table_name = command[6:].strip()
@@ -210,8 +302,8 @@ class DatabaseQueryTool:
                 elif command.lower().startswith('sql '):
                     sql_query = command[4:].strip()
                     if sql_query.upper().startswith('SELECT'):
-                        results = self.execute_query(sql_query)
-                        self.print_table_data(results, "Custom Query Results")
+                        stream = self.stream_query(sql_query, batch_size=batch_size)
+                        self.print_stream(stream, "Custom Query Results", page_size=batch_size)
                     else:
                         affected = self.execute_update(sql_query)
                         print(f"✅ Query executed. {affected} rows affected.")
@@ -235,7 +327,9 @@ def main():
     parser.add_argument('--username', default='postgres', help='Database username')
     parser.add_argument('--password', default='123456', help='Database password')
     parser.add_argument('--table', help='Table to query')
-    parser.add_argument('--limit', type=int, default=100, help='Limit results')
+    parser.add_argument('--limit', type=int, default=100, help='Limit results (0 = all rows, streamed)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Rows fetched per round trip and printed per page for --table/--sql/select')
     parser.add_argument('--interactive', action='store_true', help='Interactive mode')
     parser.add_argument('--list-tables', action='store_true', help='List all tables')
     parser.add_argument('--stats', help='Show table statistics')
@@ -258,7 +352,7 @@ def main():
     
     try:
         if args.interactive:
-            db_tool.interactive_mode()
+            db_tool.interactive_mode(batch_size=args.batch_size)
         elif args.list_tables:
             tables = db_tool.list_tables()
             print(f"\n📋 Available tables ({len(tables)}):")
@@ -278,12 +372,12 @@ def main():
             if stats['sample_data']:
                 db_tool.print_table_data(stats['sample_data'], "Sample Data")
         elif args.table:
-            data = db_tool.get_table_data(args.table, limit=args.limit)
-            db_tool.print_table_data(data, f"Data from '{args.table}'")
+            stream = db_tool.stream_table_data(args.table, limit=args.limit, batch_size=args.batch_size)
+            db_tool.print_stream(stream, f"Data from '{args.table}'", page_size=args.batch_size)
         elif args.sql:
             if args.sql.upper().startswith('SELECT'):
-                results = db_tool.execute_query(args.sql)
-                db_tool.print_table_data(results, "Custom Query Results")
+                stream = db_tool.stream_query(args.sql, batch_size=args.batch_size)
+                db_tool.print_stream(stream, "Custom Query Results", page_size=args.batch_size)
             else:
                 affected = db_tool.execute_update(args.sql)
                 print(f"✅ Query executed. {affected} rows affected.")
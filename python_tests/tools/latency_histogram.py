@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Streaming latency histograms for the WebSocket tools.
+
+LatencyHistogram is HDR-style: values are counted in log-linear buckets
+(each power of two split into SUB_BUCKETS linear slots), so memory stays
+constant however many values are recorded and percentiles are accurate to
+within 1 / SUB_BUCKETS of the value.
+"""
+
+import re
+import time
+from datetime import datetime, timezone
+
+# Linear slots per power of two; 128 keeps the relative error under 1%
+SUB_BUCKETS = 128
+
+# Values are recorded in microseconds
+_UNIT = 1_000_000
+
+_FRACTION = re.compile(r'\.(\d+)')
+
+
+class LatencyHistogram:
+    """Constant-memory histogram of latencies in seconds."""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def _bucket(micros: int) -> int:
+        if micros < SUB_BUCKETS:
+            return micros
+        shift = micros.bit_length() - SUB_BUCKETS.bit_length()
+        return (shift + 1) * SUB_BUCKETS + (micros >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def _bucket_value(bucket: int) -> int:
+        """Upper bound (in microseconds) of the values counted in a bucket."""
+        if bucket < SUB_BUCKETS:
+            return bucket
+        shift = bucket // SUB_BUCKETS - 1
+        return ((bucket % SUB_BUCKETS + SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        # Negative values come from clock skew between client and server; clamp to zero
+        micros = max(0, int(seconds * _UNIT))
+        bucket = self._bucket(micros)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, pct: float):
+        """Value (in seconds) at or below which ``pct`` percent of recordings fall."""
+        if not self.count:
+            return None
+        rank = max(1, int(round(pct / 100 * self.count)))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self._bucket_value(bucket) / _UNIT, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self) -> str:
+        if not self.count:
+            return "no samples"
+        return (f"n={self.count:<6} p50 {format_ms(self.percentile(50))}  p95 {format_ms(self.percentile(95))}  "
+                f"p99 {format_ms(self.percentile(99))}  max {format_ms(self.max)}")
+
+
+def format_ms(seconds) -> str:
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:8.1f}ms"
+
+
+def parse_dotnet_timestamp(value):
+    """Parse a System.Text.Json DateTime (up to 7 fractional digits, Z/offset optional) as UTC."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        # Already decoded (MessagePack timestamp extension)
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    text = value.replace('Z', '+00:00')
+    text = _FRACTION.sub(lambda m: '.' + m.group(1)[:6].ljust(6, '0'), text, count=1)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    # Npgsql returns CreatedAt without a kind, but it is written in UTC
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class NotificationLatencyTracker:
+    """Per type/priority histograms for notification delivery and acknowledgement latency.
+
+    Metrics:
+      delivery   - client receive time minus the notification's created timestamp
+      sent       - client receive time minus sentAt, when the payload carries it
+      ack_rtt    - AcknowledgeDelivery sent until DeliveryAcknowledged received
+      end_to_end - acknowledgedAt minus created timestamp (both server clock)
+    """
+
+    METRICS = ('delivery', 'sent', 'ack_rtt', 'end_to_end')
+
+    def __init__(self, max_pending: int = 100000):
+        self.histograms = {}
+        self.pending = {}
+        self.max_pending = max_pending
+        self.unmatched_acks = 0
+
+    def _record(self, metric: str, key: tuple, seconds: float):
+        for group in (key, ('all', 'all')):
+            histogram = self.histograms.setdefault((metric,) + group, LatencyHistogram())
+            histogram.record(seconds)
+
+    def notification_received(self, notification: dict, received_at: datetime = None):
+        """Record delivery latency for a ReceiveNotification payload."""
+        received_at = received_at or datetime.now(timezone.utc)
+        key = (str(notification.get('type') or '?'), str(notification.get('priority') or '?'))
+        created = parse_dotnet_timestamp(notification.get('timestamp') or notification.get('createdAt'))
+        if created:
+            self._record('delivery', key, (received_at - created).total_seconds())
+        sent = parse_dotnet_timestamp(notification.get('sentAt'))
+        if sent:
+            self._record('sent', key, (received_at - sent).total_seconds())
+
+        notification_id = notification.get('notificationId')
+        if notification_id:
+            if len(self.pending) >= self.max_pending:
+                # Drop the oldest outstanding acknowledgement
+                self.pending.pop(next(iter(self.pending)))
+            self.pending[str(notification_id)] = (key, created, None)
+
+    def ack_sent(self, notification_id: str):
+        entry = self.pending.get(str(notification_id))
+        if entry:
+            self.pending[str(notification_id)] = (entry[0], entry[1], time.perf_counter())
+
+    def ack_confirmed(self, payload: dict):
+        """Record the round trip for a DeliveryAcknowledged payload."""
+        entry = self.pending.pop(str(payload.get('notificationId')), None)
+        if entry is None:
+            self.unmatched_acks += 1
+            return
+        key, created, ack_sent_at = entry
+        if ack_sent_at is not None:
+            self._record('ack_rtt', key, time.perf_counter() - ack_sent_at)
+        acknowledged = parse_dotnet_timestamp(payload.get('acknowledgedAt'))
+        if created and acknowledged:
+            self._record('end_to_end', key, (acknowledged - created).total_seconds())
+
+    def report(self, title: str = "Notification latency") -> str:
+        lines = [f"📈 {title}"]
+        for metric in self.METRICS:
+            rows = sorted((k, h) for k, h in self.histograms.items() if k[0] == metric)
+            if not rows:
+                continue
+            lines.append(f"  {metric}:")
+            # Overall first, then each type/priority
+            rows.sort(key=lambda row: row[0][1:] != ('all', 'all'))
+            for (_, notification_type, priority), histogram in rows:
+                label = 'all' if notification_type == 'all' else f"{notification_type}/{priority}"
+                lines.append(f"    {label:<28} {histogram.summary()}")
+        if len(lines) == 1:
+            lines.append("  no notifications received yet")
+        if self.pending:
+            lines.append(f"  awaiting acknowledgement: {len(self.pending)}")
+        return "\n".join(lines)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Buffered background log sink for the WebSocket tools.
+
+Records are handed to a queue without blocking and written by a background
+thread in batches, one compact JSON object per line. Files rotate by size
+and age into logs/websocket_messages_<timestamp>.log, so an asyncio receive
+loop never waits on disk I/O.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_LOG_DIR = "logs"
+DEFAULT_PREFIX = "websocket_messages"
+
+_STOP = object()
+
+
+class BufferedLogSink:
+    """Queue-backed JSONL writer with batched flushes and size/time rotation."""
+
+    def __init__(self,
+                 directory: str = DEFAULT_LOG_DIR,
+                 prefix: str = DEFAULT_PREFIX,
+                 max_bytes: int = 50 * 1024 * 1024,
+                 max_age: float = 3600.0,
+                 flush_interval: float = 0.5,
+                 max_batch: int = 1000,
+                 max_queue: int = 100000):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.dropped = 0
+        self.written = 0
+        self.path = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._opened_at = 0.0
+        self._thread = None
+
+    def start(self):
+        """Open the first log file and start the writer thread."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._open()
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, record: dict):
+        """Queue a record without blocking; records are dropped (and counted) if the queue is full."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """Flush everything queued so far and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _open(self):
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{self.prefix}_{stamp}.log")
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{self.prefix}_{stamp}_{suffix}.log")
+            suffix += 1
+        self._file = open(path, "a", encoding="utf-8")
+        self._opened_at = time.monotonic()
+        self.path = path
+
+    def _rotate_if_needed(self):
+        # The next file is opened lazily, so rotation never leaves an empty file behind
+        if self._file is None:
+            return
+        if self._file.tell() >= self.max_bytes or time.monotonic() - self._opened_at >= self.max_age:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._rotate_if_needed()
+                continue
+
+            batch = [first]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if _STOP in batch:
+                stopping = True
+                batch = [record for record in batch if record is not _STOP]
+
+            if batch:
+                lines = [json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+                         for record in batch]
+                try:
+                    if self._file is None:
+                        self._open()
+                    self._file.write("\n".join(lines) + "\n")
+                    self._file.flush()
+                    self.written += len(batch)
+                    self._rotate_if_needed()
+                except Exception as e:
+                    print(f"Error writing to log file: {e}")
+
+        if self._file is not None:
+            self._file.close()
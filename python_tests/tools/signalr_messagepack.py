@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+SignalR MessagePack hub protocol codec.
+
+After the (still JSON) handshake every message is a MessagePack array
+prefixed with its length as a base-128 varint; one WebSocket frame may carry
+several messages. Decoded messages are returned in the same dict shape as
+the JSON protocol ({"type", "target", "arguments", ...}) so callers handle
+both protocols with the same code.
+
+The server must register the protocol with AddMessagePackProtocol().
+"""
+
+import msgpack
+
+from tools.signalr_protocol import CLOSE, COMPLETION, INVOCATION, PING, RECORD_SEPARATOR
+
+HANDSHAKE = '{"protocol":"messagepack","version":1}' + RECORD_SEPARATOR
+
+
+def encode_varint(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        if length:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data, offset: int) -> tuple:
+    """Return ``(length, offset after the prefix)``; length is None if the prefix is incomplete."""
+    length = 0
+    shift = 0
+    while offset < len(data):
+        byte = data[offset]
+        offset += 1
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return length, offset
+        shift += 7
+        if shift > 28:
+            raise ValueError("MessagePack length prefix longer than 5 bytes")
+    return None, offset
+
+
+def split_handshake(raw) -> tuple:
+    """Split the handshake response from any binary messages sent in the same frame."""
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    end = raw.index(RECORD_SEPARATOR.encode())
+    return raw[:end].decode('utf-8'), raw[end + 1:]
+
+
+def _to_message(item: list) -> dict:
+    message_type = item[0]
+    if message_type == INVOCATION:
+        # [1, headers, invocationId, target, arguments, streamIds?]
+        return {"type": INVOCATION, "invocationId": item[2], "target": item[3], "arguments": item[4]}
+    if message_type == COMPLETION:
+        # [3, headers, invocationId, resultKind, result?] with resultKind 1=error, 2=void, 3=result
+        message = {"type": COMPLETION, "invocationId": item[2]}
+        if item[3] == 1:
+            message["error"] = item[4]
+        elif item[3] == 3:
+            message["result"] = item[4]
+        return message
+    if message_type == CLOSE:
+        return {"type": CLOSE, "error": item[1] if len(item) > 1 else None}
+    return {"type": message_type}
+
+
+def _unpack(payload) -> list:
+    # .NET DateTime values arrive as the timestamp extension; decode them as aware UTC datetimes
+    return msgpack.unpackb(payload, raw=False, timestamp=3, strict_map_key=False)
+
+
+def decode_frame(data: bytes) -> list:
+    """Decode every length-prefixed message in a complete binary frame."""
+    messages = []
+    offset = 0
+    view = memoryview(data)
+    while offset < len(data):
+        length, start = decode_varint(data, offset)
+        if length is None or start + length > len(data):
+            raise ValueError("Truncated MessagePack frame")
+        messages.append(_to_message(_unpack(view[start:start + length])))
+        offset = start + length
+    return messages
+
+
+class FrameDecoder:
+    """Incremental decoder for binary hub frames; keeps a partial message across frames."""
+
+    def __init__(self):
+        self._buffer = b''
+
+    def feed(self, data: bytes) -> list:
+        buffer = self._buffer + data if self._buffer else data
+        view = memoryview(buffer)
+        messages = []
+        offset = 0
+        while offset < len(buffer):
+            length, start = decode_varint(buffer, offset)
+            if length is None or start + length > len(buffer):
+                break
+            messages.append(_to_message(_unpack(view[start:start + length])))
+            offset = start + length
+        self._buffer = bytes(view[offset:])
+        return messages
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def reset(self):
+        self._buffer = b''
+
+
+def _pack(item: list) -> bytes:
+    body = msgpack.packb(item, use_bin_type=True, datetime=True)
+    return encode_varint(len(body)) + body
+
+
+def encode_invocation(target: str, arguments: list, invocation_id: str = None) -> bytes:
+    """Encode a hub invocation as a single length-prefixed message."""
+    return _pack([INVOCATION, {}, invocation_id, target, arguments, []])
+
+
+def encode_completion(invocation_id: str, result=None, error: str = None) -> bytes:
+    if error:
+        return _pack([COMPLETION, {}, invocation_id, 1, error])
+    if result is not None:
+        return _pack([COMPLETION, {}, invocation_id, 3, result])
+    return _pack([COMPLETION, {}, invocation_id, 2])
+
+
+def encode_ping() -> bytes:
+    return _pack([PING])
+
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+SignalR JSON hub protocol helpers shared by the WebSocket tools.
+
+Frames carry one or more JSON records, each terminated by the 0x1E record
+separator. See WEBSOCKET_PROTOCOL.md for the NotificationHub methods.
+"""
+
+import base64
+import json
+import uuid
+from urllib.parse import urlencode
+
+RECORD_SEPARATOR = '\u001e'
+
+# Handshake frame sent first on every connection
+HANDSHAKE = '{"protocol":"json","version":1}' + RECORD_SEPARATOR
+
+# Hub message types
+INVOCATION = 1
+COMPLETION = 3
+PING = 6
+CLOSE = 7
+
+DEFAULT_HUB_URL = "ws://localhost:8080/hubs/notifications"
+
+_decoder = json.JSONDecoder()
+
+
+def hub_url(base_url: str, token: str) -> str:
+    """Build the hub URL with the JWT passed as access_token."""
+    separator = '&' if '?' in base_url else '?'
+    return f"{base_url}{separator}{urlencode({'access_token': token})}"
+
+
+def encode_invocation(target: str, arguments: list, invocation_id: str = None) -> str:
+    """Encode a hub invocation as a single framed record."""
+    message = {"type": INVOCATION, "target": target, "arguments": arguments}
+    if invocation_id:
+        message["invocationId"] = invocation_id
+    return json.dumps(message, separators=(',', ':')) + RECORD_SEPARATOR
+
+
+def encode_completion(invocation_id: str, result=None, error: str = None) -> str:
+    """Encode the completion the server sends for an invocation that carried an invocationId."""
+    message = {"type": COMPLETION, "invocationId": invocation_id}
+    if error:
+        message["error"] = error
+    elif result is not None:
+        message["result"] = result
+    return json.dumps(message, separators=(',', ':')) + RECORD_SEPARATOR
+
+
+def encode_ping() -> str:
+    return '{"type":6}' + RECORD_SEPARATOR
+
+
+def new_invocation_id() -> str:
+    return str(uuid.uuid4())
+
+
+def decode_frame(raw: str) -> list:
+    """Split a complete frame into its parsed records."""
+    return [json.loads(record) for record in raw.split(RECORD_SEPARATOR) if record]
+
+
+class FrameDecoder:
+    """Incremental decoder for JSON hub frames.
+
+    A frame may hold several records, and a record may be split across
+    frames; the unterminated tail is kept until the next feed(). Records are
+    parsed in place with JSONDecoder.raw_decode, so a burst frame is never
+    split into per-record substrings. A malformed record is counted and
+    skipped so it cannot take the rest of the frame down with it.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self.malformed = 0
+        self.last_error = None
+
+    def feed(self, raw: str) -> list:
+        """Return every complete record in ``raw`` (plus any tail carried over)."""
+        buffer = self._buffer + raw if self._buffer else raw
+        records = []
+        start = 0
+        while True:
+            end = buffer.find(RECORD_SEPARATOR, start)
+            if end == -1:
+                break
+            if end > start:
+                try:
+                    record, stop = _decoder.raw_decode(buffer, start)
+                    if stop != end:
+                        raise json.JSONDecodeError("Extra data before record separator", buffer, stop)
+                    records.append(record)
+                except json.JSONDecodeError as e:
+                    self.malformed += 1
+                    self.last_error = e
+            start = end + 1
+        self._buffer = buffer[start:]
+        return records
+
+    @property
+    def pending(self) -> int:
+        """Characters of an incomplete record waiting for the next frame."""
+        return len(self._buffer)
+
+    def reset(self):
+        self._buffer = ''
+
+
+def parse_handshake_response(raw: str):
+    """Return the handshake error text, or None when the server accepted the handshake."""
+    records = decode_frame(raw)
+    if not records:
+        return "empty handshake response"
+    return records[0].get('error')
+
+
+def jwt_claims(token: str) -> dict:
+    """Decode the JWT payload without verifying it (used to read nameid / organisation_id)."""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError):
+        return {}
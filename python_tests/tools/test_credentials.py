@@ -5,6 +5,23 @@ Test credentials module for loading authentication credentials
 
 import json
 import os
+import threading
+
+CREDENTIALS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_credentials.json")
+
+# Parsed credentials file, reloaded only when its modification time changes
+_cache = {"mtime": None, "credentials": None}
+_cache_lock = threading.Lock()
+
+def _load_credentials():
+    """Return the parsed credentials file, reading it only on first use or after it changes"""
+    mtime = os.path.getmtime(CREDENTIALS_FILE)
+    with _cache_lock:
+        if _cache["mtime"] != mtime:
+            with open(CREDENTIALS_FILE, 'r') as f:
+                _cache["credentials"] = json.load(f)
+            _cache["mtime"] = mtime
+        return _cache["credentials"]
 
 def get_test_credentials(role="manager"):
     """
@@ -17,18 +34,13 @@ def get_test_credentials(role="manager"):
         dict: Credentials for the specified role
     """
     try:
-        # Get the directory where this script is located
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        credentials_file = os.path.join(script_dir, "test_credentials.json")
-        
-        with open(credentials_file, 'r') as f:
-            credentials = json.load(f)
+        credentials = _load_credentials()
         
         if role in credentials:
-            return credentials[role]
+            return dict(credentials[role])
         else:
             # Fallback to manager if role not found
-            return credentials.get("manager", {})
+            return dict(credentials.get("manager", {}))
             
     except Exception as e:
         print(f"Error loading credentials: {e}")
@@ -46,12 +58,7 @@ def get_all_credentials():
         dict: All credentials
     """
     try:
-        # Get the directory where this script is located
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        credentials_file = os.path.join(script_dir, "test_credentials.json")
-        
-        with open(credentials_file, 'r') as f:
-            return json.load(f)
+        return {role: dict(creds) for role, creds in _load_credentials().items()}
             
     except Exception as e:
         print(f"Error loading credentials: {e}")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Shared JWT cache for the API test scripts and load harnesses.
+
+Tokens are keyed by API URL, role and username and reused until
+``refresh_margin`` seconds before the JWT's ``exp``, so 500 virtual users
+of one role need one /api/v1/auth/login instead of 500. The cache is:
+
+  thread-safe   - one login per identity even when many threads ask at once
+  process-safe  - tokens are shared through a JSON file guarded by a file
+                  lock, so parallel harness processes reuse them too
+                  (AUDITSYSTEM_TOKEN_CACHE sets the path, empty = in memory)
+
+start_refresher() renews tokens in the background ``refresh_ahead`` seconds
+before they expire, so long soak tests never stall on a login burst.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+from tools import test_credentials
+from tools.signalr_protocol import jwt_claims
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "auditsystem_test_tokens.json")
+
+# Lifetime assumed for a token without an exp claim
+DEFAULT_TTL = 300.0
+
+
+class LoginError(Exception):
+    """The API refused the login or returned no token."""
+
+
+class _FileLock:
+    """Exclusive lock on ``path + '.lock'`` (a no-op where neither fcntl nor msvcrt exists)."""
+
+    def __init__(self, path: str):
+        self.path = path + '.lock'
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+')
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt:
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10 seconds; keep waiting
+                    continue
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        elif msvcrt:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+
+
+def token_expiry(token: str) -> float:
+    """Unix time the JWT expires (its exp claim), or DEFAULT_TTL from now if it has none."""
+    exp = jwt_claims(token).get('exp')
+    return float(exp) if exp else time.time() + DEFAULT_TTL
+
+
+class TokenCache:
+    """Role/username -> JWT cache that logs in only when a token is missing or about to expire."""
+
+    def __init__(self, base_url: str = "http://localhost:8080", path: str = None,
+                 refresh_margin: float = 60.0, refresh_ahead: float = 300.0, timeout: float = 10.0):
+        self.base_url = base_url
+        if path is None:
+            path = os.getenv('AUDITSYSTEM_TOKEN_CACHE', DEFAULT_CACHE_PATH)
+        self.path = path or None
+        self.refresh_margin = refresh_margin
+        self.refresh_ahead = refresh_ahead
+        self.timeout = timeout
+        self.logins = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refresher = None
+        self._stop = threading.Event()
+
+    def _key(self, role: str, username: str) -> str:
+        return f"{self.base_url}|{role}|{username}"
+
+    def _valid(self, entry, margin: float) -> bool:
+        if not entry:
+            return False
+        # Short-lived tokens are still reused for the first half of their lifetime
+        lifetime = entry['expires'] - entry.get('issued', entry['expires'])
+        return entry['expires'] - min(margin, lifetime / 2) > time.time()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _read_file(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_file(self, key: str, entry: dict):
+        """Store ``entry`` under ``key`` (None removes it); caller holds the file lock."""
+        shared = self._read_file()
+        now = time.time()
+        shared = {k: v for k, v in shared.items() if v.get('expires', 0) > now and k != key}
+        if entry is not None:
+            shared[key] = entry
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        # Tokens are credentials: keep the file private to this user
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(shared, f)
+        os.replace(temporary, self.path)
+
+    def _login(self, creds: dict) -> dict:
+        response = requests.post(f"{self.base_url}/api/v1/auth/login",
+                                 json={"username": creds["username"], "password": creds["password"]},
+                                 timeout=self.timeout)
+        token = response.json().get('token') if response.status_code == 200 else None
+        if not token:
+            raise LoginError(f"Login failed for {creds['username']} with status {response.status_code}: "
+                             f"{response.text}")
+        self.logins += 1
+        return {"token": token, "expires": token_expiry(token), "issued": time.time()}
+
+    def _fetch(self, role: str, creds: dict, margin: float, force: bool = False) -> str:
+        """Slow path: take the identity's locks, then reuse a shared token or log in."""
+        key = self._key(role, creds["username"])
+        with self._key_lock(key):
+            entry = self._tokens.get(key)
+            if not force and self._valid(entry, margin):
+                self.hits += 1
+                return entry['token']
+            if not self.path:
+                entry = self._login(creds)
+            else:
+                with _FileLock(self.path):
+                    shared = self._read_file().get(key)
+                    # Another process may have logged in (or refreshed) while we waited
+                    if self._valid(shared, margin) and (not force or shared['token'] != (entry or {}).get('token')):
+                        entry = shared
+                        self.shared_hits += 1
+                    else:
+                        entry = self._login(creds)
+                        self._write_file(key, entry)
+            self._tokens[key] = entry
+            return entry['token']
+
+    def get_token(self, role: str = "manager", username: str = None) -> str:
+        """JWT for the test credentials of ``role`` (raises LoginError if the login fails)."""
+        creds = test_credentials.get_test_credentials(role)
+        if username and username != creds.get("username"):
+            raise LoginError(f"No test credentials for {username} ({role})")
+        entry = self._tokens.get(self._key(role, creds["username"]))
+        if self._valid(entry, self.refresh_margin):
+            self.hits += 1
+            return entry['token']
+        return self._fetch(role, creds, self.refresh_margin)
+
+    def invalidate(self, role: str = "manager", token: str = None):
+        """Forget the token for ``role`` (e.g. after a 401), in memory and in the shared file.
+
+        With ``token`` only that token is dropped, so a fresh one another
+        thread or process already fetched after the same 401 is kept.
+        """
+        creds = test_credentials.get_test_credentials(role)
+        key = self._key(role, creds["username"])
+        with self._key_lock(key):
+            entry = self._tokens.get(key)
+            if entry and (token is None or entry['token'] == token):
+                del self._tokens[key]
+            if self.path:
+                with _FileLock(self.path):
+                    shared = self._read_file().get(key)
+                    if shared and (token is None or shared['token'] == token):
+                        self._write_file(key, None)
+
+    def refresh_due(self):
+        """Renew every cached token that expires within ``refresh_ahead`` seconds."""
+        for key, entry in list(self._tokens.items()):
+            if self._valid(entry, self.refresh_ahead):
+                continue
+            _, role, username = key.split('|', 2)
+            creds = test_credentials.get_test_credentials(role)
+            if creds.get("username") != username:
+                continue
+            try:
+                self._fetch(role, creds, self.refresh_ahead, force=True)
+            except (LoginError, requests.RequestException) as e:
+                print(f"⚠️ Background token refresh failed for {username}: {e}")
+
+    def start_refresher(self, interval: float = 30.0):
+        """Refresh tokens proactively from a daemon thread every ``interval`` seconds."""
+        if self._refresher:
+            return self
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.refresh_due()
+
+        self._refresher = threading.Thread(target=run, name="token-refresher", daemon=True)
+        self._refresher.start()
+        return self
+
+    def stop_refresher(self):
+        self._stop.set()
+        if self._refresher:
+            self._refresher.join()
+            self._refresher = None
+
+    def summary(self) -> str:
+        return (f"🔑 tokens: {self.logins} logins, {self.hits} cache hits, "
+                f"{self.shared_hits} reused from other processes")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_token_cache(base_url: str = "http://localhost:8080") -> TokenCache:
+    """Process-wide TokenCache for ``base_url``."""
+    with _caches_lock:
+        if base_url not in _caches:
+            _caches[base_url] = TokenCache(base_url)
+        return _caches[base_url]
@@ -1,28 +1,44 @@
+import argparse
 import asyncio
 import websockets
 from datetime import datetime
 import sys
 import os
 import json
-import uuid
+import time
+from tools.ack_pipeline import AckPipeline
+from tools.backoff import STRATEGIES, Backoff
+from tools.capture import frame_record
+from tools.latency_histogram import NotificationLatencyTracker
+from tools.log_sink import BufferedLogSink
+from tools.signalr_protocol import FrameDecoder
 
-LOG_FILE = "websocket_messages.log"
+LOG_DIR = "logs"
+
+# Background JSONL writer; rotates into logs/websocket_messages_<timestamp>.log
+log_sink = BufferedLogSink(LOG_DIR)
+
+# Imported by --protocol messagepack
+signalr_messagepack = None
+
+# Created in main(); batches AcknowledgeDelivery invocations off the receive loop
+ack_pipeline = None
+
+# Set by --latency; records delivery and acknowledgement latency histograms
+latency_tracker = None
 
 def write_log(message):
-    """Write message to both console and log file."""
+    """Write message to the console and queue it for the log file."""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    formatted_message = f"{timestamp} - {message}\n"
+    print(f"{timestamp} - {message}")
+    log_sink.write({"ts": time.time(), "kind": "event", "msg": message})
 
-    # Print to console
-    print(formatted_message.strip())
+# Capture connection ID of the current connection ("c1", "c2", ... per reconnect)
+connection_id = "c0"
 
-    # Append to log file
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(formatted_message)
-            f.flush()
-    except Exception as e:
-        print(f"{timestamp} - Error writing to log file: {e}")
+def log_frame(direction, raw, message_number=None, target=None):
+    """Queue one capture record per WebSocket frame (direction is 'recv' or 'send'); see tools/capture.py."""
+    log_sink.write(frame_record(connection_id, direction, raw, n=message_number, target=target or None))
 
 # SignalR hub URL with JWT token
 SIGNALR_URL = (
@@ -36,93 +52,143 @@ HANDSHAKE = '{"protocol":"json","version":1}\u001e'
 # User ID from the JWT token
 USER_ID = "2c8ef14b-8038-4841-8a41-131236c55082"
 
-async def acknowledge_delivery(ws, notification_id):
-    """Acknowledge delivery of a notification"""
-    message = {
-        "type": 1,
-        "target": "AcknowledgeDelivery",
-        "arguments": [notification_id],
-        "invocationId": str(uuid.uuid4())
-    }
-    await ws.send(json.dumps(message) + '\u001e')
-    write_log(f"Sent delivery acknowledgment for notification: {notification_id}")
-
-async def listen_forever():
+# Hub protocol, set by --protocol ("json" or "messagepack")
+PROTOCOL = "json"
+
+def encode_invocation(target, arguments, invocation_id=None):
+    """Encode a hub invocation for the selected protocol."""
+    if PROTOCOL == "messagepack":
+        return signalr_messagepack.encode_invocation(target, arguments, invocation_id)
+    message = {"type": 1, "target": target, "arguments": arguments}
+    if invocation_id:
+        message["invocationId"] = invocation_id
+    return json.dumps(message) + '\u001e'
+
+def new_frame_decoder():
+    """Incremental decoder for the selected protocol; frames may hold several (or partial) records."""
+    if PROTOCOL == "messagepack":
+        return signalr_messagepack.FrameDecoder()
+    return FrameDecoder()
+
+def log_ack_frame(frame, count):
+    log_frame("send", frame, target=f"AcknowledgeDelivery x{count}")
+
+def ack_sent(notification_id):
+    if latency_tracker:
+        latency_tracker.ack_sent(notification_id)
+
+async def on_receive_notification(ws, arguments):
+    if not arguments:
+        return
+    notification = arguments[0]
+    if latency_tracker:
+        latency_tracker.notification_received(notification)
+    notification_id = notification.get('notificationId')
+    write_log(f"*** NOTIFICATION RECEIVED: {notification_id} "
+              f"[{notification.get('type')}/{notification.get('priority')}] "
+              f"{notification.get('title')}: {notification.get('message')} ***")
+
+    # Automatically acknowledge delivery (coalesced by the ack pipeline's sender task)
+    if notification_id:
+        await ack_pipeline.submit(notification_id)
+
+async def on_unread_count(ws, arguments):
+    write_log(f"*** UNREAD COUNT UPDATE: {(arguments or [0])[0]} ***")
+
+async def on_heartbeat(ws, arguments):
+    write_log(f"*** HEARTBEAT: {(arguments or [{}])[0].get('timestamp')} ***")
+
+async def on_delivery_acknowledged(ws, arguments):
+    payload = (arguments or [{}])[0]
+    ack_pipeline.confirm(payload.get('notificationId'))
+    if latency_tracker:
+        latency_tracker.ack_confirmed(payload)
+    write_log(f"*** DELIVERY ACKNOWLEDGMENT CONFIRMED: {payload.get('notificationId')} ***")
+
+# Hub invocation target -> handler(ws, arguments)
+HANDLERS = {
+    'ReceiveNotification': on_receive_notification,
+    'UnreadCount': on_unread_count,
+    'Heartbeat': on_heartbeat,
+    'DeliveryAcknowledged': on_delivery_acknowledged,
+}
+
+async def handle_message(ws, parsed):
+    """Dispatch one decoded hub message through HANDLERS."""
+    if not isinstance(parsed, dict):
+        return
+    if parsed.get('type') == 1:
+        handler = HANDLERS.get(parsed.get('target'))
+        if handler:
+            await handler(ws, parsed.get('arguments') or [])
+    elif parsed.get('type') == 7:
+        write_log(f"Server closed the hub connection: {parsed.get('error') or 'no error given'}")
+
+async def listen_forever(backoff=None):
     """Keep trying to connect, and listen for raw messages."""
-    reconnect_delay = 2  # seconds
+    global connection_id
+    backoff = backoff or Backoff()
+    connections = 0
     while True:
+        connections += 1
+        connection_id = f"c{connections}"
         write_log(f"Attempting connection to SignalR hub: {SIGNALR_URL}")
+        ack_sender = None
         try:
             async with websockets.connect(SIGNALR_URL) as ws:
                 write_log("WebSocket connection established")
                 
-                # Send the initial handshake
-                write_log(f"Sending handshake frame: {HANDSHAKE!r}")
-                await ws.send(HANDSHAKE)
-                write_log("Handshake sent")
+                # Send the initial handshake (JSON text for both protocols)
+                handshake = signalr_messagepack.HANDSHAKE if PROTOCOL == "messagepack" else HANDSHAKE
+                await ws.send(handshake)
+                log_frame("send", handshake, target="handshake")
 
                 # Wait for handshake response
                 handshake_response = await asyncio.wait_for(ws.recv(), timeout=5.0)
-                write_log(f"Handshake response: {handshake_response}")
+                log_frame("recv", handshake_response, target="handshake")
+                decoder = new_frame_decoder()
+                pending = []
+                if PROTOCOL == "messagepack":
+                    # Binary messages may follow the handshake in the same frame
+                    handshake_text, rest = signalr_messagepack.split_handshake(handshake_response)
+                    write_log(f"Handshake response: {handshake_text}")
+                    pending = decoder.feed(rest)
+                else:
+                    write_log(f"Handshake response: {handshake_response}")
 
                 # Subscribe to user notifications
-                subscribe_message = {
-                    "type": 1,
-                    "target": "SubscribeToUser",
-                    "arguments": [USER_ID]
-                }
-                subscribe_frame = json.dumps(subscribe_message) + '\u001e'
-                write_log(f"Sending subscribe message: {subscribe_frame}")
+                subscribe_frame = encode_invocation("SubscribeToUser", [USER_ID])
                 await ws.send(subscribe_frame)
-                write_log("Subscribe message sent")
+                log_frame("send", subscribe_frame, target="SubscribeToUser")
+                write_log(f"Subscribed to notifications for user {USER_ID}")
+                backoff.reset()
+
+                ack_sender = ack_pipeline.start(ws.send, log_ack_frame)
+
+                for parsed in pending:
+                    await handle_message(ws, parsed)
 
                 message_count = 0
                 while True:
                     try:
                         raw = await asyncio.wait_for(ws.recv(), timeout=30.0)
                         message_count += 1
-                        write_log(f"=== MESSAGE #{message_count} ===")
-                        write_log(f"Raw message: {raw}")
-                        
-                        # Try to parse as JSON
+
                         try:
-                            # Remove the record separator character if present
-                            clean_message = raw.rstrip('\u001e')
-                            if clean_message:
-                                parsed = json.loads(clean_message)
-                                write_log(f"Parsed JSON: {json.dumps(parsed, indent=2)}")
-                                
-                                # Check for notification messages
-                                if isinstance(parsed, dict):
-                                    if parsed.get('type') == 1 and parsed.get('target') == 'ReceiveNotification':
-                                        write_log("*** NOTIFICATION RECEIVED ***")
-                                        if 'arguments' in parsed and len(parsed['arguments']) > 0:
-                                            notification = parsed['arguments'][0]
-                                            notification_id = notification.get('notificationId')
-                                            write_log(f"Notification ID: {notification_id}")
-                                            write_log(f"Title: {notification.get('title')}")
-                                            write_log(f"Message: {notification.get('message')}")
-                                            write_log(f"Type: {notification.get('type')}")
-                                            write_log(f"Priority: {notification.get('priority')}")
-                                            
-                                            # Automatically acknowledge delivery
-                                            if notification_id:
-                                                await acknowledge_delivery(ws, notification_id)
-                                                write_log(f"*** DELIVERY ACKNOWLEDGED FOR: {notification_id} ***")
-                                    elif parsed.get('type') == 1 and parsed.get('target') == 'UnreadCount':
-                                        write_log(f"*** UNREAD COUNT UPDATE: {parsed.get('arguments', [0])[0]} ***")
-                                    elif parsed.get('type') == 1 and parsed.get('target') == 'Heartbeat':
-                                        write_log(f"*** HEARTBEAT: {parsed.get('arguments', [{}])[0].get('timestamp')} ***")
-                                    elif parsed.get('type') == 1 and parsed.get('target') == 'DeliveryAcknowledged':
-                                        write_log(f"*** DELIVERY ACKNOWLEDGMENT CONFIRMED: {parsed.get('arguments', [{}])[0].get('notificationId')} ***")
-                            else:
-                                write_log("Empty message received")
-                        except json.JSONDecodeError as e:
-                            write_log(f"Message is not valid JSON: {e}")
+                            malformed = getattr(decoder, 'malformed', 0)
+                            messages = decoder.feed(raw)
+                            target = next((m.get('target') for m in messages if isinstance(m, dict)), None)
+                            log_frame("recv", raw, message_count, target)
+                            if getattr(decoder, 'malformed', 0) > malformed:
+                                write_log(f"Message #{message_count} contained an invalid record: {decoder.last_error}")
+                            for parsed in messages:
+                                await handle_message(ws, parsed)
+                        except ValueError as e:
+                            decoder.reset()
+                            log_frame("recv", raw, message_count)
+                            write_log(f"Message #{message_count} could not be decoded: {e}")
                         except Exception as e:
-                            write_log(f"Error parsing message: {e}")
-                        
-                        write_log(f"=== END MESSAGE #{message_count} ===\n")
+                            write_log(f"Error parsing message #{message_count}: {e}")
                     except asyncio.TimeoutError:
                         write_log("No message for 30s — still listening...")
                     except websockets.ConnectionClosed:
@@ -131,20 +197,79 @@ async def listen_forever():
 
         except Exception as e:
             write_log(f"Connection error: {e}")
+        finally:
+            # Unsent acknowledgements stay queued for the next connection
+            if ack_sender:
+                ack_sender.cancel()
 
-        write_log(f"Reconnecting in {reconnect_delay} seconds...")
+        reconnect_delay = backoff.next()
+        write_log(f"Reconnecting in {reconnect_delay:.1f} seconds ({backoff.strategy} backoff)...")
         await asyncio.sleep(reconnect_delay)
-        # Optional: increase delay gradually up to a max
-        reconnect_delay = min(reconnect_delay * 1.5, 30)
 
-async def main():
+async def report_latency(interval):
+    """Print the latency histograms every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        print(latency_tracker.report())
+
+async def report_acks(interval):
+    """Print the acknowledgement pipeline counters every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        write_log(f"📨 {ack_pipeline.summary()}")
+
+async def main(args):
+    global latency_tracker, ack_pipeline, PROTOCOL, SIGNALR_URL, signalr_messagepack
+    PROTOCOL = args.protocol
+    if args.url:
+        SIGNALR_URL = args.url
+    if PROTOCOL == "messagepack":
+        # Only needed (and only requires msgpack) in MessagePack mode
+        from tools import signalr_messagepack
+    log_sink.start()
     write_log("Starting persistent WebSocket listener for SignalR notifications")
     write_log("Press Ctrl+C to exit")
-    write_log(f"Logging to: {os.path.abspath(LOG_FILE)}")
+    write_log(f"Hub protocol: {PROTOCOL}")
+    write_log(f"Logging to: {os.path.abspath(log_sink.path)}")
+    ack_pipeline = AckPipeline(encode_invocation, max_batch=args.ack_batch, max_delay=args.ack_delay,
+                               max_queue=args.ack_queue, on_sent=ack_sent)
+    ack_reporter = asyncio.create_task(report_acks(args.ack_report_interval))
+    reporter = None
+    if args.latency:
+        latency_tracker = NotificationLatencyTracker()
+        reporter = asyncio.create_task(report_latency(args.latency_interval))
+        write_log(f"Latency mode enabled (report every {args.latency_interval:g}s)")
     try:
-        await listen_forever()
-    except KeyboardInterrupt:
+        await listen_forever(Backoff(args.backoff))
+    except (KeyboardInterrupt, asyncio.CancelledError):
         write_log("Interrupted by user — shutting down")
+    finally:
+        ack_reporter.cancel()
+        write_log(f"📨 {ack_pipeline.summary()}")
+        if reporter:
+            reporter.cancel()
+            print(latency_tracker.report("Notification latency (final)"))
+        if log_sink.dropped:
+            print(f"⚠️ {log_sink.dropped} log records dropped (queue full)")
+        log_sink.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='SignalR notification listener')
+    parser.add_argument('--url', help='Hub URL including ?access_token=... (e.g. a local signalr_standin_hub.py)')
+    parser.add_argument('--protocol', choices=['json', 'messagepack'], default='json',
+                        help='SignalR hub protocol (messagepack needs AddMessagePackProtocol on the server)')
+    parser.add_argument('--backoff', choices=STRATEGIES, default='exponential',
+                        help='Reconnect backoff: exponential (2s*1.5^n, 30s cap), full or decorrelated jitter')
+    parser.add_argument('--ack-batch', type=int, default=50,
+                        help='Maximum AcknowledgeDelivery records coalesced into one frame')
+    parser.add_argument('--ack-delay', type=float, default=0.05,
+                        help='Maximum seconds an acknowledgement waits for its batch to fill')
+    parser.add_argument('--ack-queue', type=int, default=1000,
+                        help='Bounded ack queue size; the receive loop waits when it is full')
+    parser.add_argument('--ack-report-interval', type=float, default=30.0,
+                        help='Seconds between ack pipeline reports (outstanding/sent/confirmed)')
+    parser.add_argument('--latency', action='store_true',
+                        help='Measure delivery and DeliveryAcknowledged latency per notification type/priority')
+    parser.add_argument('--latency-interval', type=float, default=30.0,
+                        help='Seconds between latency reports')
+    asyncio.run(main(parser.parse_args()))
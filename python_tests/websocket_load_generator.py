@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Multi-client SignalR load generator for the NotificationHub.
+
+Opens N concurrent hub connections from a pool of JWTs, performs the
+handshake plus SubscribeToUser / JoinOrganisation on each one, ramps up at a
+configurable rate and reports connection-setup latency, handshake failures,
+messages per second and memory per connection.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import random
+import time
+
+import websockets
+
+from tools import test_credentials
+from tools.backoff import STRATEGIES, Backoff
+from tools.signalr_protocol import (
+    DEFAULT_HUB_URL,
+    HANDSHAKE,
+    INVOCATION,
+    decode_frame,
+    encode_invocation,
+    hub_url,
+    jwt_claims,
+    parse_handshake_response,
+)
+from tools.token_cache import LoginError, get_token_cache
+
+# "Service Restart": sent by a restarting hub and used by the reconnect storm to drop clients
+STORM_CLOSE_CODE = 1012
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def rss_bytes(pid="self") -> int:
+    """Resident set size of a process from /proc (0 where unavailable)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class LoadStats:
+    """Counters shared by all virtual clients."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.attempted = 0
+        self.connected = 0
+        self.active = 0
+        self.setup_latencies = []
+        self.handshake_failures = {}
+        self.connect_errors = {}
+        self.disconnects = 0
+        self.reconnects = 0
+        self.messages = 0
+        self.by_target = {}
+        self._window_messages = 0
+        self._window_started = time.perf_counter()
+
+    def record_failure(self, bucket: dict, reason: str):
+        bucket[reason] = bucket.get(reason, 0) + 1
+
+    def record_message(self, target: str):
+        self.messages += 1
+        self._window_messages += 1
+        self.by_target[target] = self.by_target.get(target, 0) + 1
+
+    def window_rate(self) -> float:
+        """Messages per second since the previous call."""
+        now = time.perf_counter()
+        elapsed = now - self._window_started
+        rate = self._window_messages / elapsed if elapsed > 0 else 0.0
+        self._window_messages = 0
+        self._window_started = now
+        return rate
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def load_token_pool(tokens_file=None, tokens=None, login_roles=None, base_url="http://localhost:8080") -> list:
+    """Collect JWTs from a file (one per line), the command line and/or API logins."""
+    pool = list(tokens or [])
+
+    if tokens_file:
+        with open(tokens_file, 'r') as f:
+            content = f.read().strip()
+        if content.startswith('['):
+            pool.extend(json.loads(content))
+        else:
+            pool.extend(line.strip() for line in content.splitlines() if line.strip())
+
+    # Logins go through the shared token cache: one login per identity, however many processes ask
+    cache = get_token_cache(base_url)
+    for role in login_roles or []:
+        creds = test_credentials.get_test_credentials(role)
+        try:
+            pool.append(cache.get_token(role))
+            print(f"✅ Logged in as {creds['username']} ({role})")
+        except LoginError as e:
+            print(f"❌ {e}")
+        except Exception as e:
+            print(f"❌ Login error for {role}: {e}")
+
+    return pool
+
+
+class StormStats:
+    """Reconnect-storm measurements for the clients dropped at one instant."""
+
+    def __init__(self, dropped: int):
+        self.dropped = dropped
+        self.started = time.perf_counter()
+        self.resubscribe_times = []
+        self.attempts = 0
+        self.handshake_failures = 0
+        self.connect_errors = 0
+        self.done = asyncio.Event()
+
+    def resubscribed(self):
+        self.resubscribe_times.append(time.perf_counter() - self.started)
+        if len(self.resubscribe_times) >= self.dropped:
+            self.done.set()
+
+
+class VirtualClient:
+    """One simulated hub client that reconnects with the configured backoff."""
+
+    def __init__(self, url: str, token: str, stats: LoadStats, handshake_timeout: float, join_org: bool,
+                 backoff: Backoff, reconnect: bool = True):
+        claims = jwt_claims(token)
+        self.user_id = claims.get('nameid')
+        self.organisation_id = claims.get('organisation_id')
+        self.url = url
+        self.stats = stats
+        self.handshake_timeout = handshake_timeout
+        self.join_org = join_org
+        self.backoff = backoff
+        self.reconnect = reconnect
+        self.ws = None
+        self.storm = None
+
+    async def run(self):
+        """Connect and stay connected until cancelled, reconnecting after every drop."""
+        while True:
+            await self.session()
+            if not self.reconnect:
+                return
+            await asyncio.sleep(self.backoff.next())
+
+    async def drop(self, storm: StormStats):
+        """Close the connection as a server restart would (1012) and track the reconnect."""
+        self.storm = storm
+        if self.ws is not None:
+            await self.ws.close(code=STORM_CLOSE_CODE, reason="storm")
+
+    async def session(self) -> bool:
+        """One connection: handshake, subscribe and count messages until it closes."""
+        stats = self.stats
+        storm = self.storm
+        stats.attempted += 1
+        if storm:
+            storm.attempts += 1
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(self.url, open_timeout=self.handshake_timeout, max_queue=None) as ws:
+                await ws.send(HANDSHAKE)
+                response = await asyncio.wait_for(ws.recv(), timeout=self.handshake_timeout)
+                error = parse_handshake_response(response)
+                if error:
+                    stats.record_failure(stats.handshake_failures, error)
+                    if storm:
+                        storm.handshake_failures += 1
+                    return False
+
+                if self.user_id:
+                    await ws.send(encode_invocation("SubscribeToUser", [self.user_id]))
+                if self.join_org and self.organisation_id:
+                    await ws.send(encode_invocation("JoinOrganisation", [self.organisation_id]))
+
+                stats.setup_latencies.append(time.perf_counter() - started)
+                stats.connected += 1
+                stats.active += 1
+                self.backoff.reset()
+                if storm:
+                    storm.resubscribed()
+                    self.storm = None
+                self.ws = ws
+                try:
+                    # Records that arrived in the same frame as the handshake response
+                    for record in decode_frame(response)[1:]:
+                        if record.get('type') == INVOCATION:
+                            stats.record_message(record.get('target'))
+
+                    # Runs until the connection drops or the task is cancelled at the end of the test
+                    async for raw in ws:
+                        for record in decode_frame(raw):
+                            if record.get('type') == INVOCATION:
+                                stats.record_message(record.get('target'))
+                    stats.disconnects += 1
+                except websockets.ConnectionClosed as e:
+                    # A restart close (ours during a storm, or the hub's) is an expected drop, not an error
+                    if STORM_CLOSE_CODE not in {frame.code for frame in (e.rcvd, e.sent) if frame}:
+                        raise
+                    stats.disconnects += 1
+                    stats.reconnects += 1
+                except asyncio.CancelledError:
+                    # Close normally (1000) rather than as an internal error when the test ends
+                    await ws.close()
+                    raise
+                finally:
+                    self.ws = None
+                    stats.active -= 1
+                return True
+
+        except asyncio.TimeoutError:
+            stats.record_failure(stats.handshake_failures, "handshake timed out")
+            if storm:
+                storm.handshake_failures += 1
+        except websockets.ConnectionClosed as e:
+            stats.disconnects += 1
+            stats.record_failure(stats.connect_errors, f"closed ({e.rcvd.code if e.rcvd else 'no close frame'})")
+            if storm:
+                storm.connect_errors += 1
+        except Exception as e:
+            stats.record_failure(stats.connect_errors, type(e).__name__ + (f": {e}" if str(e) else ""))
+            if storm:
+                storm.connect_errors += 1
+        return False
+
+
+async def run_storm(clients: list, count: int, timeout: float, rng: random.Random) -> StormStats:
+    """Drop ``count`` connected clients at once and wait until they have all resubscribed."""
+    connected = [client for client in clients if client.ws is not None]
+    victims = rng.sample(connected, min(count, len(connected)))
+    storm = StormStats(len(victims))
+    print(f"🌩️ Dropping {len(victims)} connections at once")
+    await asyncio.gather(*(client.drop(storm) for client in victims), return_exceptions=True)
+    try:
+        await asyncio.wait_for(storm.done.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    return storm
+
+
+def print_storm_report(storm: StormStats, strategy: str):
+    times = sorted(storm.resubscribe_times)
+    print(f"\n🌩️ Reconnect storm ({strategy} backoff)")
+    print("=" * 60)
+    print(f"Dropped:                 {storm.dropped}")
+    print(f"Resubscribed:            {len(times)}"
+          + ("" if len(times) == storm.dropped else f" ({storm.dropped - len(times)} still reconnecting)"))
+    if times:
+        print(f"Time to resubscribe:     p50 {percentile(times, 50):.2f}s  p95 {percentile(times, 95):.2f}s  "
+              f"all {times[-1]:.2f}s")
+    attempts = storm.attempts or 1
+    print(f"Reconnect attempts:      {storm.attempts} ({storm.attempts / max(1, storm.dropped):.2f} per client)")
+    print(f"Handshake error rate:    {storm.handshake_failures / attempts:.1%} ({storm.handshake_failures})")
+    print(f"Connect error rate:      {storm.connect_errors / attempts:.1%} ({storm.connect_errors})")
+    if times:
+        # Resubscribes per second show whether clients come back in lockstep waves
+        buckets = {}
+        for t in times:
+            buckets[int(t)] = buckets.get(int(t), 0) + 1
+        peak = max(buckets.values())
+        print("Resubscribes per second:")
+        for second in range(int(times[-1]) + 1):
+            count = buckets.get(second, 0)
+            print(f"  {second:>4}s {count:>6} {'█' * max(0, round(40 * count / peak))}")
+
+
+def print_progress(stats: LoadStats, baseline_rss: int, server_pid=None):
+    rate = stats.window_rate()
+    per_conn = (rss_bytes() - baseline_rss) / stats.active if stats.active else 0
+    failures = sum(stats.handshake_failures.values()) + sum(stats.connect_errors.values())
+    line = (f"⏱️ {stats.elapsed:6.1f}s  active {stats.active:>6}/{stats.attempted:<6} "
+            f"failed {failures:>5}  {rate:8.1f} msg/s  client {per_conn / 1024:6.1f}KB/conn")
+    if server_pid:
+        line += f"  server RSS {rss_bytes(server_pid) / 1024 / 1024:8.1f}MB"
+    print(line)
+
+
+def print_report(stats: LoadStats, peak_active: int, client_per_conn: float, server_delta=None):
+    latencies = sorted(stats.setup_latencies)
+    print("\n📊 Load test summary")
+    print("=" * 60)
+    print(f"Connections attempted:   {stats.attempted}")
+    print(f"Connections established: {stats.connected} (peak active {peak_active})")
+    if latencies:
+        print(f"Setup latency:           p50 {percentile(latencies, 50) * 1000:.1f}ms  "
+              f"p95 {percentile(latencies, 95) * 1000:.1f}ms  p99 {percentile(latencies, 99) * 1000:.1f}ms  "
+              f"max {latencies[-1] * 1000:.1f}ms")
+    if stats.reconnects:
+        print(f"Restart drops:           {stats.reconnects} closed with {STORM_CLOSE_CODE} and reconnected")
+    print(f"Messages received:       {stats.messages} ({stats.messages / stats.elapsed:.1f} msg/s overall)")
+    for target, count in sorted(stats.by_target.items(), key=lambda item: -item[1]):
+        print(f"  • {target}: {count}")
+    print(f"Client memory:           {client_per_conn / 1024:.1f}KB per connection")
+    if server_delta is not None and peak_active:
+        print(f"Server memory:           {server_delta / peak_active / 1024:.1f}KB per connection")
+
+    if stats.handshake_failures:
+        print("\n❌ Handshake failures:")
+        for reason, count in sorted(stats.handshake_failures.items(), key=lambda item: -item[1]):
+            print(f"  • {reason}: {count}")
+    if stats.connect_errors:
+        print("\n❌ Connection errors:")
+        for reason, count in sorted(stats.connect_errors.items(), key=lambda item: -item[1]):
+            print(f"  • {reason}: {count}")
+
+
+async def run_load(url: str, tokens: list, clients: int, ramp_rate: float, duration: float,
+                   handshake_timeout: float, join_org: bool, report_interval: float, server_pid=None,
+                   backoff='exponential', backoff_base=2.0, backoff_cap=30.0, reconnect=True,
+                   storm=0, storm_after=10.0, seed=0):
+    """Ramp up ``clients`` connections at ``ramp_rate`` per second, hold for ``duration`` and report.
+
+    With ``storm`` > 0, that many clients are dropped at once ``storm_after``
+    seconds into the hold and their resubscription is measured.
+    """
+    rng = random.Random(seed)
+    stats = LoadStats()
+    baseline_rss = rss_bytes()
+    server_baseline = rss_bytes(server_pid) if server_pid else None
+    peak_active = 0
+    client_per_conn = 0.0
+    server_delta = None
+
+    async def reporter():
+        nonlocal peak_active, client_per_conn, server_delta
+        while True:
+            await asyncio.sleep(report_interval)
+            if stats.active >= peak_active and stats.active:
+                peak_active = stats.active
+                client_per_conn = (rss_bytes() - baseline_rss) / stats.active
+                if server_pid:
+                    server_delta = rss_bytes(server_pid) - server_baseline
+            print_progress(stats, baseline_rss, server_pid)
+
+    print(f"🚀 Ramping {clients} clients at {ramp_rate:g}/s using {len(tokens)} token(s)")
+    reporter_task = asyncio.create_task(reporter())
+    virtual_clients = []
+    tasks = []
+    for client_id in range(clients):
+        token = tokens[client_id % len(tokens)]
+        client = VirtualClient(hub_url(url, token), token, stats, handshake_timeout, join_org,
+                               Backoff(backoff, base=backoff_base, cap=backoff_cap,
+                                       rng=random.Random(rng.random())),
+                               reconnect=reconnect)
+        virtual_clients.append(client)
+        tasks.append(asyncio.create_task(client.run()))
+        if ramp_rate > 0:
+            await asyncio.sleep(1.0 / ramp_rate)
+
+    print(f"⏳ Ramp complete after {stats.elapsed:.1f}s, holding for {duration:g}s")
+    storm_stats = None
+    try:
+        if storm:
+            await asyncio.sleep(min(storm_after, duration))
+            storm_stats = await run_storm(virtual_clients, storm, max(0.0, duration - storm_after), rng)
+        else:
+            await asyncio.sleep(duration)
+    finally:
+        reporter_task.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    print_report(stats, peak_active, client_per_conn, server_delta)
+    if storm_stats:
+        print_storm_report(storm_stats, backoff)
+    return stats
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='SignalR NotificationHub Load Generator')
+    parser.add_argument('--url', default=DEFAULT_HUB_URL, help='Hub WebSocket URL (without access_token)')
+    parser.add_argument('--api-url', default='http://localhost:8080', help='API base URL used for --login')
+    parser.add_argument('--clients', type=int, default=100, help='Number of concurrent connections')
+    parser.add_argument('--ramp-rate', type=float, default=50.0, help='New connections per second (0 = all at once)')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds to hold the connections after ramp-up')
+    parser.add_argument('--tokens-file', help='File with one JWT per line (or a JSON list)')
+    parser.add_argument('--token', action='append', help='JWT to add to the pool (repeatable)')
+    parser.add_argument('--login', action='append', metavar='ROLE',
+                        help='Log in with the test credentials for ROLE and add the token (repeatable)')
+    parser.add_argument('--no-join-org', action='store_true', help='Skip JoinOrganisation after SubscribeToUser')
+    parser.add_argument('--handshake-timeout', type=float, default=15.0,
+                        help='Seconds to wait for connect + handshake (server HandshakeTimeout is 15s)')
+    parser.add_argument('--report-interval', type=float, default=5.0, help='Seconds between progress lines')
+    parser.add_argument('--backoff', choices=STRATEGIES, default='exponential',
+                        help='Reconnect backoff: exponential (lockstep), full or decorrelated jitter')
+    parser.add_argument('--backoff-base', type=float, default=2.0, help='First reconnect delay in seconds')
+    parser.add_argument('--backoff-cap', type=float, default=30.0, help='Maximum reconnect delay in seconds')
+    parser.add_argument('--no-reconnect', action='store_true', help='Do not reconnect dropped clients')
+    parser.add_argument('--storm', type=int, default=0, metavar='N',
+                        help='Drop N clients at once and measure how long they take to resubscribe')
+    parser.add_argument('--storm-after', type=float, default=10.0,
+                        help='Seconds into the hold phase before the storm; the rest of --duration is its budget')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for jitter and storm victims')
+    parser.add_argument('--server-pid', type=int, help='Local API process ID to sample server RSS per connection')
+
+    args = parser.parse_args()
+
+    tokens = load_token_pool(args.tokens_file, args.token, args.login, args.api_url)
+    if not tokens:
+        parser.error("No tokens: pass --tokens-file, --token or --login")
+
+    try:
+        asyncio.run(run_load(args.url, tokens, args.clients, args.ramp_rate, args.duration,
+                             args.handshake_timeout, not args.no_join_org, args.report_interval,
+                             args.server_pid, backoff=args.backoff, backoff_base=args.backoff_base,
+                             backoff_cap=args.backoff_cap, reconnect=not args.no_reconnect,
+                             storm=args.storm, storm_after=args.storm_after, seed=args.seed))
+    except KeyboardInterrupt:
+        print("\n⚠️ Load test interrupted by user")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
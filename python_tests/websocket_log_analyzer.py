@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Streaming analyzer for large WebSocket listener logs.
+
+Reads websocket_messages*.log files (the listener's JSONL logs and the
+older free-text dumps, see tools/capture.py) line by line and reports:
+
+  - message rate over time (records per --bucket seconds)
+  - gaps longer than --gap seconds with no message on a connection
+  - Heartbeat and ping interval jitter
+  - connection drops, reconnect counts and time to reconnect
+  - ReceiveNotification -> AcknowledgeDelivery -> DeliveryAcknowledged pairing
+
+Memory stays constant in the file size: counters and histograms only, plus
+the notifications still waiting for their acknowledgement (capped by
+--max-pending). Given a directory or several files, each file is analysed
+in its own process and the results are merged. Pairing and reconnect
+tracking restart at each file, so a notification acknowledged just after a
+log rotation is reported as unacknowledged in one file and unmatched in
+the next.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from tools.capture import EVENT, RECV, SEND, read_capture
+from tools.latency_histogram import LatencyHistogram
+from tools.signalr_protocol import INVOCATION, PING, RECORD_SEPARATOR
+
+LOG_PATTERN = ('websocket_messages', '.log')
+
+# Listener log lines that mark the connection state
+_ESTABLISHED = 'WebSocket connection established'
+_DROPPED = ('Connection closed', 'Connection error', 'WebSocket connection closed')
+_STOPPED = ('Interrupted by user', 'Received interrupt signal')
+
+# Keep-alive messages whose interval jitter is reported
+KEEPALIVES = ('Heartbeat', 'ping')
+
+# Imported on first binary frame; None if msgpack is not installed
+_messagepack = None
+
+
+def _decode_binary(payload: bytes) -> list:
+    global _messagepack
+    if _messagepack is None:
+        from tools import signalr_messagepack as _messagepack
+    return _messagepack.decode_frame(payload)
+
+
+def _decode(payload) -> tuple:
+    """Return (records, malformed count) for one captured frame."""
+    if isinstance(payload, bytes):
+        try:
+            return _decode_binary(payload), 0
+        except (ImportError, ValueError):
+            return [], 1
+    records, malformed = [], 0
+    for text in payload.split(RECORD_SEPARATOR):
+        if not text:
+            continue
+        try:
+            records.append(json.loads(text))
+        except ValueError:
+            malformed += 1
+    return records, malformed
+
+
+class LogStats:
+    """Mergeable counters and histograms for one or more log files."""
+
+    def __init__(self, bucket: float = 60.0, top: int = 10):
+        self.bucket = bucket
+        self.top = top
+        self.files = 0
+        self.bytes = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.frames = {RECV: 0, SEND: 0}
+        self.events = 0
+        self.records = 0
+        self.malformed = 0
+        self.targets = {}
+        self.rate = {}
+        self.gaps = 0
+        self.gap_total = 0.0
+        self.longest_gaps = []
+        self.intervals = {kind: LatencyHistogram() for kind in KEEPALIVES}
+        self.interval_squares = {kind: 0.0 for kind in KEEPALIVES}
+        self.connections = 0
+        self.drops = 0
+        self.reconnects = 0
+        self.reconnect_time = LatencyHistogram()
+        self.notifications = 0
+        self.duplicates = 0
+        self.acked = 0
+        self.confirmed = 0
+        self.ack_latency = LatencyHistogram()
+        self.confirm_rtt = LatencyHistogram()
+        self.unacked = 0
+        self.unconfirmed = 0
+        self.unmatched_acks = 0
+        self.unmatched_confirmations = 0
+        self.evicted = 0
+
+    def record_gap(self, gap: float, start: float, source: str):
+        self.gaps += 1
+        self.gap_total += gap
+        entry = (gap, start, source)
+        if len(self.longest_gaps) < self.top:
+            heapq.heappush(self.longest_gaps, entry)
+        else:
+            heapq.heappushpop(self.longest_gaps, entry)
+
+    def record_interval(self, kind: str, seconds: float):
+        self.intervals[kind].record(seconds)
+        self.interval_squares[kind] += seconds * seconds
+
+    def jitter(self, kind: str):
+        """Standard deviation of the keep-alive interval in seconds."""
+        histogram = self.intervals[kind]
+        if histogram.count < 2:
+            return None
+        mean = histogram.mean
+        return math.sqrt(max(0.0, self.interval_squares[kind] / histogram.count - mean * mean))
+
+    def merge(self, other: "LogStats"):
+        self.files += other.files
+        self.bytes += other.bytes
+        for ts in (other.first_ts, other.last_ts):
+            if ts is not None:
+                self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+                self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+        for direction, count in other.frames.items():
+            self.frames[direction] += count
+        for target, count in other.targets.items():
+            self.targets[target] = self.targets.get(target, 0) + count
+        for bucket, count in other.rate.items():
+            self.rate[bucket] = self.rate.get(bucket, 0) + count
+        for entry in other.longest_gaps:
+            if len(self.longest_gaps) < self.top:
+                heapq.heappush(self.longest_gaps, entry)
+            else:
+                heapq.heappushpop(self.longest_gaps, entry)
+        for kind in KEEPALIVES:
+            self.intervals[kind].merge(other.intervals[kind])
+            self.interval_squares[kind] += other.interval_squares[kind]
+        self.reconnect_time.merge(other.reconnect_time)
+        self.ack_latency.merge(other.ack_latency)
+        self.confirm_rtt.merge(other.confirm_rtt)
+        for name in ('events', 'records', 'malformed', 'gaps', 'gap_total', 'connections', 'drops', 'reconnects',
+                     'notifications', 'duplicates', 'acked', 'confirmed', 'unacked', 'unconfirmed',
+                     'unmatched_acks', 'unmatched_confirmations', 'evicted'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class _Pending:
+    """Insertion-ordered ID -> timestamp map that drops its oldest entries beyond ``limit``."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.items = OrderedDict()
+        self.evicted = 0
+
+    def add(self, key, ts: float):
+        self.items[key] = ts
+        if len(self.items) > self.limit:
+            self.items.popitem(last=False)
+            self.evicted += 1
+
+    def pop(self, key):
+        return self.items.pop(key, None)
+
+
+def analyze_file(path: str, bucket: float = 60.0, gap: float = 30.0, top: int = 10,
+                 max_pending: int = 100000) -> LogStats:
+    """Stream one log file into a LogStats."""
+    stats = LogStats(bucket, top)
+    stats.files = 1
+    stats.bytes = os.path.getsize(path)
+    source = os.path.basename(path)
+
+    conn = None
+    last_recv = None
+    last_keepalive = {}
+    down_since = None
+    received = _Pending(max_pending)
+    awaiting_confirmation = _Pending(max_pending)
+
+    for frame in read_capture(path, events=True):
+        ts = frame.ts
+        if stats.first_ts is None:
+            stats.first_ts = ts
+        stats.last_ts = ts
+
+        if frame.direction == EVENT:
+            stats.events += 1
+            message = frame.payload
+            if message.startswith(_ESTABLISHED):
+                stats.connections += 1
+                if down_since is not None:
+                    stats.reconnects += 1
+                    stats.reconnect_time.record(ts - down_since)
+                    down_since = None
+            elif message.startswith(_DROPPED):
+                stats.drops += 1
+                if down_since is None:
+                    down_since = ts
+            elif message.startswith(_STOPPED):
+                down_since = None
+            continue
+
+        if frame.conn != conn:
+            # Gaps and keep-alive intervals are measured within one connection
+            conn = frame.conn
+            last_recv = None
+            last_keepalive = {}
+
+        stats.frames[frame.direction] += 1
+        if frame.target == 'handshake':
+            continue
+        records, malformed = _decode(frame.payload)
+        stats.malformed += malformed
+
+        if frame.direction == SEND:
+            for record in records:
+                if record.get('target') != 'AcknowledgeDelivery' or not record.get('arguments'):
+                    continue
+                notification_id = record['arguments'][0]
+                received_at = received.pop(notification_id)
+                if received_at is None:
+                    stats.unmatched_acks += 1
+                    continue
+                stats.acked += 1
+                stats.ack_latency.record(ts - received_at)
+                awaiting_confirmation.add(notification_id, ts)
+            continue
+
+        if last_recv is not None and ts - last_recv > gap:
+            stats.record_gap(ts - last_recv, last_recv, source)
+        last_recv = ts
+        if records:
+            key = int(ts // bucket)
+            stats.rate[key] = stats.rate.get(key, 0) + len(records)
+            stats.records += len(records)
+
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            message_type = record.get('type')
+            if message_type == PING:
+                target = 'ping'
+            elif message_type == INVOCATION:
+                target = record.get('target')
+            else:
+                continue
+            stats.targets[target] = stats.targets.get(target, 0) + 1
+            if target in KEEPALIVES:
+                if target in last_keepalive:
+                    stats.record_interval(target, ts - last_keepalive[target])
+                last_keepalive[target] = ts
+                continue
+            payload = (record.get('arguments') or [None])[0]
+            notification_id = payload.get('notificationId') if isinstance(payload, dict) else None
+            if not notification_id:
+                continue
+            if target == 'ReceiveNotification':
+                stats.notifications += 1
+                if notification_id in received.items:
+                    stats.duplicates += 1
+                received.add(notification_id, ts)
+            elif target == 'DeliveryAcknowledged':
+                sent_at = awaiting_confirmation.pop(notification_id)
+                if sent_at is None:
+                    stats.unmatched_confirmations += 1
+                else:
+                    stats.confirmed += 1
+                    stats.confirm_rtt.record(ts - sent_at)
+
+    stats.unacked = len(received.items)
+    stats.unconfirmed = len(awaiting_confirmation.items)
+    stats.evicted = received.evicted + awaiting_confirmation.evicted
+    return stats
+
+
+def find_logs(paths) -> list:
+    """Expand directories into their websocket_messages*.log files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            prefix, suffix = LOG_PATTERN
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.startswith(prefix) and name.endswith(suffix)))
+        else:
+            files.append(path)
+    return files
+
+
+def format_ts(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 120:
+        return f"{seconds:.1f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f}min"
+    return f"{seconds / 3600:.1f}h"
+
+
+def format_seconds(histogram: LatencyHistogram) -> str:
+    if not histogram.count:
+        return "no samples"
+    return (f"n={histogram.count:<6} p50 {histogram.percentile(50):.2f}s  p95 {histogram.percentile(95):.2f}s  "
+            f"p99 {histogram.percentile(99):.2f}s  max {histogram.max:.2f}s")
+
+
+def print_rate(stats: LogStats, max_rows: int):
+    """Records per time bucket as a bar chart, merging adjacent buckets to fit ``max_rows``."""
+    if not stats.rate:
+        return
+    first, last = min(stats.rate), max(stats.rate)
+    group = max(1, math.ceil((last - first + 1) / max_rows))
+    rows = {}
+    for key, count in stats.rate.items():
+        row = first + (key - first) // group * group
+        rows[row] = rows.get(row, 0) + count
+    width = stats.bucket * group
+    peak = max(rows.values())
+    print(f"\nMessage rate (records per {format_duration(width)}):")
+    idle = 0
+    for row in range(first, last + 1, group):
+        count = rows.get(row, 0)
+        if not count:
+            idle += 1
+            continue
+        if idle:
+            # Runs of empty buckets (listener not running) collapse into one line
+            print(f"  {'':19} {'·' * 3} {format_duration(idle * width)} without messages")
+            idle = 0
+        print(f"  {format_ts(row * stats.bucket)} {count:>8} {count / width:>8.1f}/s "
+              f"{'█' * max(0, round(40 * count / peak))}")
+
+
+def print_analysis(stats: LogStats, elapsed: float, workers: int, gap: float, max_rows: int):
+    megabytes = stats.bytes / (1024 * 1024)
+    print("\n📊 WebSocket log analysis")
+    print("=" * 60)
+    print(f"Files:              {stats.files} ({megabytes:.1f} MB) in {elapsed:.1f}s "
+          f"({megabytes / max(elapsed, 1e-9):.1f} MB/s, {workers} worker(s))")
+    if stats.first_ts is None:
+        print("ℹ️ No log records found")
+        return
+    print(f"Time span:          {format_ts(stats.first_ts)} → {format_ts(stats.last_ts)} "
+          f"({format_duration(stats.last_ts - stats.first_ts)})")
+    print(f"Frames:             {stats.frames[RECV]} received, {stats.frames[SEND]} sent, "
+          f"{stats.records} records ({stats.malformed} malformed), {stats.events} log events")
+    for target, count in sorted(stats.targets.items(), key=lambda item: -item[1]):
+        print(f"  • {target}: {count}")
+
+    print_rate(stats, max_rows)
+
+    print(f"\nGaps > {gap:g}s:         {stats.gaps} (total {format_duration(stats.gap_total)})")
+    for length, start, source in sorted(stats.longest_gaps, reverse=True):
+        print(f"  • {format_duration(length):>8} from {format_ts(start)} ({source})")
+
+    print("\nKeep-alive intervals:")
+    for kind in KEEPALIVES:
+        histogram = stats.intervals[kind]
+        jitter = stats.jitter(kind)
+        suffix = f"  mean {histogram.mean:.2f}s  jitter (stddev) {jitter:.3f}s" if jitter is not None else ""
+        print(f"  {kind:<10} {format_seconds(histogram)}{suffix}")
+
+    print(f"\nConnections:        {stats.connections} established, {stats.drops} closed or failed, "
+          f"{stats.reconnects} reconnects")
+    print(f"Time to reconnect:  {format_seconds(stats.reconnect_time)}")
+
+    print(f"\nNotifications:      {stats.notifications} received ({stats.duplicates} duplicates)")
+    if stats.notifications:
+        print(f"Acknowledged:       {stats.acked} ({stats.acked / stats.notifications:.1%}), "
+              f"confirmed {stats.confirmed}")
+    print(f"Receive → ack sent: {stats.ack_latency.summary()}")
+    print(f"Ack → confirmed:    {stats.confirm_rtt.summary()}")
+    print(f"Unpaired:           {stats.unacked} never acknowledged, {stats.unconfirmed} never confirmed, "
+          f"{stats.unmatched_acks} acks and {stats.unmatched_confirmations} confirmations without a match")
+    if stats.evicted:
+        print(f"⚠️ {stats.evicted} pending IDs evicted (raise --max-pending)")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Analyze WebSocket listener logs in constant memory')
+    parser.add_argument('paths', nargs='+', help='Log files or directories of websocket_messages*.log files')
+    parser.add_argument('--bucket', type=float, default=60.0, help='Seconds per message-rate bucket')
+    parser.add_argument('--gap', type=float, default=30.0, help='Report silences longer than this many seconds')
+    parser.add_argument('--top', type=int, default=10, help='Number of longest gaps to list')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Files analysed in parallel (one process each)')
+    parser.add_argument('--max-rows', type=int, default=48, help='Maximum rows in the message-rate chart')
+    parser.add_argument('--max-pending', type=int, default=100000,
+                        help='Maximum notifications tracked while waiting for their acknowledgement')
+
+    args = parser.parse_args()
+
+    files = find_logs(args.paths)
+    if not files:
+        parser.error("No websocket_messages*.log files found")
+    missing = [path for path in files if not os.path.isfile(path)]
+    if missing:
+        parser.error(f"Not a file: {missing[0]}")
+
+    workers = max(1, min(args.workers, len(files)))
+    print(f"🔍 Analysing {len(files)} log file(s) with {workers} worker(s)")
+    started = time.perf_counter()
+    total = LogStats(args.bucket, args.top)
+    options = dict(bucket=args.bucket, gap=args.gap, top=args.top, max_pending=args.max_pending)
+    try:
+        if workers == 1:
+            results = (analyze_file(path, **options) for path in files)
+            for path, stats in zip(files, results):
+                print(f"  📄 {os.path.basename(path)}: {stats.records} records, {stats.reconnects} reconnects")
+                total.merge(stats)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(analyze_file, path, **options) for path in files]
+                for path, future in zip(files, futures):
+                    stats = future.result()
+                    print(f"  📄 {os.path.basename(path)}: {stats.records} records, {stats.reconnects} reconnects")
+                    total.merge(stats)
+    except KeyboardInterrupt:
+        print("\n⚠️ Analysis interrupted by user")
+        sys.exit(1)
+
+    print_analysis(total, time.perf_counter() - started, workers, args.gap, args.max_rows)
+
+
+if __name__ == "__main__":
+    main()
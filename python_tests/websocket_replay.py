@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Timed replay of captured WebSocket sessions against a hub or stand-in hub.
+
+Replays the client -> server ("send") frames of one or more captures (the
+listener's JSONL logs, see tools/capture.py) at 1x, Nx or maximum speed
+across many concurrent virtual clients. Captured connections are assigned
+to virtual clients round-robin and keep their original offsets from the
+start of the capture, so bursts stay bursts. Each client negotiates the
+protocol of the connection it replays (JSON, or MessagePack for captures
+with binary frames); server closes and aborts are reported as errors.
+
+Server -> client patterns (e.g. a morning assignment burst) are replayed by
+the stand-in hub instead: signalr_standin_hub.py --replay <capture>.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import websockets
+
+from tools.capture import SEND, load_frames, paced, parse_speed
+from tools.latency_histogram import LatencyHistogram
+from tools.signalr_protocol import (
+    CLOSE,
+    DEFAULT_HUB_URL,
+    HANDSHAKE,
+    INVOCATION,
+    RECORD_SEPARATOR,
+    FrameDecoder,
+    encode_invocation,
+    hub_url,
+    jwt_claims,
+    parse_handshake_response,
+)
+from websocket_load_generator import load_token_pool
+
+try:
+    from tools import signalr_messagepack
+except ImportError:
+    # msgpack not installed: only JSON captures can be replayed
+    signalr_messagepack = None
+
+# Invocations whose first argument is rewritten to the virtual client's own IDs
+_REWRITE_CLAIMS = {'SubscribeToUser': 'nameid', 'JoinOrganisation': 'organisation_id'}
+
+
+class ReplayStats:
+    """Counters shared by all replaying clients."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.connected = 0
+        self.handshake_failures = 0
+        self.errors = {}
+        self.sent = 0
+        self.skipped = 0
+        self.mismatched = 0
+        self.received = {}
+        self.lag = LatencyHistogram()
+
+    def record_error(self, reason: str):
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+
+def session_protocol(frames: list) -> str:
+    """Hub protocol of a captured connection: its captured handshake, else MessagePack if it sent binary frames."""
+    for frame in frames:
+        if isinstance(frame.payload, str) and '"protocol"' in frame.payload:
+            try:
+                return json.loads(frame.payload.split(RECORD_SEPARATOR, 1)[0]).get('protocol', 'json')
+            except ValueError:
+                break
+    return 'messagepack' if any(isinstance(frame.payload, bytes) for frame in frames) else 'json'
+
+
+def rewrite_frame(raw: str, claims: dict, live_acks: bool):
+    """Rewrite subscribe arguments for this client's token; returns None to skip the frame."""
+    records = []
+    for record in raw.split(RECORD_SEPARATOR):
+        if not record:
+            continue
+        try:
+            message = json.loads(record)
+        except ValueError:
+            records.append(record)
+            continue
+        target = message.get('target')
+        if live_acks and target == 'AcknowledgeDelivery':
+            continue
+        claim = claims.get(_REWRITE_CLAIMS.get(target, ''))
+        if claim and message.get('arguments'):
+            message['arguments'][0] = claim
+            record = json.dumps(message, separators=(',', ':'))
+        records.append(record)
+    return ''.join(r + RECORD_SEPARATOR for r in records) or None
+
+
+def rewrite_binary_frame(raw: bytes, claims: dict, live_acks: bool):
+    """MessagePack counterpart of rewrite_frame; messages that are not rewritten are sent unchanged."""
+    records = []
+    offset = 0
+    while offset < len(raw):
+        length, start = signalr_messagepack.decode_varint(raw, offset)
+        if length is None or start + length > len(raw):
+            records.append(raw[offset:])
+            break
+        record = raw[offset:start + length]
+        offset = start + length
+        message = signalr_messagepack.decode_frame(record)[0]
+        target = message.get('target')
+        if live_acks and target == 'AcknowledgeDelivery':
+            continue
+        claim = claims.get(_REWRITE_CLAIMS.get(target, ''))
+        if claim and message.get('arguments'):
+            record = signalr_messagepack.encode_invocation(target, [claim, *message['arguments'][1:]],
+                                                           message.get('invocationId'))
+        records.append(record)
+    return b''.join(records) or None
+
+
+async def replay_client(url: str, token: str, frames: list, origin: float, started: float, speed: float,
+                        stats: ReplayStats, live_acks: bool, handshake_timeout: float):
+    """Connect one virtual client and replay its share of the captured send frames.
+
+    The session negotiates the protocol of the captured connection; frames of
+    the other protocol (mixed captures) are skipped and counted as mismatched.
+    """
+    claims = jwt_claims(token)
+    protocol = session_protocol(frames)
+    binary = protocol == 'messagepack'
+    if binary and signalr_messagepack is None:
+        stats.record_error("MessagePack capture needs msgpack installed")
+        return
+    # Captured handshakes are replaced by a fresh one
+    frames = [f for f in frames if not (isinstance(f.payload, str) and '"protocol"' in f.payload)]
+    try:
+        async with websockets.connect(hub_url(url, token), open_timeout=handshake_timeout, max_queue=None) as ws:
+            await ws.send(signalr_messagepack.HANDSHAKE if binary else HANDSHAKE)
+            response = await asyncio.wait_for(ws.recv(), handshake_timeout)
+            rest = None
+            if binary:
+                # Binary messages may follow the handshake in the same frame
+                response, rest = signalr_messagepack.split_handshake(response)
+            error = parse_handshake_response(response)
+            if error:
+                stats.handshake_failures += 1
+                stats.record_error(error)
+                return
+            stats.connected += 1
+            if binary:
+                decoder = signalr_messagepack.FrameDecoder()
+                encode_ack = signalr_messagepack.encode_invocation
+            else:
+                decoder = FrameDecoder()
+                encode_ack = encode_invocation
+
+            async def handle(messages) -> bool:
+                """Count received invocations; returns True once the hub sent a Close message."""
+                for message in messages:
+                    if message.get('type') == CLOSE:
+                        stats.record_error(f"server closed: {message.get('error') or 'no error given'}")
+                        return True
+                    if message.get('type') != INVOCATION:
+                        continue
+                    target = message.get('target')
+                    stats.received[target] = stats.received.get(target, 0) + 1
+                    if live_acks and target == 'ReceiveNotification' and message.get('arguments'):
+                        notification_id = message['arguments'][0].get('notificationId')
+                        if notification_id:
+                            await ws.send(encode_ack("AcknowledgeDelivery", [notification_id]))
+                return False
+
+            async def receive():
+                # The receiver is cancelled before we close, so any end of the stream is the server's doing
+                try:
+                    if rest and await handle(decoder.feed(rest)):
+                        return
+                    async for raw in ws:
+                        if isinstance(raw, bytes) == binary and await handle(decoder.feed(raw)):
+                            return
+                except websockets.ConnectionClosedError as e:
+                    stats.record_error(f"connection aborted ({e.rcvd.code if e.rcvd else 'no close frame'})")
+                    return
+                stats.record_error(f"connection closed by server ({ws.close_code})")
+
+            receiver = asyncio.create_task(receive())
+            try:
+                async for frame, lag in paced(frames, speed, origin, started):
+                    payload = frame.payload
+                    if isinstance(payload, bytes) != binary:
+                        stats.mismatched += 1
+                        continue
+                    payload = (rewrite_binary_frame if binary else rewrite_frame)(payload, claims, live_acks)
+                    if payload is None:
+                        stats.skipped += 1
+                        continue
+                    try:
+                        await ws.send(payload)
+                    except websockets.ConnectionClosed:
+                        # Reported by the receiver
+                        await receiver
+                        return
+                    stats.sent += 1
+                    stats.lag.record(lag)
+                # Give the server a moment to answer the last invocations
+                await asyncio.sleep(1.0)
+            finally:
+                receiver.cancel()
+
+    except asyncio.TimeoutError:
+        stats.handshake_failures += 1
+        stats.record_error("handshake timed out")
+    except Exception as e:
+        stats.record_error(type(e).__name__ + (f": {e}" if str(e) else ""))
+
+
+async def run_replay(captures, url: str, tokens: list, clients: int, speed: float, live_acks: bool,
+                     handshake_timeout: float) -> ReplayStats:
+    frames = load_frames(captures, direction=SEND)
+    stats = ReplayStats()
+    if not frames:
+        print("ℹ️ No client -> server frames in the capture")
+        print("💡 Replay server -> client traffic with: signalr_standin_hub.py --replay <capture>")
+        return stats
+
+    streams = {}
+    for frame in frames:
+        streams.setdefault(frame.conn, []).append(frame)
+    sessions = list(streams.values())
+    span = frames[-1].ts - frames[0].ts
+    pace = f"{speed:g}x" if speed else "max speed"
+    print(f"🔁 Replaying {len(frames)} frames from {len(sessions)} captured connection(s) "
+          f"({span:.1f}s captured) with {clients} virtual clients at {pace}")
+
+    origin = frames[0].ts
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        replay_client(url, tokens[i % len(tokens)], sessions[i % len(sessions)], origin, started, speed,
+                      stats, live_acks, handshake_timeout)
+        for i in range(clients)))
+    return stats
+
+
+def print_replay_report(stats: ReplayStats):
+    elapsed = time.perf_counter() - stats.started
+    print("\n📊 Replay summary")
+    print("=" * 60)
+    print(f"Elapsed:            {elapsed:.1f}s")
+    print(f"Clients connected:  {stats.connected} (handshake failures {stats.handshake_failures})")
+    print(f"Frames sent:        {stats.sent} ({stats.sent / elapsed:.1f}/s, {stats.skipped} skipped, "
+          f"{stats.mismatched} of the other protocol)")
+    print(f"Schedule lag:       {stats.lag.summary()}")
+    for target, count in sorted(stats.received.items(), key=lambda item: -item[1]):
+        print(f"  • received {target}: {count}")
+    if stats.errors:
+        print("\n❌ Errors:")
+        for reason, count in sorted(stats.errors.items(), key=lambda item: -item[1]):
+            print(f"  • {reason}: {count}")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Replay captured WebSocket sessions against a SignalR hub')
+    parser.add_argument('captures', nargs='+', help='Capture files (listener JSONL logs or older text logs)')
+    parser.add_argument('--url', default=DEFAULT_HUB_URL, help='Hub WebSocket URL (without access_token)')
+    parser.add_argument('--api-url', default='http://localhost:8080', help='API base URL used for --login')
+    parser.add_argument('--clients', type=int, default=1, help='Concurrent virtual clients')
+    parser.add_argument('--speed', default='1', help="Replay speed: 1, N (e.g. 10) or 'max'")
+    parser.add_argument('--tokens-file', help='File with one JWT per line (or a JSON list)')
+    parser.add_argument('--token', action='append', help='JWT to add to the pool (repeatable)')
+    parser.add_argument('--login', action='append', metavar='ROLE',
+                        help='Log in with the test credentials for ROLE and add the token (repeatable)')
+    parser.add_argument('--live-acks', action='store_true',
+                        help='Drop captured AcknowledgeDelivery frames and acknowledge what is actually received')
+    parser.add_argument('--handshake-timeout', type=float, default=15.0, help='Seconds to wait for the handshake')
+
+    args = parser.parse_args()
+
+    try:
+        speed = parse_speed(args.speed)
+    except ValueError:
+        parser.error("--speed must be a positive number or 'max'")
+    tokens = load_token_pool(args.tokens_file, args.token, args.login, args.api_url)
+    if not tokens:
+        parser.error("No tokens: pass --tokens-file, --token or --login")
+
+    try:
+        stats = asyncio.run(run_replay(args.captures, args.url, tokens, args.clients, speed, args.live_acks,
+                                       args.handshake_timeout))
+    except KeyboardInterrupt:
+        print("\n⚠️ Replay interrupted by user")
+        return
+    print_replay_report(stats)
+
+
+if __name__ == "__main__":
+    main()
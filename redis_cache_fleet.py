@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Parallel Redis cache clearing across several endpoints, logical DBs or the
+master nodes of a Redis Cluster.
+
+Every node is scanned and cleared concurrently with asyncio, so a fleet-wide
+flush takes as long as the slowest node instead of the sum of all nodes.
+Used by clear_redis_cache.py (--nodes / --dbs / --cluster) but can also be
+run on its own.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import redis
+import redis.asyncio as aioredis
+from redis.asyncio.cluster import RedisCluster
+from redis.crc import key_slot
+
+from clear_redis_cache import (
+    BATCH_SIZE,
+    KEY_PREFIX,
+    LUA_BUDGET_MS,
+    LUA_SCAN_UNLINK,
+    LUA_UNLINK_CHUNK,
+    NODE_CONCURRENCY,
+    SCAN_COUNT,
+    UNLINK_CHUNK,
+    KeyMatcher,
+    ScanDeleteStats,
+    family_patterns,
+    format_latencies,
+)
+
+
+class Endpoint:
+    """A single Redis node / logical database to clear.
+
+    ``cluster`` marks a Redis Cluster master, where a multi-key UNLINK must
+    only name keys of one hash slot.
+    """
+
+    def __init__(self, host, port, db=0, password=None, url=None, cluster=False):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.url = url
+        self.cluster = cluster
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}/{self.db}"
+
+    def connect(self):
+        if self.url:
+            return aioredis.from_url(self.url, decode_responses=True)
+        return aioredis.Redis(host=self.host, port=self.port, db=self.db,
+                              password=self.password, decode_responses=True)
+
+
+class NodeResult:
+    """Outcome of clearing a single endpoint."""
+
+    def __init__(self, endpoint: Endpoint):
+        self.endpoint = endpoint
+        self.stats = ScanDeleteStats()
+        self.matched = 0
+        self.error = None
+
+
+def default_password():
+    return os.getenv('REDIS_PASSWORD', 'redis_password_123')
+
+
+def parse_endpoint(spec: str) -> Endpoint:
+    """Parse ``redis://...`` URLs or ``host[:port][/db]`` specs."""
+    if spec.startswith(('redis://', 'rediss://')):
+        pool_kwargs = aioredis.connection.parse_url(spec)
+        return Endpoint(pool_kwargs.get('host', 'localhost'), pool_kwargs.get('port', 6379),
+                        pool_kwargs.get('db', 0), url=spec)
+
+    address, _, db = spec.partition('/')
+    host, _, port = address.partition(':')
+    return Endpoint(host or os.getenv('REDIS_HOST', 'localhost'),
+                    int(port or os.getenv('REDIS_PORT', 6379)),
+                    int(db or 0), password=default_password())
+
+
+def endpoints_for_dbs(dbs) -> list:
+    """Expand a list of logical DB numbers on REDIS_HOST/REDIS_PORT into endpoints."""
+    host = os.getenv('REDIS_HOST', 'localhost')
+    port = int(os.getenv('REDIS_PORT', 6379))
+    return [Endpoint(host, port, int(db), password=default_password()) for db in dbs]
+
+
+async def discover_cluster_masters(seed: Endpoint) -> list:
+    """Return one endpoint per master node of the cluster reachable through ``seed``."""
+    cluster = RedisCluster(host=seed.host, port=seed.port, password=seed.password,
+                           decode_responses=True)
+    try:
+        await cluster.initialize()
+        return [Endpoint(node.host, node.port, 0, password=seed.password, cluster=True)
+                for node in cluster.get_primaries()]
+    finally:
+        await cluster.close()
+
+
+def _slot_groups(keys) -> list:
+    """Split keys into per-hash-slot lists, avoiding CROSSSLOT errors on a cluster node."""
+    groups = {}
+    for key in keys:
+        groups.setdefault(key_slot(key.encode()), []).append(key)
+    return list(groups.values())
+
+
+async def _unlink(client, keys, cluster=False) -> int:
+    pipe = client.pipeline(transaction=False)
+    for group in _slot_groups(keys) if cluster else [keys]:
+        for i in range(0, len(group), UNLINK_CHUNK):
+            pipe.unlink(*group[i:i + UNLINK_CHUNK])
+    return sum(await pipe.execute())
+
+
+async def clear_node(endpoint: Endpoint, matcher: KeyMatcher = None, scan_count=SCAN_COUNT,
+                     batch_size=BATCH_SIZE, concurrency=NODE_CONCURRENCY, dry_run=False) -> NodeResult:
+    """SCAN one node and UNLINK matching keys with up to ``concurrency`` pipelines in flight.
+
+    At most ``concurrency`` batches are buffered, so memory stays bounded even
+    when the node is slower to delete than to scan.
+    """
+    result = NodeResult(endpoint)
+    stats = result.stats
+    match = matcher.scan_match if matcher is not None else '*'
+    key_filter = matcher if matcher is not None and matcher.needs_client_filter else None
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+    client = endpoint.connect()
+
+    async def run_batch(keys):
+        try:
+            started = time.perf_counter()
+            stats.deleted += await _unlink(client, keys, endpoint.cluster)
+            stats.call_times.append(time.perf_counter() - started)
+            stats.batches += 1
+        finally:
+            slots.release()
+
+    async def submit(keys):
+        await slots.acquire()
+        task = asyncio.create_task(run_batch(keys))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    try:
+        batch = []
+        cursor = 0
+        while True:
+            cursor, keys = await client.scan(cursor=cursor, match=match, count=scan_count)
+            stats.scan_calls += 1
+            stats.scanned += len(keys)
+            for key in keys:
+                if key_filter is not None and not key_filter(key):
+                    continue
+                result.matched += 1
+                if dry_run:
+                    continue
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    await submit(batch)
+                    batch = []
+            if cursor == 0:
+                break
+        if batch:
+            await submit(batch)
+        if pending:
+            await asyncio.gather(*pending)
+    except Exception as e:
+        result.error = e
+        for task in pending:
+            task.cancel()
+    finally:
+        await client.close()
+
+    return result
+
+
+async def lua_clear_node(endpoint: Endpoint, matcher: KeyMatcher = None, scan_count=SCAN_COUNT,
+                         budget_ms=LUA_BUDGET_MS) -> NodeResult:
+    """Clear one node with the server-side Lua script from clear_redis_cache.
+
+    On a cluster node the script UNLINKs one key per call, since the keys of
+    a SCAN page span many hash slots.
+    """
+    result = NodeResult(endpoint)
+    stats = result.stats
+    match = matcher.scan_match if matcher is not None else '*'
+    lua_patterns = matcher.lua_patterns if matcher is not None else []
+    chunk = 1 if endpoint.cluster else LUA_UNLINK_CHUNK
+    client = endpoint.connect()
+
+    try:
+        sha = await client.script_load(LUA_SCAN_UNLINK)
+        cursor = '0'
+        while True:
+            started = time.perf_counter()
+            try:
+                cursor, scanned, deleted, server_us = await client.evalsha(
+                    sha, 0, cursor, match, scan_count, int(budget_ms * 1000), chunk, *lua_patterns)
+            except redis.exceptions.NoScriptError:
+                sha = await client.script_load(LUA_SCAN_UNLINK)
+                continue
+            stats.call_times.append(time.perf_counter() - started)
+            stats.server_times.append(int(server_us) / 1_000_000)
+            stats.batches += 1
+            stats.scanned += int(scanned)
+            stats.deleted += int(deleted)
+            if str(cursor) == '0':
+                break
+        result.matched = stats.deleted
+    except Exception as e:
+        result.error = e
+    finally:
+        await client.close()
+
+    return result
+
+
+async def clear_fleet(endpoints, patterns=None, key_prefix=KEY_PREFIX, scan_count=SCAN_COUNT,
+                      batch_size=BATCH_SIZE, concurrency=NODE_CONCURRENCY, dry_run=False,
+                      lua=False, lua_budget_ms=LUA_BUDGET_MS):
+    """Clear all endpoints concurrently and return ``(results, wall_seconds)``."""
+    matcher = KeyMatcher(patterns, key_prefix=key_prefix) if patterns else None
+    started = time.perf_counter()
+    if lua and not dry_run:
+        jobs = [lua_clear_node(e, matcher, scan_count, lua_budget_ms) for e in endpoints]
+    else:
+        jobs = [clear_node(e, matcher, scan_count, batch_size, concurrency, dry_run) for e in endpoints]
+    results = await asyncio.gather(*jobs)
+    return results, time.perf_counter() - started
+
+
+def print_fleet_report(results, wall_seconds, dry_run=False):
+    """Print per-node results and the aggregated fleet totals."""
+    print("\n📊 Per-node results:")
+    print(f"  {'endpoint':<28} {'matched' if dry_run else 'deleted':>10} {'scanned':>10} "
+          f"{'batches':>8} {'elapsed':>9} {'keys/s':>10}")
+    for result in results:
+        stats = result.stats
+        if result.error:
+            print(f"  {result.endpoint.name:<28} ❌ {result.error}")
+            continue
+        count = result.matched if dry_run else stats.deleted
+        rate = count / stats.elapsed if stats.elapsed > 0 else 0.0
+        print(f"  {result.endpoint.name:<28} {count:>10} {stats.scanned:>10} "
+              f"{stats.batches:>8} {stats.elapsed:>8.2f}s {rate:>10,.0f}")
+
+    succeeded = [r for r in results if not r.error]
+    total = sum(r.matched if dry_run else r.stats.deleted for r in succeeded)
+    node_seconds = sum(r.stats.elapsed for r in succeeded)
+    slowest = max((r.stats.elapsed for r in succeeded), default=0.0)
+    all_calls = [t for r in succeeded for t in r.stats.call_times]
+
+    print(f"\n📈 Fleet: {total} keys {'matched' if dry_run else 'deleted'} on "
+          f"{len(succeeded)}/{len(results)} nodes in {wall_seconds:.2f}s wall "
+          f"(slowest node {slowest:.2f}s, sum of nodes {node_seconds:.2f}s)")
+    if all_calls:
+        print(f"⏱️ Per-call timings: {format_latencies(all_calls)}")
+
+
+def run_fleet(endpoint_specs=(), dbs=(), cluster_seed=None, patterns=None, key_prefix=KEY_PREFIX,
+              scan_count=SCAN_COUNT, batch_size=BATCH_SIZE, concurrency=NODE_CONCURRENCY,
+              dry_run=False, assume_yes=False, lua=False, lua_budget_ms=LUA_BUDGET_MS) -> bool:
+    """Resolve endpoints, confirm, clear them concurrently and print the report."""
+    try:
+        endpoints = [parse_endpoint(spec) for spec in endpoint_specs] + endpoints_for_dbs(dbs)
+        if cluster_seed:
+            print(f"🔄 Discovering cluster masters via {cluster_seed}...")
+            endpoints += asyncio.run(discover_cluster_masters(parse_endpoint(cluster_seed)))
+
+        if not endpoints:
+            print("❌ No endpoints given")
+            return False
+
+        print(f"🎯 {len(endpoints)} endpoints: {', '.join(e.name for e in endpoints)}")
+        if patterns:
+            print(f"🎯 Patterns: {', '.join(key_prefix + p for p in patterns)}")
+        elif not dry_run and not assume_yes:
+            print("\n⚠️ About to delete ALL keys on every endpoint")
+            response = input("Do you want to continue? (y/N): ").strip().lower()
+            if response not in ['y', 'yes']:
+                print("❌ Operation cancelled")
+                return False
+
+        results, wall_seconds = asyncio.run(clear_fleet(
+            endpoints, patterns=patterns, key_prefix=key_prefix, scan_count=scan_count,
+            batch_size=batch_size, concurrency=concurrency, dry_run=dry_run,
+            lua=lua, lua_budget_ms=lua_budget_ms))
+        print_fleet_report(results, wall_seconds, dry_run=dry_run)
+        return not any(r.error for r in results)
+
+    except Exception as e:
+        print(f"❌ Error clearing Redis fleet: {e}")
+        return False
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Parallel Redis Cache Clearing Tool')
+    parser.add_argument('--nodes', default='', help='Comma-separated host[:port][/db] specs or redis:// URLs')
+    parser.add_argument('--dbs', default='', help='Comma-separated logical DBs on REDIS_HOST:REDIS_PORT')
+    parser.add_argument('--cluster', metavar='HOST:PORT', help='Discover and clear every cluster master')
+    parser.add_argument('--family', action='append', default=[], help='CacheKeys family to clear (repeatable)')
+    parser.add_argument('--key-prefix', default=KEY_PREFIX, help='Instance prefix prepended to family patterns')
+    parser.add_argument('--concurrency', type=int, default=NODE_CONCURRENCY,
+                        help='UNLINK pipelines in flight per node')
+    parser.add_argument('--scan-count', type=int, default=SCAN_COUNT, help='COUNT hint passed to each SCAN call')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Keys removed per pipelined UNLINK')
+    parser.add_argument('--dry-run', action='store_true', help='Count matching keys without deleting them')
+    parser.add_argument('--yes', action='store_true', help='Skip the confirmation prompt')
+
+    args = parser.parse_args()
+
+    patterns = [p for family in args.family for f in family.split(',') if f.strip()
+                for p in family_patterns(f.strip())]
+    success = run_fleet(
+        endpoint_specs=[s for s in args.nodes.split(',') if s.strip()],
+        dbs=[d for d in args.dbs.split(',') if d.strip()],
+        cluster_seed=args.cluster, patterns=patterns or None, key_prefix=args.key_prefix,
+        scan_count=args.scan_count, batch_size=args.batch_size, concurrency=args.concurrency,
+        dry_run=args.dry_run, assume_yes=args.yes)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Redis cache keyspace profiler.
+
+Streams the keyspace with SCAN, pipelines MEMORY USAGE / TTL / TYPE for each
+batch and reports, per CacheKeys family, the key count, total and p50/p99
+bytes and the TTL distribution compared with the expirations configured in
+CacheKeys. Run it before clearing to see which families actually use memory.
+
+SCAN walks the hash table in an effectively random order, so stopping after a
+fraction of the keyspace (--sample) yields a uniform sample; counts and bytes
+are then extrapolated from DBSIZE.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import redis
+
+from clear_redis_cache import (
+    CACHE_EXPIRATIONS,
+    CACHE_FAMILIES,
+    DEFAULT_EXPIRATION,
+    KEY_PREFIX,
+    SCAN_COUNT,
+    batched,
+    get_redis_connection,
+    percentile,
+    print_connection_help,
+    scan_keys,
+)
+
+# Keys profiled per pipelined round trip
+PROFILE_BATCH_SIZE = 500
+
+# Values kept per family for percentile estimates
+RESERVOIR_SIZE = 10000
+
+# Most specific families first so "template:published" wins over "template"
+_FAMILIES_BY_SPECIFICITY = sorted(CACHE_FAMILIES, key=len, reverse=True)
+
+
+class Reservoir:
+    """Fixed-size uniform sample of a stream of numbers."""
+
+    def __init__(self, size=RESERVOIR_SIZE, rng=None):
+        self.size = size
+        self.seen = 0
+        self.values = []
+        self._rng = rng or random.Random(0)
+
+    def add(self, value):
+        self.seen += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            slot = self._rng.randrange(self.seen)
+            if slot < self.size:
+                self.values[slot] = value
+
+    def percentile(self, pct: float):
+        if not self.values:
+            return None
+        return percentile(sorted(self.values), pct)
+
+
+class FamilyProfile:
+    """Aggregated statistics for one key family."""
+
+    def __init__(self, family: str):
+        self.family = family
+        self.configured_ttl = CACHE_EXPIRATIONS.get(family.split(':')[0], DEFAULT_EXPIRATION)
+        self.keys = 0
+        self.total_bytes = 0
+        self.sizes = Reservoir()
+        self.ttls = Reservoir()
+        self.types = {}
+        self.no_ttl = 0
+        self.over_ttl = 0
+        # TTL remaining as a share of the configured expiration
+        self.ttl_buckets = {'0-25%': 0, '25-50%': 0, '50-75%': 0, '75-100%': 0}
+
+    def add(self, size: int, ttl: int, key_type: str):
+        self.keys += 1
+        self.total_bytes += size
+        self.sizes.add(size)
+        self.types[key_type] = self.types.get(key_type, 0) + 1
+
+        if ttl == -1:
+            self.no_ttl += 1
+            return
+        self.ttls.add(ttl)
+        if ttl > self.configured_ttl:
+            self.over_ttl += 1
+            return
+        share = ttl / self.configured_ttl
+        bucket = '0-25%' if share < 0.25 else '25-50%' if share < 0.5 else '50-75%' if share < 0.75 else '75-100%'
+        self.ttl_buckets[bucket] += 1
+
+    def to_dict(self, scale: float = 1.0) -> dict:
+        return {
+            'family': self.family,
+            'keys': self.keys,
+            'estimated_keys': round(self.keys * scale),
+            'total_bytes': self.total_bytes,
+            'estimated_bytes': round(self.total_bytes * scale),
+            'p50_bytes': self.sizes.percentile(50),
+            'p99_bytes': self.sizes.percentile(99),
+            'types': self.types,
+            'configured_ttl': self.configured_ttl,
+            'p50_ttl': self.ttls.percentile(50),
+            'p99_ttl': self.ttls.percentile(99),
+            'no_ttl': self.no_ttl,
+            'over_configured_ttl': self.over_ttl,
+            'ttl_buckets': self.ttl_buckets,
+        }
+
+
+def classify_key(key: str, key_prefix: str = KEY_PREFIX) -> str:
+    """Map a Redis key to its CacheKeys family (or its first segment)."""
+    if key_prefix and key.startswith(key_prefix):
+        key = key[len(key_prefix):]
+    for family in _FAMILIES_BY_SPECIFICITY:
+        if key == family or key.startswith(family + ':'):
+            return family
+    head = key.split(':', 1)[0]
+    return f"other:{head}" if head != key else 'other'
+
+
+def profile_keyspace(r, key_prefix=KEY_PREFIX, sample_rate=1.0, scan_count=SCAN_COUNT,
+                     batch_size=PROFILE_BATCH_SIZE):
+    """Profile the keyspace and return ``(profiles, examined, scale, elapsed)``."""
+    started = time.perf_counter()
+    dbsize = r.dbsize()
+    target = dbsize if sample_rate >= 1.0 else max(1, int(dbsize * sample_rate))
+    profiles = {}
+    examined = 0
+
+    keys = scan_keys(r, match='*', count=scan_count)
+    for batch in batched(keys, batch_size):
+        pipe = r.pipeline(transaction=False)
+        for key in batch:
+            pipe.memory_usage(key)
+            pipe.ttl(key)
+            pipe.type(key)
+        replies = pipe.execute()
+
+        for i, key in enumerate(batch):
+            size, ttl, key_type = replies[3 * i:3 * i + 3]
+            if size is None or ttl == -2:
+                # Expired or deleted between SCAN and the pipeline
+                continue
+            family = classify_key(key, key_prefix)
+            if family not in profiles:
+                profiles[family] = FamilyProfile(family)
+            profiles[family].add(int(size), int(ttl), key_type)
+
+        examined += len(batch)
+        if examined >= target:
+            break
+
+    scale = dbsize / examined if examined and sample_rate < 1.0 else 1.0
+    return profiles, examined, scale, time.perf_counter() - started
+
+
+def format_bytes(value: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(value) < 1024:
+            return f"{value:.0f}{unit}" if unit == 'B' else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}TB"
+
+
+def format_duration(seconds: float) -> str:
+    if seconds is None:
+        return "-"
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    if seconds >= 60:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds:.0f}s"
+
+
+def print_profile(profiles, examined, scale, elapsed):
+    """Print the per-family report, largest memory users first."""
+    rows = sorted(profiles.values(), key=lambda p: p.total_bytes, reverse=True)
+    total_bytes = sum(p.total_bytes for p in rows) or 1
+
+    sampled = f", sampled, x{scale:.1f} extrapolation" if scale != 1.0 else ""
+    print(f"\n📊 Keyspace profile ({examined} keys examined in {elapsed:.2f}s{sampled})")
+    print("=" * 118)
+    print(f"{'family':<26} {'keys':>10} {'memory':>10} {'share':>6} {'p50':>8} {'p99':>8} "
+          f"{'ttl cfg':>7} {'ttl p50':>7} {'ttl p99':>7} {'no ttl':>7} {'>cfg':>6}  types")
+    for p in rows:
+        types = ','.join(f"{t}:{n}" for t, n in sorted(p.types.items()))
+        print(f"{p.family:<26} {round(p.keys * scale):>10} {format_bytes(p.total_bytes * scale):>10} "
+              f"{p.total_bytes / total_bytes:>6.1%} {format_bytes(p.sizes.percentile(50)):>8} "
+              f"{format_bytes(p.sizes.percentile(99)):>8} {format_duration(p.configured_ttl):>7} "
+              f"{format_duration(p.ttls.percentile(50)):>7} {format_duration(p.ttls.percentile(99)):>7} "
+              f"{round(p.no_ttl * scale):>7} {round(p.over_ttl * scale):>6}  {types}")
+
+    print("\n⏳ Remaining TTL as a share of the configured expiration:")
+    for p in rows:
+        with_ttl = sum(p.ttl_buckets.values()) or 1
+        buckets = '  '.join(f"{name}: {count / with_ttl:>4.0%}" for name, count in p.ttl_buckets.items())
+        print(f"  {p.family:<26} {buckets}")
+
+    suspicious = [p for p in rows if p.no_ttl or p.over_ttl]
+    if suspicious:
+        print("\n⚠️ Families with keys that never expire or outlive the configured expiration:")
+        for p in suspicious:
+            print(f"  • {p.family}: ~{round(p.no_ttl * scale)} without TTL, "
+                  f"~{round(p.over_ttl * scale)} above {format_duration(p.configured_ttl)}")
+
+
+def run_profile(key_prefix=KEY_PREFIX, sample_rate=1.0, scan_count=SCAN_COUNT, output=None) -> bool:
+    """Connect, profile the keyspace and print (and optionally save) the report."""
+    try:
+        r = get_redis_connection()
+        rate = f"{sample_rate:.2%} sample" if sample_rate < 1.0 else "full scan"
+        print(f"🔄 Profiling keyspace ({rate})...")
+        profiles, examined, scale, elapsed = profile_keyspace(
+            r, key_prefix=key_prefix, sample_rate=sample_rate, scan_count=scan_count)
+
+        if not profiles:
+            print("ℹ️ No cache keys found")
+            return True
+
+        print_profile(profiles, examined, scale, elapsed)
+
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'examined': examined,
+                    'scale': scale,
+                    'elapsed_seconds': elapsed,
+                    'families': [p.to_dict(scale) for p in profiles.values()],
+                }, f, indent=2)
+            print(f"\n💾 Profile written to {output}")
+
+        return True
+
+    except redis.ConnectionError as e:
+        print(f"❌ Failed to connect to Redis: {e}")
+        print_connection_help()
+        return False
+
+    except Exception as e:
+        print(f"❌ Error profiling Redis cache: {e}")
+        return False
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Redis Cache Keyspace Profiler')
+    parser.add_argument('--sample', type=float, default=1.0,
+                        help='Fraction of the keyspace to examine (0 < rate <= 1)')
+    parser.add_argument('--key-prefix', default=KEY_PREFIX, help='Instance prefix stripped before classifying keys')
+    parser.add_argument('--scan-count', type=int, default=SCAN_COUNT, help='COUNT hint passed to each SCAN call')
+    parser.add_argument('--output', help='Write the profile as JSON to this file')
+
+    args = parser.parse_args()
+
+    success = run_profile(key_prefix=args.key_prefix, sample_rate=args.sample,
+                          scan_count=args.scan_count, output=args.output)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Redis-vs-Postgres cache staleness checker.
+
+Scans the entity caches (template:id:*, user:id:*, org:id:*) in one SCAN pass
+and checks them in batches: the cached values of a batch are fetched in one
+pipelined round trip and the matching rows with one ``WHERE id = ANY(%s)``
+query per family. Only divergent keys are reported, and with --delete-stale
+only those keys are removed, so a large cache is repaired in one linear pass
+instead of being flushed.
+
+IDistributedCache stores each entry as a hash, so values are read with
+pipelined HGET <key> data rather than MGET.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import redis
+
+from clear_redis_cache import (
+    KEY_PREFIX,
+    SCAN_COUNT,
+    KeyMatcher,
+    add_database_arguments,
+    batched,
+    database_params,
+    family_patterns,
+    get_redis_connection,
+    print_connection_help,
+    scan_keys,
+    unlink_batch,
+)
+from redis_cache_warmer import DatabaseQueryTool, serialize, to_entity
+
+# Keys checked per batch (one pipeline + one query per family)
+CHECK_BATCH_SIZE = 500
+
+# Cache family -> (table, primary key column)
+ENTITY_TABLES = {
+    'template:id': ('template', 'template_id'),
+    'user:id': ('users', 'user_id'),
+    'org:id': ('organisation', 'organisation_id'),
+}
+
+_ISO_DATETIME = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?$')
+
+
+class StalenessStats:
+    """Counters for a staleness check."""
+
+    def __init__(self):
+        self.checked = {family: 0 for family in ENTITY_TABLES}
+        self.stale = {family: 0 for family in ENTITY_TABLES}
+        self.missing_rows = {family: 0 for family in ENTITY_TABLES}
+        self.deleted = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def normalize(value):
+    """Normalise a JSON value so cached .NET output and database rows compare equal."""
+    if isinstance(value, str) and _ISO_DATETIME.match(value):
+        # .NET trims trailing fractional zeros and may write up to 7 digits
+        text = value.replace('Z', '+00:00')
+        if '.' in text:
+            head, _, tail = text.partition('.')
+            digits = re.match(r'\d+', tail).group()
+            text = f"{head}.{digits[:6].ljust(6, '0')}{tail[len(digits):]}"
+        parsed = datetime.fromisoformat(text)
+        return parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed
+    if isinstance(value, str) and len(value) == 36 and value.count('-') == 4:
+        return value.lower()
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    return value
+
+
+def diff_entity(cached: dict, row_entity: dict) -> list:
+    """Return the properties whose cached value differs from the database row."""
+    fields = []
+    for name, db_value in row_entity.items():
+        if name not in cached:
+            continue
+        if normalize(cached[name]) != normalize(db_value):
+            fields.append(name)
+    return fields
+
+
+def family_of(key: str, key_prefix: str) -> str:
+    body = key[len(key_prefix):] if key_prefix and key.startswith(key_prefix) else key
+    for family in ENTITY_TABLES:
+        if body.startswith(family + ':'):
+            return family
+    return None
+
+
+def fetch_rows(db: DatabaseQueryTool, query: str, params: tuple) -> list:
+    """Run a query on the tool's cursor, raising on failure.
+
+    execute_query() returns [] on errors, which here would look like every
+    row had been deleted and mark the whole batch stale.
+    """
+    db.cursor.execute(query, params)
+    return db.cursor.fetchall()
+
+
+def is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def check_batch(r, db: DatabaseQueryTool, keys, key_prefix: str, stats: StalenessStats):
+    """Check one batch of keys and return ``(key, reason)`` for every divergent entry."""
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.hget(key, 'data')
+    values = pipe.execute()
+
+    by_family = {}
+    for key, data in zip(keys, values):
+        if data is None:
+            # Expired or evicted since the SCAN
+            continue
+        family = family_of(key, key_prefix)
+        entity_id = key.rsplit(':', 1)[-1].lower()
+        by_family.setdefault(family, []).append((key, entity_id, data))
+
+    divergent = []
+    for family, entries in by_family.items():
+        malformed = [(key, 'key does not end in a GUID') for key, entity_id, _ in entries if not is_uuid(entity_id)]
+        if malformed:
+            by_family[family] = [entry for entry in entries if is_uuid(entry[1])]
+            stats.checked[family] += len(malformed)
+            stats.stale[family] += len(malformed)
+            divergent.extend(malformed)
+
+    for family, entries in by_family.items():
+        table, id_column = ENTITY_TABLES[family]
+        ids = [entity_id for _, entity_id, _ in entries]
+        if not ids:
+            continue
+        rows = fetch_rows(db, f"SELECT * FROM {table} WHERE {id_column} = ANY(%s::uuid[]);", (ids,))
+        # Round-trip rows through the cache serialiser so both sides share one representation
+        current = {str(row[id_column]).lower(): json.loads(serialize(to_entity(row, table))) for row in rows}
+
+        stats.checked[family] += len(entries)
+        for key, entity_id, data in entries:
+            row_entity = current.get(entity_id)
+            if row_entity is None:
+                stats.missing_rows[family] += 1
+                stats.stale[family] += 1
+                divergent.append((key, 'row no longer exists'))
+                continue
+            try:
+                cached = json.loads(data)
+            except ValueError:
+                stats.stale[family] += 1
+                divergent.append((key, 'cached value is not valid JSON'))
+                continue
+            fields = diff_entity(cached, row_entity)
+            if fields:
+                stats.stale[family] += 1
+                divergent.append((key, f"differs in {', '.join(fields)}"))
+
+    return divergent
+
+
+def check_staleness(r, db: DatabaseQueryTool, families=tuple(ENTITY_TABLES), key_prefix=KEY_PREFIX,
+                    scan_count=SCAN_COUNT, batch_size=CHECK_BATCH_SIZE, delete=False) -> StalenessStats:
+    """Walk the entity caches once, printing divergent keys and optionally removing them."""
+    stats = StalenessStats()
+    patterns = [p for family in families for p in family_patterns(family)]
+    matcher = KeyMatcher(patterns, key_prefix=key_prefix)
+    keys = filter(matcher, scan_keys(r, match=matcher.scan_match, count=scan_count))
+
+    for batch in batched(keys, batch_size):
+        divergent = check_batch(r, db, batch, key_prefix, stats)
+        stats.batches += 1
+        for key, reason in divergent:
+            print(f"  ⚠️ {key}: {reason}")
+        if delete and divergent:
+            stats.deleted += unlink_batch(r, [key for key, _ in divergent])
+
+    return stats
+
+
+def print_staleness_report(stats: StalenessStats, delete=False):
+    print(f"\n📊 Staleness check ({stats.batches} batches, {stats.elapsed:.2f}s)")
+    for family in ENTITY_TABLES:
+        if not stats.checked[family]:
+            continue
+        print(f"  • {family:<12} checked {stats.checked[family]:>8}  stale {stats.stale[family]:>6}  "
+              f"(row missing {stats.missing_rows[family]})")
+    total_stale = sum(stats.stale.values())
+    if delete:
+        print(f"🗑️ Deleted {stats.deleted} of {total_stale} stale keys")
+    elif total_stale:
+        print(f"💡 Re-run with --delete-stale to remove only the {total_stale} stale keys")
+
+
+def run_staleness_check(families=tuple(ENTITY_TABLES), key_prefix=KEY_PREFIX, scan_count=SCAN_COUNT,
+                        batch_size=CHECK_BATCH_SIZE, delete=False, db_params=None) -> bool:
+    """Connect to Postgres and Redis, run the check and print the report."""
+    db = DatabaseQueryTool(**(db_params or {}))
+    if not db.connect():
+        return False
+
+    try:
+        r = get_redis_connection()
+        print(f"🔍 Checking {', '.join(families)} against Postgres...")
+        stats = check_staleness(r, db, families=families, key_prefix=key_prefix, scan_count=scan_count,
+                                batch_size=batch_size, delete=delete)
+        print_staleness_report(stats, delete=delete)
+        return True
+
+    except redis.ConnectionError as e:
+        print(f"❌ Failed to connect to Redis: {e}")
+        print_connection_help()
+        return False
+
+    except Exception as e:
+        print(f"❌ Error checking cache staleness: {e}")
+        return False
+
+    finally:
+        db.disconnect()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Redis Cache Staleness Checker')
+    parser.add_argument('--families', default=','.join(ENTITY_TABLES),
+                        help=f"Comma-separated families to check ({', '.join(ENTITY_TABLES)})")
+    parser.add_argument('--delete-stale', action='store_true', help='UNLINK only the divergent keys')
+    parser.add_argument('--key-prefix', default=KEY_PREFIX, help='IDistributedCache InstanceName prefix')
+    parser.add_argument('--scan-count', type=int, default=SCAN_COUNT, help='COUNT hint passed to each SCAN call')
+    parser.add_argument('--batch-size', type=int, default=CHECK_BATCH_SIZE, help='Keys checked per batch')
+    add_database_arguments(parser)
+
+    args = parser.parse_args()
+
+    families = [f.strip() for f in args.families.split(',') if f.strip()]
+    unknown = [f for f in families if f not in ENTITY_TABLES]
+    if unknown:
+        parser.error(f"Unknown families: {', '.join(unknown)}")
+
+    success = run_staleness_check(families=families, key_prefix=args.key_prefix, scan_count=args.scan_count,
+                                  batch_size=args.batch_size, delete=args.delete_stale,
+                                  db_params=database_params(args))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
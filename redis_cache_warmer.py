@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Redis cache pre-warmer.
+
+Reads the hot entities (published templates, organisations, active users)
+from Postgres in bulk and writes them into Redis under the exact CacheKeys
+key shapes and expirations, so the first wave of requests after a flush hits
+the cache instead of the database.
+
+The API reads the cache through IDistributedCache, which stores every entry
+as a hash (absexp / sldexp / data) under "<InstanceName><key>" with a key
+expiry. Entries are therefore written with pipelined HSET + EXPIRE rather
+than plain SET/EX, and values are serialised the way RedisCacheService does
+(System.Text.Json, camelCase).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import redis
+
+from clear_redis_cache import (
+    CACHE_EXPIRATIONS,
+    KEY_PREFIX,
+    NODE_CONCURRENCY,
+    add_database_arguments,
+    batched,
+    database_params,
+    get_redis_connection,
+    print_connection_help,
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python_tests', 'tools'))
+from db_query_tool import DatabaseQueryTool  # noqa: E402
+
+# Entries written per pipelined round trip
+WARM_BATCH_SIZE = 500
+
+# .NET DateTime ticks (100ns) at the Unix epoch
+DOTNET_EPOCH_TICKS = 621355968000000000
+
+# IDistributedCache marker for "no sliding expiration"
+NO_SLIDING_EXPIRATION = -1
+
+WARM_FAMILIES = ('template', 'org', 'user')
+
+# Column renames where the entity property is not the camelCased column name
+COLUMN_PROPERTIES = {
+    'template': {'created_by': 'createdById'},
+}
+
+
+class WarmStats:
+    """Counters for a warm-up run."""
+
+    def __init__(self):
+        self.keys = 0
+        self.bytes = 0
+        self.batches = 0
+        self.per_family = {}
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        rate = self.keys / self.elapsed if self.elapsed > 0 else 0.0
+        return (f"{self.keys} keys ({self.bytes / 1024:.1f}KB) written in {self.batches} batches, "
+                f"{self.elapsed:.2f}s, {rate:,.0f} keys/s")
+
+
+def camel_case(name: str) -> str:
+    head, *rest = name.split('_')
+    return head + ''.join(part.capitalize() for part in rest)
+
+
+def dotnet_json_default(value):
+    """Serialise Postgres values the way System.Text.Json writes the entity properties."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            return value.isoformat() + 'Z'
+        return value.isoformat()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def to_entity(row: dict, table: str) -> dict:
+    """Convert a database row into the camelCase shape of the cached entity."""
+    renames = COLUMN_PROPERTIES.get(table, {})
+    return {renames.get(column, camel_case(column)): value for column, value in row.items()}
+
+
+def serialize(value) -> str:
+    return json.dumps(value, default=dotnet_json_default, ensure_ascii=False, separators=(',', ':'))
+
+
+def dotnet_ticks(moment: datetime) -> int:
+    """Convert an aware datetime into .NET UTC ticks, as stored in the absexp field."""
+    return DOTNET_EPOCH_TICKS + int(moment.timestamp() * 10_000_000)
+
+
+def cache_entries_for(family: str, db: DatabaseQueryTool, limit=None):
+    """Yield ``(key, value)`` pairs for one warm family, mirroring the Cached*Service writes."""
+    limit_sql = f" LIMIT {int(limit)}" if limit else ""
+
+    if family == 'template':
+        # CachedTemplateService caches the published list and each template by ID
+        templates = [to_entity(row, 'template') for row in db.execute_query(
+            f"SELECT * FROM template WHERE is_published ORDER BY name{limit_sql};")]
+        if templates:
+            yield 'template:published', templates
+        for template in templates:
+            yield f"template:id:{template['templateId']}", template
+
+    elif family == 'org':
+        for row in db.execute_query(f"SELECT * FROM organisation ORDER BY created_at DESC{limit_sql};"):
+            organisation = to_entity(row, 'organisation')
+            yield f"org:id:{organisation['organisationId']}", organisation
+
+    elif family == 'user':
+        for row in db.execute_query(
+                f"SELECT * FROM users WHERE is_active ORDER BY created_at DESC{limit_sql};"):
+            user = to_entity(row, 'users')
+            yield f"user:id:{user['userId']}", user
+
+
+def write_batch(r, batch, key_prefix: str) -> tuple:
+    """Write one batch of entries with a single pipelined round trip."""
+    now = datetime.now(timezone.utc)
+    written_bytes = 0
+    pipe = r.pipeline(transaction=False)
+    for key, value, ttl in batch:
+        data = serialize(value)
+        written_bytes += len(data)
+        full_key = key_prefix + key
+        pipe.hset(full_key, mapping={
+            'absexp': dotnet_ticks(now + timedelta(seconds=ttl)),
+            'sldexp': NO_SLIDING_EXPIRATION,
+            'data': data,
+        })
+        pipe.expire(full_key, ttl)
+    pipe.execute()
+    return len(batch), written_bytes
+
+
+def warm_cache(r, db: DatabaseQueryTool, families=WARM_FAMILIES, key_prefix=KEY_PREFIX,
+               batch_size=WARM_BATCH_SIZE, concurrency=NODE_CONCURRENCY, limit=None) -> WarmStats:
+    """Load hot entities and write them with up to ``concurrency`` pipelines in flight."""
+    stats = WarmStats()
+    in_flight = set()
+
+    def collect(done):
+        for future in done:
+            keys, written_bytes = future.result()
+            stats.keys += keys
+            stats.bytes += written_bytes
+            stats.batches += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for family in families:
+            ttl = CACHE_EXPIRATIONS[family]
+            count = 0
+            entries = ((key, value, ttl) for key, value in cache_entries_for(family, db, limit))
+            for batch in batched(entries, batch_size):
+                if len(in_flight) >= concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight.add(pool.submit(write_batch, r, batch, key_prefix))
+                count += len(batch)
+            stats.per_family[family] = count
+            print(f"  ✅ {family}: {count} keys queued (TTL {ttl // 60}m)")
+
+        collect(wait(in_flight)[0])
+
+    return stats
+
+
+def run_warm(families=WARM_FAMILIES, key_prefix=KEY_PREFIX, batch_size=WARM_BATCH_SIZE,
+             concurrency=NODE_CONCURRENCY, limit=None, db_params=None) -> bool:
+    """Connect to Postgres and Redis, warm the requested families and print a summary."""
+    db = DatabaseQueryTool(**(db_params or {}))
+    if not db.connect():
+        return False
+
+    try:
+        r = get_redis_connection()
+        print(f"🔥 Warming {', '.join(families)} (batch size {batch_size}, concurrency {concurrency})...")
+        stats = warm_cache(r, db, families=families, key_prefix=key_prefix, batch_size=batch_size,
+                           concurrency=concurrency, limit=limit)
+        print(f"📈 {stats.summary()}")
+        return True
+
+    except redis.ConnectionError as e:
+        print(f"❌ Failed to connect to Redis: {e}")
+        print_connection_help()
+        return False
+
+    except Exception as e:
+        print(f"❌ Error warming Redis cache: {e}")
+        return False
+
+    finally:
+        db.disconnect()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Redis Cache Pre-warmer')
+    parser.add_argument('--families', default=','.join(WARM_FAMILIES),
+                        help=f"Comma-separated families to warm ({', '.join(WARM_FAMILIES)})")
+    parser.add_argument('--limit', type=int, help='Maximum rows loaded per family')
+    parser.add_argument('--key-prefix', default=KEY_PREFIX, help='IDistributedCache InstanceName prefix')
+    parser.add_argument('--batch-size', type=int, default=WARM_BATCH_SIZE, help='Entries per pipelined write')
+    parser.add_argument('--concurrency', type=int, default=NODE_CONCURRENCY, help='Pipelines in flight')
+    add_database_arguments(parser)
+
+    args = parser.parse_args()
+
+    families = [f.strip() for f in args.families.split(',') if f.strip()]
+    unknown = [f for f in families if f not in WARM_FAMILIES]
+    if unknown:
+        parser.error(f"Unknown warm families: {', '.join(unknown)}")
+
+    success = run_warm(families=families, key_prefix=args.key_prefix, batch_size=args.batch_size,
+                       concurrency=args.concurrency, limit=args.limit, db_params=database_params(args))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
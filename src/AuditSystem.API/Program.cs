@@ -170,7 +170,8 @@ builder.Services.AddSignalR(options =>
     options.HandshakeTimeout = TimeSpan.FromSeconds(15);
     options.KeepAliveInterval = TimeSpan.FromSeconds(10);
     options.MaximumReceiveMessageSize = 1024 * 1024; // 1MB
-});
+})
+.AddMessagePackProtocol(); // Binary protocol for high-volume clients; JSON remains the default
 
 // Add controllers with improved JSON options
 builder.Services.AddControllers()
@@ -183,6 +184,10 @@ builder.Services.AddControllers()
         options.JsonSerializerOptions.PropertyNamingPolicy = System.Text.Json.JsonNamingPolicy.CamelCase;
     });
 
+// Accept Content-Encoding: gzip/br/deflate request bodies (large audit responses compress well);
+// the decompressed body is still subject to the request body size limit
+builder.Services.AddRequestDecompression();
+
 // Add JWT authentication
 var jwtIssuer = builder.Configuration["JWT:Issuer"];
 var jwtAudience = builder.Configuration["JWT:Audience"];
@@ -336,6 +341,8 @@ app.UseStaticFiles();
 
 app.UseSerilogRequestLogging();
 
+app.UseRequestDecompression();
+
 app.UseCors();
 
 app.UseAuthentication();